@@ -0,0 +1,55 @@
+"""
+Compare JSON, MessagePack and CBOR codecs: payload size and encode/decode time
+
+Usage:
+    python benchmarks/bench_codecs.py
+"""
+
+from _common import bench, print_table, setup_django
+
+setup_django()
+
+from shanks.codecs import CBORCodec, JSONCodec, MsgPackCodec  # noqa: E402
+
+PAYLOADS = {
+    "small": {"id": 1, "title": "Hello", "published": True},
+    "list": {
+        "data": [
+            {
+                "id": i,
+                "title": f"Post number {i}",
+                "description": "Lorem ipsum dolor sit amet " * 3,
+                "views": i * 17,
+                "rating": i / 7,
+                "tags": ["django", "shanks", "api"],
+            }
+            for i in range(100)
+        ],
+        "pagination": {"page": 1, "limit": 100, "total": 100000},
+    },
+}
+
+
+def main():
+    rows = []
+    for codec in (JSONCodec(), MsgPackCodec(), CBORCodec()):
+        if not codec.is_available():
+            rows.append([codec.media_type, "-", "-", "-", "not installed"])
+            continue
+        for name, payload in PAYLOADS.items():
+            raw = codec.encode(payload)
+            number = 20000 if name == "small" else 500
+            encode = bench(lambda: codec.encode(payload), number=number)
+            decode = bench(lambda: codec.decode(raw), number=number)
+            rows.append(
+                [codec.media_type, name, len(raw), f"{encode:.2f}", f"{decode:.2f}"]
+            )
+    print_table(
+        "Codec comparison (time in microseconds per call)",
+        ["codec", "payload", "bytes", "encode_us", "decode_us"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
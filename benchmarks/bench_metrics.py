@@ -0,0 +1,47 @@
+"""
+Micro-benchmark of the Metrics recording overhead
+
+Compares a request through the view without metrics, with metrics and
+with metrics but no database tracking.
+
+Usage:
+    python benchmarks/bench_metrics.py
+"""
+
+from _common import bench, print_table, setup_django
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+
+from shanks import App, Metrics  # noqa: E402
+
+REQUEST = RequestFactory().get("/api/posts")
+
+
+def make_view(metrics=None):
+    app = App(enable_cache=False)
+    if metrics is not None:
+        app.use(metrics)
+
+    @app.get("api/posts")
+    def posts(req):
+        return {"posts": []}
+
+    return [route for route in app.routes if route["name"] == "posts"][0]["view"]
+
+
+def main():
+    cases = (
+        ("no metrics", make_view()),
+        ("Metrics()", make_view(Metrics())),
+        ("Metrics(track_db=False)", make_view(Metrics(track_db=False))),
+    )
+    rows = []
+    for name, view in cases:
+        rows.append([name, f"{bench(lambda: view(REQUEST), number=5000):.2f}"])
+    print_table("Metrics overhead", ["case", "us_per_request"], rows)
+
+
+if __name__ == "__main__":
+    main()
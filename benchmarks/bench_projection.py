@@ -0,0 +1,59 @@
+"""
+Compare model instances with select= projections for list endpoints
+
+Usage:
+    python benchmarks/bench_projection.py
+"""
+
+import json
+
+from _common import bench, print_table, setup_django
+
+setup_django()
+
+from django.core.management import call_command  # noqa: E402
+from django.core.serializers.json import DjangoJSONEncoder  # noqa: E402
+
+from tests.models import Category, Post  # noqa: E402
+
+ROWS = 1000
+
+call_command("migrate", run_syncdb=True, verbosity=0)
+category = Category.create(slug="news", name="News")
+Post.create_many(
+    {"title": f"Post {i}", "views": i, "category": category} for i in range(ROWS)
+)
+
+
+def instances():
+    posts = Post.find_many().select_related("category")
+    data = [
+        {"id": post.id, "title": post.title, "category.name": post.category.name}
+        for post in posts
+    ]
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+def dicts():
+    data = list(Post.find_many(select=["id", "title", "category.name"]))
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+def tuples():
+    data = list(Post.find_many(select=["id", "title", "category.name"], as_tuples=True))
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+if __name__ == "__main__":
+    assert json.loads(instances()) == json.loads(dicts())
+
+    baseline = bench(instances, number=20)
+    rows = [["instances + dict build", f"{baseline:.0f}", "1.00x"]]
+    for label, func in (("select= (dicts)", dicts), ("select= (tuples)", tuples)):
+        elapsed = bench(func, number=20)
+        rows.append([label, f"{elapsed:.0f}", f"{baseline / elapsed:.2f}x"])
+    print_table(
+        f"List {ROWS} posts with category name -> JSON (SQLite, in-memory)",
+        ["path", "us/call", "speedup"],
+        rows,
+    )
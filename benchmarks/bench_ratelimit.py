@@ -0,0 +1,52 @@
+"""
+Micro-benchmark of the RateLimit middleware overhead
+
+Compares a full request through the view with no middleware, with a
+global in-memory RateLimit, and with a RateLimit filtered to other routes.
+
+Usage:
+    python benchmarks/bench_ratelimit.py
+"""
+
+from _common import bench, print_table, setup_django
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+
+from shanks import App, RateLimit  # noqa: E402
+
+REQUEST = RequestFactory().get("/api/posts")
+
+
+def make_view(*middlewares):
+    app = App(enable_cache=False)
+    for middleware in middlewares:
+        app.use(middleware)
+
+    @app.get("api/posts")
+    def posts(req):
+        return {"posts": []}
+
+    return app.routes[0]["view"]
+
+
+def main():
+    # Large enough that the benchmark never hits the limit
+    limit = 10**9
+    cases = (
+        ("no middleware", make_view()),
+        ("RateLimit (memory)", make_view(RateLimit(limit=limit))),
+        (
+            "RateLimit (other routes)",
+            make_view(RateLimit(limit=limit, routes=["auth/login"])),
+        ),
+    )
+    rows = []
+    for name, view in cases:
+        rows.append([name, f"{bench(lambda: view(REQUEST), number=5000):.2f}"])
+    print_table("RateLimit overhead", ["case", "us_per_request"], rows)
+
+
+if __name__ == "__main__":
+    main()
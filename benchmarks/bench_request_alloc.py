@@ -0,0 +1,88 @@
+"""
+Measure memory allocated per Request with tracemalloc
+
+Compares the slot-based Request with the previous eager implementation
+(reproduced below) for a typical handler that reads method, path and body.
+
+Usage:
+    python benchmarks/bench_request_alloc.py
+"""
+
+import json
+import tracemalloc
+
+from _common import print_table, setup_django
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+
+from shanks import Request  # noqa: E402
+
+
+class EagerRequest:
+    """Request wrapper as it was before __slots__ / lazy materialization"""
+
+    def __init__(self, django_request):
+        self._request = django_request
+        self.method = django_request.method
+        self.path = django_request.path
+        self.headers = django_request.headers
+        self.django = django_request
+
+    @property
+    def body(self):
+        if self._request.content_type == "application/json":
+            return json.loads(self._request.body)
+        return self._request.POST.dict()
+
+
+def handler(req):
+    # Typical handler: a couple of body reads plus method/path checks
+    return req.method, req.path, req.body.get("title"), req.body.get("content")
+
+
+def measure(request_class, django_requests):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = []
+    for django_req in django_requests:
+        req = request_class(django_req)
+        handler(req)
+        keep.append(req)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    count = sum(stat.count_diff for stat in stats)
+    return size / len(django_requests), count / len(django_requests)
+
+
+def main():
+    factory = RequestFactory()
+    payload = json.dumps({"title": "Hello", "content": "World"})
+
+    def make_requests(n=2000):
+        requests = [
+            factory.post("/api/posts", data=payload, content_type="application/json")
+            for _ in range(n)
+        ]
+        for django_req in requests:
+            # Pre-read the raw body so only wrapper allocations are measured
+            django_req.body
+        return requests
+
+    rows = []
+    for name, request_class in (
+        ("eager (before)", EagerRequest),
+        ("slots (after)", Request),
+    ):
+        size, count = measure(request_class, make_requests())
+        rows.append([name, f"{size:.0f}", f"{count:.1f}"])
+    print_table(
+        "Allocations per request (tracemalloc)", ["wrapper", "bytes", "blocks"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
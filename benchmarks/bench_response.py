@@ -0,0 +1,58 @@
+"""
+Micro-benchmark of Response build cost
+
+Compares building a Response and converting it to a Django response with
+headers written one by one versus a precompiled HeaderBlock.
+
+Usage:
+    python benchmarks/bench_response.py
+"""
+
+from _common import bench, print_table, setup_django
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+
+from shanks import HeaderBlock, Response  # noqa: E402
+
+STATIC = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "same-origin",
+    "Cache-Control": "private, max-age=60",
+    "Access-Control-Allow-Origin": "*",
+}
+BLOCK = HeaderBlock(STATIC)
+DATA = {"id": 1, "title": "Hello", "published": True}
+REQUEST = RequestFactory().get("/api/posts/1")
+
+
+def build_only():
+    return Response(DATA)
+
+
+def build_with_header_loop():
+    resp = Response(DATA)
+    for key, value in STATIC.items():
+        resp.header(key, value)
+    return resp.to_django_response(REQUEST)
+
+
+def build_with_header_block():
+    return Response(DATA).to_django_response(REQUEST, BLOCK)
+
+
+def main():
+    rows = []
+    for name, func in (
+        ("Response() only", build_only),
+        ("per-header writes", build_with_header_loop),
+        ("HeaderBlock", build_with_header_block),
+    ):
+        rows.append([name, f"{bench(func, number=20000):.2f}"])
+    print_table("Response build cost", ["case", "us_per_response"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+SQLite under concurrent writers and readers: default vs performance profile
+
+Each writer runs read-then-write transactions (like get_or_create), each
+reader runs short SELECTs, for a fixed duration per configuration.
+
+Usage:
+    python benchmarks/bench_sqlite_concurrency.py [writers] [readers] [seconds]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from _common import ROOT, print_table
+
+sys.path.insert(0, ROOT)
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from shanks.db import DatabaseConfig  # noqa: E402
+
+WRITERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+READERS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+
+TMP = tempfile.mkdtemp(prefix="shanks-sqlite-")
+settings.configure(
+    DATABASES={
+        "default": DatabaseConfig.sqlite(os.path.join(TMP, "default.db")),
+        "performance": DatabaseConfig.sqlite(
+            os.path.join(TMP, "performance.db"), profile="performance"
+        ),
+    },
+    USE_TZ=True,
+)
+django.setup()
+
+from django.db import OperationalError, connections, transaction  # noqa: E402
+
+
+def prepare(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS events "
+            "(id INTEGER PRIMARY KEY, kind TEXT, payload TEXT)"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS events_kind ON events (kind)")
+
+
+LOCK = threading.Lock()
+
+
+def record(counters, **values):
+    with LOCK:
+        for key, value in values.items():
+            counters[key] += value
+
+
+def writer(alias, stop, counters):
+    connection = connections[alias]
+    n = errors = 0
+    while not stop.is_set():
+        try:
+            with transaction.atomic(using=alias):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM events WHERE kind = %s", ["a"])
+                    cursor.fetchone()
+                    cursor.execute(
+                        "INSERT INTO events (kind, payload) VALUES (%s, %s)",
+                        ["a", "x" * 200],
+                    )
+            n += 1
+        except OperationalError:
+            errors += 1
+    record(counters, writes=n, errors=errors)
+    connection.close()
+
+
+def reader(alias, stop, counters):
+    connection = connections[alias]
+    n = errors = 0
+    while not stop.is_set():
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, payload FROM events ORDER BY id DESC LIMIT 20"
+                )
+                cursor.fetchall()
+            n += 1
+        except OperationalError:
+            errors += 1
+    record(counters, reads=n, errors=errors)
+    connection.close()
+
+
+def run(alias):
+    prepare(alias)
+    counters = {"writes": 0, "reads": 0, "errors": 0}
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=writer, args=(alias, stop, counters))
+        for _ in range(WRITERS)
+    ] + [
+        threading.Thread(target=reader, args=(alias, stop, counters))
+        for _ in range(READERS)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counters
+
+
+if __name__ == "__main__":
+    rows = []
+    for alias in ("default", "performance"):
+        counters = run(alias)
+        rows.append(
+            [
+                alias,
+                f"{counters['writes'] / SECONDS:.0f}",
+                f"{counters['reads'] / SECONDS:.0f}",
+                counters["errors"],
+            ]
+        )
+    print_table(
+        f"SQLite, {WRITERS} writers + {READERS} readers, {SECONDS:.0f}s each",
+        ["profile", "writes/s", "reads/s", "lock errors"],
+        rows,
+    )
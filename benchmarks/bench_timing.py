@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of the ServerTiming overhead
+
+Compares a request through three middlewares with timing disabled,
+with the header only and with the header and log record.
+
+Usage:
+    python benchmarks/bench_timing.py
+"""
+
+from _common import bench, print_table, setup_django
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+
+from shanks import App, ServerTiming  # noqa: E402
+
+REQUEST = RequestFactory().get("/api/posts")
+
+
+def passthrough(req, res, next):
+    return next()
+
+
+def make_view(timing=None):
+    app = App(enable_cache=False)
+    if timing is not None:
+        app.use(timing)
+    for _ in range(3):
+        app.use(passthrough)
+
+    @app.get("api/posts")
+    def posts(req):
+        return {"posts": []}
+
+    return app.routes[0]["view"]
+
+
+def main():
+    cases = (
+        ("disabled", make_view()),
+        ("ServerTiming(log=False)", make_view(ServerTiming(log=False))),
+        ("ServerTiming()", make_view(ServerTiming())),
+    )
+    rows = []
+    for name, view in cases:
+        rows.append([name, f"{bench(lambda: view(REQUEST), number=5000):.2f}"])
+    print_table("ServerTiming overhead", ["case", "us_per_request"], rows)
+
+
+if __name__ == "__main__":
+    main()
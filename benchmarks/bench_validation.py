@@ -0,0 +1,83 @@
+"""
+Compare hand-written body checks with compiled validators
+
+Usage:
+    python benchmarks/bench_validation.py
+"""
+
+import json
+
+from _common import bench, print_table, setup_django
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+
+from shanks import Request, Validator  # noqa: E402
+
+SCHEMA = {
+    "title": "string:200",
+    "description": "text:blank",
+    "email": "email",
+    "views": "number:blank",
+    "published": {"type": "boolean", "default": False},
+}
+PAYLOAD = json.dumps(
+    {
+        "title": "Hello",
+        "description": "World",
+        "email": "a@b.co",
+        "views": 10,
+        "published": True,
+    }
+).encode()
+DJANGO_REQUEST = RequestFactory().post(
+    "/posts", data=PAYLOAD, content_type="application/json"
+)
+
+
+def hand_written(req):
+    data = req.body
+    errors = {}
+    title = data.get("title")
+    if not isinstance(title, str) or not title or len(title) > 200:
+        errors["title"] = "invalid"
+    description = data.get("description", "")
+    if not isinstance(description, str):
+        errors["description"] = "invalid"
+    email = data.get("email")
+    if not isinstance(email, str) or "@" not in email:
+        errors["email"] = "invalid"
+    views = data.get("views")
+    if views is not None and not isinstance(views, int):
+        errors["views"] = "invalid"
+    published = data.get("published", False)
+    if not isinstance(published, bool):
+        errors["published"] = "invalid"
+    return errors
+
+
+def main():
+    python_validator = Validator(SCHEMA, use_msgspec=False)
+    msgspec_validator = Validator(SCHEMA)
+
+    cases = [
+        ("hand-written", lambda: hand_written(Request(DJANGO_REQUEST))),
+        (
+            "compiled (python)",
+            lambda: python_validator.validate_request(Request(DJANGO_REQUEST)),
+        ),
+    ]
+    if msgspec_validator.backend == "msgspec":
+        cases.append(
+            (
+                "compiled (msgspec)",
+                lambda: msgspec_validator.validate_request(Request(DJANGO_REQUEST)),
+            )
+        )
+    rows = [[name, f"{bench(func, number=20000):.2f}"] for name, func in cases]
+    print_table("Parse + validate a JSON body", ["validator", "us_per_request"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,27 @@
 from .app import App, auto_discover_routes, include_routers
-from .cors import CORS, enable_cors
+from .cors import CORS, CORSPolicy, enable_cors
 from .db import (
     DatabaseConfig,
     MongoDB,
     Redis,
+    ReplicaRouter,
+    pool_stats,
     setup_mongodb,
     setup_mysql,
     setup_postgres,
     setup_redis,
     setup_sqlite,
 )
+from .loader import DataLoader
+from .nplusone import assert_no_n_plus_one, n_plus_one_detector
+from .ratelimit import RateLimit
+from .concurrency import ConcurrencyLimit
+from .metrics import Metrics
+from .timing import ServerTiming
+from .tracing import Tracing
+from .profiling import Profiler
 from .request import Request
-from .response import Response
+from .response import Response, stream_response
 from .swagger import SwaggerUI, enable_swagger, swagger
 from .cache import (
     cache,
@@ -19,7 +29,13 @@ from .cache import (
     invalidate_cache,
     smart_cache_invalidation,
     get_cache,
+    set_cache,
+    DjangoCache,
+    RedisCache,
 )
+from .headers import HeaderBlock
+from .validation import Validator
+from .codecs import Codec, CodecRegistry, get_codecs, register_codec
 from .template import render, render_string, render_html
 from .admin import enable_admin, register_model, unregister_model, customize_admin
 
@@ -53,6 +69,9 @@ def __getattr__(name):
         "CASCADE",
         "SET_NULL",
         "PROTECT",
+        "Page",
+        "paginate",
+        "estimated_count",
     ]:
         from . import orm
 
@@ -113,8 +132,21 @@ __all__ = [
     "include_routers",
     "Request",
     "Response",
+    "stream_response",
+    "HeaderBlock",
+    "Validator",
     "CORS",
+    "CORSPolicy",
     "enable_cors",
+    "RateLimit",
+    "ConcurrencyLimit",
+    "Metrics",
+    "ServerTiming",
+    "Tracing",
+    "Profiler",
+    "DataLoader",
+    "n_plus_one_detector",
+    "assert_no_n_plus_one",
     "SwaggerUI",
     "enable_swagger",
     "swagger",
@@ -124,6 +156,14 @@ __all__ = [
     "invalidate_cache",
     "smart_cache_invalidation",
     "get_cache",
+    "set_cache",
+    "DjangoCache",
+    "RedisCache",
+    # Codecs
+    "Codec",
+    "CodecRegistry",
+    "get_codecs",
+    "register_codec",
     # Template
     "render",
     "render_string",
@@ -156,8 +196,13 @@ __all__ = [
     "CASCADE",
     "SET_NULL",
     "PROTECT",
+    "Page",
+    "paginate",
+    "estimated_count",
     # Database
     "DatabaseConfig",
+    "ReplicaRouter",
+    "pool_stats",
     "MongoDB",
     "Redis",
     "setup_postgres",
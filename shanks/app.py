@@ -1,13 +1,97 @@
 from functools import wraps
 from typing import Callable, List
+import inspect
 import re
 import sys
+import time
+import weakref
 
 from django.http import JsonResponse
 from django.urls import path, re_path
 
+from .headers import HeaderBlock
 from .request import Request
 from .response import Response
+from .validation import compile_schema
+
+# Parameter count of each middleware, so the chain doesn't call
+# inspect.signature() on every request
+_arity_cache = weakref.WeakKeyDictionary()
+
+
+def _middleware_arity(middleware):
+    try:
+        return _arity_cache[middleware]
+    except KeyError:
+        arity = _arity_cache[middleware] = len(inspect.signature(middleware).parameters)
+        return arity
+    except TypeError:
+        # Not weak-referenceable (e.g. some builtins): inspect every time
+        return len(inspect.signature(middleware).parameters)
+
+
+def _wrap_middleware(middleware, around):
+    """
+    (req, res, next) version of a middleware that runs inside around(name)
+
+    `around` returns a context manager (a timing phase, a span) and `name`
+    is the middleware's phase_name(). Used by ServerTiming and Tracing.
+    """
+    from .timing import phase_name
+
+    name = phase_name(middleware)
+    express = _middleware_arity(middleware) == 3
+
+    def wrapped(req, res, next):
+        with around(name):
+            if express:
+                return middleware(req, res, next)
+            # Legacy style: (req); unless it answers, the rest of the
+            # chain's result is the result
+            result = middleware(req)
+            if not result:
+                result = next()
+            return result
+
+    wrapped.__name__ = name
+    return wrapped
+
+
+def _wrap_chain(chains, middlewares, around):
+    """_wrap_middleware() over a chain, built once and kept in `chains`"""
+    try:
+        key = tuple(middlewares)
+        return chains[key]
+    except KeyError:
+        wrapped = chains[key] = [_wrap_middleware(m, around) for m in middlewares]
+        return wrapped
+    except TypeError:
+        # Unhashable middleware: build it every time
+        return [_wrap_middleware(m, around) for m in middlewares]
+
+
+def _track_queries(hook, dispatch_uid):
+    """
+    Add an execute_wrapper to new connections and this thread's open ones
+
+    Used by Metrics, ServerTiming and Tracing to observe every query.
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def install(sender=None, connection=None, **kwargs):
+        # Inserted first: execute_wrapper() blocks pop the last wrapper on
+        # exit, and this can run inside one when a query opens the connection
+        if hook not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, hook)
+
+    connection_created.connect(install, weak=False, dispatch_uid=dispatch_uid)
+    try:
+        opened = connections.all(initialized_only=True)
+    except TypeError:  # Django < 4.1
+        opened = connections.all()
+    for connection in opened:
+        install(connection=connection)
 
 
 class App:
@@ -16,6 +100,13 @@ class App:
         self.middlewares = []
         self.prefix = prefix.rstrip("/")
         self._cache_enabled = enable_cache
+        self._static_headers = None
+        self._cors = None
+        self._timeout = None
+        self._metrics = None
+        self._timing = None
+        self._tracing = None
+        self._profiler = None
 
         # Auto-enable cache and smart invalidation by default
         if enable_cache:
@@ -111,10 +202,76 @@ class App:
                 description=config["description"],
                 docs_url=config["docs_url"],
             )
+        elif getattr(middleware, "_cors_policy", None) is not None:
+            # CORS is applied by the response pipeline, not the middleware chain
+            self._cors = middleware._cors_policy
+        elif getattr(middleware, "_shanks_metrics", False):
+            # Metrics are recorded by the view pipeline; the endpoint
+            # bypasses the middleware chain (and so the response cache)
+            self._metrics = middleware
+            if middleware.path:
+                self.routes.append(
+                    {
+                        "path": f"{self.prefix}/{middleware.path}".strip("/"),
+                        "view": middleware.view,
+                        "name": "shanks_metrics",
+                    }
+                )
+        elif getattr(middleware, "_server_timing", False):
+            # Switches the view pipeline to its timed path
+            self._timing = middleware
+        elif getattr(middleware, "_shanks_profiler", False):
+            # Sampled requests are profiled by the view pipeline; like
+            # /metrics, the endpoint bypasses the middleware chain
+            self._profiler = middleware
+            if middleware.path:
+                self.routes.append(
+                    {
+                        "path": f"{self.prefix}/{middleware.path}".strip("/"),
+                        "view": middleware.view,
+                        "name": "shanks_profiler",
+                    }
+                )
+        elif getattr(middleware, "_shanks_rate_limit", False):
+            # The response cache moves behind the limiter, so cache hits
+            # are limited too and carry this client's RateLimit-* headers
+            caches = [
+                m
+                for m in self.middlewares
+                if getattr(m, "_shanks_response_cache", False)
+            ]
+            self.middlewares = [m for m in self.middlewares if m not in caches]
+            self.middlewares.append(middleware)
+            self.middlewares.extend(caches)
+        elif getattr(middleware, "_shanks_tracing", False):
+            # Spans are opened by the view pipeline; a no-op without otel
+            if middleware.enabled:
+                self._tracing = middleware
         else:
             self.middlewares.append(middleware)
         return self
 
+    def set_headers(self, headers):
+        """
+        Set static headers added to every response of this app/group
+
+        The headers are compiled once into an immutable HeaderBlock and
+        merged with any headers set previously. Route-level headers and
+        headers set by the handler take precedence.
+
+        Example:
+            from shanks import App, HeaderBlock
+
+            app = App()
+            app.set_headers(HeaderBlock.security())
+            app.set_headers({"Cache-Control": "no-store"})
+        """
+        if self._static_headers is None:
+            self._static_headers = HeaderBlock.coerce(headers)
+        else:
+            self._static_headers = self._static_headers.merge(headers)
+        return self
+
     def disable_cache(self):
         """
         Disable auto-caching for this app/group
@@ -172,102 +329,215 @@ class App:
                 next()
                 return
 
-            from .cache import cache_key, get_cache
+            from .cache import cache_get, cache_key, cache_set, cacheable, get_cache
 
             cache = get_cache()
 
             key = cache_key(req.django)
-            cached = cache.get(key)
+            cached = cache_get(cache, key)
             if cached is not None:
                 return cached
 
             result = next()
-            if result is not None:
-                cache.set(key, result, ttl)
+            if cacheable(result):
+                cache_set(cache, key, result, ttl)
             return result
 
+        custom_cache._shanks_response_cache = True
         self.middlewares.append(custom_cache)
         self.middlewares.append(smart_cache_invalidation)
         return self
 
-    def _create_view(self, handler: Callable, method: str):
+    def _create_view(
+        self,
+        handler: Callable,
+        method: str,
+        headers=None,
+        body=None,
+        route=None,
+        timeout=None,
+    ):
         """Create Django view from handler"""
-
-        @wraps(handler)
-        def view(request, *args, **kwargs):
+        route_headers = HeaderBlock.coerce(headers)
+        body_validator = compile_schema(body) if body is not None else None
+
+        def finalize(result, request):
+            """Turn a handler/middleware result into a Django response"""
+            if isinstance(result, Response):
+                response = result.to_django_response(request, route_headers)
+            elif isinstance(result, dict):
+                response = Response(result).to_django_response(request, route_headers)
+            else:
+                response = result
+                if response is None:
+                    return response
+                if route_headers:
+                    route_headers.apply(response)
+            if self._static_headers:
+                self._static_headers.apply(response)
+            if self._cors is not None:
+                self._cors.apply(request, response)
+            return response
+
+        def dispatch(
+            request, args, kwargs, deadline=None, observation=None, timeline=None
+        ):
             # Wrap Django request
-            app_request = Request(request)
+            app_request = Request(request, kwargs, route, deadline)
             app_response = Response()
 
-            # Store reference for CORS
-            request._shanks_request = app_request
+            def call_handler():
+                if observation is not None:
+                    start = time.perf_counter()
+                if timeline is not None:
+                    timeline.enter("handler")
+                try:
+                    result = handler(app_request, *args, **kwargs)
+                    if inspect.iscoroutine(result):
+                        # Async handler: run it, cancelled at the deadline
+                        from .deadline import run_coroutine
+
+                        result = run_coroutine(result, deadline)
+                finally:
+                    if timeline is not None:
+                        timeline.exit()
+                if observation is not None:
+                    observation.handler_seconds += time.perf_counter() - start
+                return result
 
-            # Middleware chain
+            # Middleware chain; with Tracing/ServerTiming, each one wrapped
+            # in a span/timer
+            middlewares = self.middlewares
+            if self._tracing is not None:
+                middlewares = self._tracing.chain(middlewares)
+            if timeline is not None:
+                middlewares = self._timing.chain(middlewares)
             middleware_index = [0]
             handler_called = [False]
 
             def next_middleware():
                 """Call next middleware in chain"""
-                if middleware_index[0] < len(self.middlewares):
-                    current = self.middlewares[middleware_index[0]]
+                if middleware_index[0] < len(middlewares):
+                    current = middlewares[middleware_index[0]]
                     middleware_index[0] += 1
 
                     # Call middleware with (req, res, next)
-                    import inspect
-
-                    sig = inspect.signature(current)
-                    param_count = len(sig.parameters)
+                    param_count = _middleware_arity(current)
 
                     if param_count == 3:
                         # Express.js style: (req, res, next)
                         result = current(app_request, app_response, next_middleware)
                     elif param_count == 1:
-                        # Legacy style: (req)
+                        # Legacy style: (req); unless it answers, the rest of
+                        # the chain's result (e.g. a 422) is the result
                         result = current(app_request)
                         if not result:
-                            next_middleware()
+                            result = next_middleware()
                     else:
                         # Default: call with req
                         result = current(app_request)
                         if not result:
-                            next_middleware()
+                            result = next_middleware()
 
                     return result
                 else:
-                    # All middlewares done, call handler
+                    # All middlewares done, validate body and call handler
                     if not handler_called[0]:
+                        if body_validator is not None:
+                            if timeline is not None:
+                                timeline.enter("validation")
+                            try:
+                                errors = body_validator.validate_request(app_request)
+                            finally:
+                                if timeline is not None:
+                                    timeline.exit()
+                            if errors:
+                                return body_validator.error_response(errors)
                         handler_called[0] = True
-                        return handler(app_request, *args, **kwargs)
+                        return call_handler()
 
             # Start middleware chain
             result = next_middleware()
 
-            # If middleware returned a response, use it
-            if result:
-                if isinstance(result, Response):
-                    return result.to_django_response(request)
-                elif isinstance(result, dict):
-                    return JsonResponse(result)
-                return result
+            if not result:
+                if not handler_called[0]:
+                    # Fallback
+                    return JsonResponse({"error": "No response"}, status=500)
+                # Otherwise use handler response
+                result = call_handler()
+
+            # Turn the middleware's or handler's result into the response
+            if timeline is None:
+                return finalize(result, request)
+            timeline.enter("serialize")
+            try:
+                return finalize(result, request)
+            finally:
+                timeline.exit()
+
+        def run(request, args, kwargs, observation=None, timeline=None):
+            limit = timeout if timeout is not None else self._timeout
+            if limit is None:
+                return dispatch(request, args, kwargs, None, observation, timeline)
 
-            # Otherwise use handler response
-            if handler_called[0]:
-                response = handler(app_request, *args, **kwargs)
-                if isinstance(response, Response):
-                    return response.to_django_response(request)
-                elif isinstance(response, dict):
-                    return JsonResponse(response)
-                return response
+            from .deadline import DeadlineExceeded, deadline_scope
 
-            # Fallback
-            return JsonResponse({"error": "No response"}, status=500)
+            with deadline_scope(limit) as deadline:
+                try:
+                    return dispatch(
+                        request, args, kwargs, deadline, observation, timeline
+                    )
+                except DeadlineExceeded:
+                    timed_out = Response({"error": "Request timed out"}, status=504)
+                    return finalize(timed_out, request)
+
+        def observed(request, args, kwargs, timeline=None):
+            metrics = self._metrics
+            if metrics is None:
+                return run(request, args, kwargs, None, timeline)
+            with metrics.observe(route, method) as observation:
+                observation.response = run(request, args, kwargs, observation, timeline)
+                return observation.response
+
+        def timed(request, args, kwargs):
+            timing = self._timing
+            if timing is None:
+                return observed(request, args, kwargs)
+            with timing.measure(route, method, request) as timeline:
+                timeline.response = observed(request, args, kwargs, timeline)
+                return timeline.response
+
+        def traced(request, args, kwargs):
+            tracing = self._tracing
+            if tracing is None:
+                return timed(request, args, kwargs)
+            with tracing.request(request, route, method) as request_span:
+                request_span.response = timed(request, args, kwargs)
+                return request_span.response
+
+        @wraps(handler)
+        def view(request, *args, **kwargs):
+            profiler = self._profiler
+            if profiler is None or not profiler.should_profile(request):
+                return traced(request, args, kwargs)
+            with profiler.profile(route, method):
+                return traced(request, args, kwargs)
+
+        def preflight(request):
+            """Answer a CORS preflight request, if CORS is enabled"""
+            if self._cors is None:
+                return None
+            return self._cors.preflight_response(request)
 
         # Store HTTP method on view for later grouping
         view._http_method = method
+        view._route = route
+        view._preflight = preflight
+        view._body_schema = body_validator
         return view
 
-    def get(self, route: str):
-        """Decorator for GET routes"""
+    def _add_route(self, method: str, route: str, **options):
+        """Register a handler for method + route (shared by get/post/...)"""
 
         def decorator(handler):
             # Clean up route to avoid double slashes
@@ -276,7 +546,9 @@ class App:
             self.routes.append(
                 {
                     "path": full_path,
-                    "view": self._create_view(handler, "GET"),
+                    "view": self._create_view(
+                        handler, method, route=full_path, **options
+                    ),
                     "name": handler.__name__,
                 }
             )
@@ -284,85 +556,70 @@ class App:
 
         return decorator
 
-    def post(self, route: str):
-        """Decorator for POST routes"""
-
-        def decorator(handler):
-            # Clean up route to avoid double slashes
-            route_clean = route.lstrip("/")
-            full_path = f"{self.prefix}/{route_clean}".strip("/")
-            self.routes.append(
-                {
-                    "path": full_path,
-                    "view": self._create_view(handler, "POST"),
-                    "name": handler.__name__,
-                }
-            )
-            return handler
+    def get(self, route: str, headers=None, timeout=None):
+        """
+        Decorator for GET routes
 
-        return decorator
+        Args:
+            route: Route path, e.g. 'api/posts/<post_id>'
+            headers: Static headers (dict or HeaderBlock) added to every response
+            timeout: Seconds the request may take (overrides the group default).
+                Async handlers are cancelled and database queries refused
+                once it passes; the client gets 504. Sync handlers can read
+                req.deadline.
 
-    def put(self, route: str):
-        """Decorator for PUT routes"""
+        Example:
+            @app.get("api/reports/<report_id>", timeout=5)
+            def get_report(req, report_id):
+                return {"report": build_report(report_id)}
+        """
+        return self._add_route("GET", route, headers=headers, timeout=timeout)
 
-        def decorator(handler):
-            # Clean up route to avoid double slashes
-            route_clean = route.lstrip("/")
-            full_path = f"{self.prefix}/{route_clean}".strip("/")
-            self.routes.append(
-                {
-                    "path": full_path,
-                    "view": self._create_view(handler, "PUT"),
-                    "name": handler.__name__,
-                }
-            )
-            return handler
+    def post(self, route: str, headers=None, body=None, timeout=None):
+        """
+        Decorator for POST routes
 
-        return decorator
+        Args:
+            route: Route path
+            headers: Static headers (dict or HeaderBlock) added to every response
+            body: Body schema (dict in shanks.schema vocabulary or Validator);
+                invalid bodies are answered with 422 before the handler runs
+            timeout: Seconds the request may take (see get())
 
-    def delete(self, route: str):
-        """Decorator for DELETE routes"""
+        Example:
+            @app.post("api/posts", body={"title": "string:100", "content": "text"})
+            def create_post(req):
+                return {"title": req.body["title"]}
+        """
+        return self._add_route(
+            "POST", route, headers=headers, body=body, timeout=timeout
+        )
 
-        def decorator(handler):
-            # Clean up route to avoid double slashes
-            route_clean = route.lstrip("/")
-            full_path = f"{self.prefix}/{route_clean}".strip("/")
-            self.routes.append(
-                {
-                    "path": full_path,
-                    "view": self._create_view(handler, "DELETE"),
-                    "name": handler.__name__,
-                }
-            )
-            return handler
+    def put(self, route: str, headers=None, body=None, timeout=None):
+        """Decorator for PUT routes"""
+        return self._add_route(
+            "PUT", route, headers=headers, body=body, timeout=timeout
+        )
 
-        return decorator
+    def delete(self, route: str, headers=None, timeout=None):
+        """Decorator for DELETE routes"""
+        return self._add_route("DELETE", route, headers=headers, timeout=timeout)
 
-    def patch(self, route: str):
+    def patch(self, route: str, headers=None, body=None, timeout=None):
         """Decorator for PATCH routes"""
+        return self._add_route(
+            "PATCH", route, headers=headers, body=body, timeout=timeout
+        )
 
-        def decorator(handler):
-            # Clean up route to avoid double slashes
-            route_clean = route.lstrip("/")
-            full_path = f"{self.prefix}/{route_clean}".strip("/")
-            self.routes.append(
-                {
-                    "path": full_path,
-                    "view": self._create_view(handler, "PATCH"),
-                    "name": handler.__name__,
-                }
-            )
-            return handler
-
-        return decorator
-
-    def group(self, prefix: str, *middlewares):
+    def group(self, prefix: str, *middlewares, timeout=None):
         """
         Create a route group with prefix (like Gin)
 
         Args:
             prefix: URL prefix for the group
             *middlewares: Optional middlewares to apply to all routes in this group
+            timeout: Default timeout (seconds) for the group's routes;
+                inherited from the parent when not given
 
         Returns:
             New App instance with the prefix and middlewares
@@ -375,6 +632,9 @@ class App:
             # With middleware
             protected = app.group('api/v1/admin', auth_middleware)
             protected.get('users', get_users)
+
+            # With a default timeout
+            reports = app.group('api/v1/reports', timeout=10)
         """
         # Inherit cache setting from parent
         group_app = App(prefix=f"{self.prefix}/{prefix}".strip("/"), enable_cache=False)
@@ -383,6 +643,15 @@ class App:
         for middleware in self.middlewares:
             group_app.middlewares.append(middleware)
 
+        # Inherit static headers, CORS policy and timeout
+        group_app._static_headers = self._static_headers
+        group_app._cors = self._cors
+        group_app._timeout = self._timeout if timeout is None else timeout
+        group_app._metrics = self._metrics
+        group_app._timing = self._timing
+        group_app._tracing = self._tracing
+        group_app._profiler = self._profiler
+
         # Add additional middlewares to the group
         for middleware in middlewares:
             group_app.use(middleware)
@@ -434,10 +703,18 @@ class App:
                     method = request.method
                     if method in methods_map:
                         return methods_map[method]["view"](request, *args, **kwargs)
-                    else:
-                        return JsonResponse(
-                            {"error": f"Method {method} not allowed"}, status=405
-                        )
+
+                    # CORS preflight for routes without an explicit OPTIONS handler
+                    if method == "OPTIONS":
+                        for route in methods_map.values():
+                            preflight = getattr(route["view"], "_preflight", None)
+                            response = preflight(request) if preflight else None
+                            if response is not None:
+                                return response
+
+                    return JsonResponse(
+                        {"error": f"Method {method} not allowed"}, status=405
+                    )
 
                 return combined_view
 
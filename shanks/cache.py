@@ -2,72 +2,220 @@
 
 import hashlib
 import json
+import os
+import pickle
+import re
+import threading
 import time
+from collections import OrderedDict
 from functools import wraps
 
+from .metrics import record_cache
+from .response import Response
+from .tracing import span
+
 
 class SimpleCache:
-    """Simple in-memory cache with TTL"""
+    """
+    Simple in-memory cache with TTL
 
-    def __init__(self):
-        self._cache = {}
-        self._timestamps = {}
+    Holds at most `max_entries` keys, evicting the least recently used
+    first, and sweeps expired entries every `sweep_interval` seconds.
+    Entries nobody reads again - old query cache generations, one-off
+    URLs - can't grow memory without bound.
+    """
+
+    def __init__(self, max_entries=10000, sweep_interval=60):
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._cache = OrderedDict()  # key -> (value, expires_at, path)
         self._path_to_keys = {}  # Map paths to their cache keys
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.Lock()
 
     def get(self, key):
         """Get value from cache if not expired"""
-        if key in self._cache:
-            timestamp = self._timestamps.get(key, 0)
-            if time.time() - timestamp < self._cache[key]["ttl"]:
-                return self._cache[key]["value"]
-            else:
-                # Expired, remove
-                del self._cache[key]
-                del self._timestamps[key]
-                # Clean up path mapping
-                for path, keys in list(self._path_to_keys.items()):
-                    if key in keys:
-                        keys.discard(key)
-                        if not keys:
-                            del self._path_to_keys[path]
-        return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._cache.move_to_end(key)
+            return entry[0]
 
     def set(self, key, value, ttl=300, path=None):
         """Set value in cache with TTL (default 5 minutes)"""
-        self._cache[key] = {"value": value, "ttl": ttl}
-        self._timestamps[key] = time.time()
-        # Track which path this key belongs to
-        if path:
-            if path not in self._path_to_keys:
-                self._path_to_keys[path] = set()
-            self._path_to_keys[path].add(key)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            if now >= self._next_sweep:
+                self._sweep(now)
+            while len(self._cache) >= self.max_entries:
+                self._remove(next(iter(self._cache)))
+            self._cache[key] = (value, now + ttl, path)
+            # Track which path this key belongs to
+            if path:
+                self._path_to_keys.setdefault(path, set()).add(key)
+
+    def _remove(self, key):
+        _, _, path = self._cache.pop(key)
+        keys = self._path_to_keys.get(path)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._path_to_keys[path]
+
+    def _sweep(self, now):
+        """Drop every expired entry"""
+        expired = [key for key, entry in self._cache.items() if entry[1] <= now]
+        for key in expired:
+            self._remove(key)
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self):
+        return len(self._cache)
 
     def delete(self, key):
         """Delete key from cache"""
-        if key in self._cache:
-            del self._cache[key]
-            del self._timestamps[key]
-            # Clean up path mapping
-            for path, keys in list(self._path_to_keys.items()):
-                if key in keys:
-                    keys.discard(key)
-                    if not keys:
-                        del self._path_to_keys[path]
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
 
     def clear(self):
         """Clear all cache"""
-        self._cache.clear()
-        self._timestamps.clear()
-        self._path_to_keys.clear()
+        with self._lock:
+            self._cache.clear()
+            self._path_to_keys.clear()
 
     def invalidate_pattern(self, pattern):
         """Invalidate all keys for paths matching pattern"""
-        keys_to_delete = set()
-        for path, keys in list(self._path_to_keys.items()):
-            if pattern in path:
-                keys_to_delete.update(keys)
-        for key in keys_to_delete:
-            self.delete(key)
+        with self._lock:
+            keys_to_delete = set()
+            for path, keys in self._path_to_keys.items():
+                if pattern in path:
+                    keys_to_delete.update(keys)
+            for key in keys_to_delete:
+                self._remove(key)
+
+
+class DjangoCache:
+    """
+    Use a Django cache (Redis, Memcached, database...) as the Shanks cache
+
+    Keys live under `prefix` plus a namespace token stored in the cache
+    itself. Django's cache API can't enumerate keys, so clear() and
+    invalidate_pattern() write a new token: every Shanks entry is orphaned
+    (and expires with its TTL) while the rest of the alias - sessions,
+    other apps' keys - is left alone.
+
+    Example:
+        from shanks import DjangoCache, set_cache
+
+        set_cache(DjangoCache("default"))
+    """
+
+    def __init__(self, alias="default", prefix="shanks:cache:"):
+        from django.core.cache import caches
+
+        self._cache = caches[alias]
+        self.prefix = prefix
+        self._namespace_key = prefix + "namespace"
+
+    def _key(self, key):
+        namespace = self._cache.get(self._namespace_key)
+        if namespace is None:
+            self._cache.add(self._namespace_key, os.urandom(6).hex(), None)
+            namespace = self._cache.get(self._namespace_key)
+        return f"{self.prefix}{namespace}:{key}"
+
+    def get(self, key):
+        return self._cache.get(self._key(key))
+
+    def set(self, key, value, ttl=300, path=None):
+        self._cache.set(self._key(key), value, ttl)
+
+    def delete(self, key):
+        self._cache.delete(self._key(key))
+
+    def clear(self):
+        # A random token, like the query cache generations, so concurrent
+        # clears never need a read-modify-write
+        self._cache.set(self._namespace_key, os.urandom(6).hex(), None)
+
+    def invalidate_pattern(self, pattern):
+        self.clear()
+
+
+class RedisCache:
+    """
+    Shanks cache stored in Redis, shared by every worker process
+
+    Values are pickled and go through Redis' binary client, so any value
+    (bytes included) round-trips unchanged.
+
+    Example:
+        from shanks import RedisCache, set_cache
+        from shanks.db import Redis
+
+        Redis.connect(host="localhost")
+        set_cache(RedisCache())
+    """
+
+    def __init__(self, prefix="shanks:cache:", client=None):
+        self.prefix = prefix
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from .db import Redis
+
+            self._client = Redis.get_binary_client()
+        return self._client
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl=300, path=None):
+        full_key = self.prefix + key
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if not path:
+            self.client.set(full_key, data, ex=ttl)
+            return
+        path_key = f"{self.prefix}path:{path}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(full_key, data, ex=ttl)
+        pipe.sadd(path_key, full_key)
+        pipe.expire(path_key, ttl)
+        pipe.execute()
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def _delete_matching(self, match):
+        from .db import Redis
+
+        with Redis.pipeline_batch(size=500, client=self.client) as pipe:
+            for key in self.client.scan_iter(match=match, count=500):
+                pipe.delete(key)
+
+    def clear(self):
+        self._delete_matching(self._escape(self.prefix) + "*")
+
+    def invalidate_pattern(self, pattern):
+        match = f"{self._escape(self.prefix)}path:*{self._escape(pattern)}*"
+        for path_key in self.client.scan_iter(match=match, count=500):
+            keys = list(self.client.smembers(path_key))
+            self.client.delete(path_key, *keys)
+
+    @staticmethod
+    def _escape(value):
+        """Escape glob characters for SCAN MATCH"""
+        return re.sub(r"([*?\[\]])", r"\\\1", value)
 
 
 # Global cache instance
@@ -79,6 +227,19 @@ def get_cache():
     return _cache
 
 
+def set_cache(backend):
+    """
+    Replace the global cache backend
+
+    Any object with get(key), set(key, value, ttl=..., path=None),
+    delete(key), clear() and invalidate_pattern(pattern) works. Response
+    caching and the ORM query cache both use it.
+    """
+    global _cache
+    _cache = backend
+    return backend
+
+
 def cache_key(request):
     """Generate cache key from request"""
     # Handle both Shanks Request wrapper and Django request
@@ -99,6 +260,33 @@ def cache_key(request):
     return hashlib.md5(key_string.encode()).hexdigest()
 
 
+def cache_get(backend, key):
+    """Read a cached response, recording the hit/miss (metrics, tracing)"""
+    with span("cache get", **{"shanks.cache.key": key}) as current:
+        cached = backend.get(key)
+        if current is not None:
+            current.set_attribute("shanks.cache.hit", cached is not None)
+    record_cache(cached is not None)
+    return cached
+
+
+def cacheable(result):
+    """
+    Whether a handler result can be stored and replayed from the cache
+
+    Only Response objects and dicts are. Django responses can't be replayed
+    safely; the StreamingHttpResponse of stream_response() is consumed by
+    the first client and can't be pickled for Redis.
+    """
+    return isinstance(result, (Response, dict))
+
+
+def cache_set(backend, key, value, ttl, **kwargs):
+    """Store a response in the cache (traced)"""
+    with span("cache set", **{"shanks.cache.key": key}):
+        backend.set(key, value, ttl=ttl, **kwargs)
+
+
 def cache(ttl=300, methods=None):
     """
     Decorator to cache endpoint responses
@@ -127,7 +315,7 @@ def cache(ttl=300, methods=None):
             key = cache_key(request)
 
             # Try to get from cache
-            cached = _cache.get(key)
+            cached = cache_get(_cache, key)
             if cached is not None:
                 return cached
 
@@ -135,7 +323,8 @@ def cache(ttl=300, methods=None):
             response = func(request, *args, **kwargs)
 
             # Cache the response
-            _cache.set(key, response, ttl)
+            if cacheable(response):
+                cache_set(_cache, key, response, ttl)
 
             return response
 
@@ -160,7 +349,7 @@ def auto_cache(req, res, next):
     key = cache_key(req)
 
     # Try to get from cache
-    cached = _cache.get(key)
+    cached = cache_get(_cache, key)
     if cached is not None:
         # Add cache header
         if hasattr(res, "headers"):
@@ -171,8 +360,8 @@ def auto_cache(req, res, next):
     result = next()
 
     # Cache the response with path for invalidation
-    if result is not None:
-        _cache.set(key, result, ttl=300, path=req.path)  # Pass path for tracking
+    if cacheable(result):
+        cache_set(_cache, key, result, 300, path=req.path)  # Pass path for tracking
 
     return result
 
@@ -225,10 +414,18 @@ def smart_cache_invalidation(req, res, next):
     return result
 
 
+# Recognized by App.use(): a RateLimit is placed ahead of the response cache
+auto_cache._shanks_response_cache = True
+smart_cache_invalidation._shanks_response_cache = True
+
+
 __all__ = [
     "cache",
     "auto_cache",
     "invalidate_cache",
     "smart_cache_invalidation",
     "get_cache",
+    "set_cache",
+    "DjangoCache",
+    "RedisCache",
 ]
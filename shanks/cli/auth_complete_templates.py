@@ -364,12 +364,22 @@ def get_complete_auth_route_template():
     return '''"""
 Complete Authentication Routes with Email Verification
 """
-from shanks import App
+from shanks import App, RateLimit
 from internal.controller import auth_controller
 
 # Group all auth routes under /api/v1/auth
 router = App(prefix='/api/v1/auth')
 
+# Password hashing and e-mail sending are expensive: limit them per client.
+# Behind a reverse proxy, pass trust_proxy=<number of proxies> so the client
+# ip is read from the proxies' X-Forwarded-For entries
+router.use(RateLimit(
+    limit=5,
+    period=60,
+    key=('ip', 'route'),
+    routes=['login', 'forgot-password', 'resend-verification'],
+))
+
 @router.post('/register')
 def register_route(req):
     """Register new user"""
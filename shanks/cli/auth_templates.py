@@ -146,12 +146,17 @@ def get_simple_auth_route_template():
     return '''"""
 Authentication Routes
 """
-from shanks import App
+from shanks import App, RateLimit
 from internal.controller import auth_controller
 
 # Group all auth routes under /api/v1/auth
 router = App(prefix='/api/v1/auth')
 
+# Every login runs a password hash: limit attempts per client.
+# Behind a reverse proxy, pass trust_proxy=<number of proxies> so the client
+# ip is read from the proxies' X-Forwarded-For entries
+router.use(RateLimit(limit=5, period=60, key=('ip', 'route'), routes=['login']))
+
 @router.post('/register')
 def register_route(req):
     """Register new user"""
@@ -0,0 +1,411 @@
+"""Benchmark command: load generator and framework micro-benchmarks"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Lower is better for these; throughput ("rps") is higher-is-better
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def setup_project(settings_module=None):
+    """
+    Configure Django for the project in the current directory
+
+    The settings module comes from `settings_module`, DJANGO_SETTINGS_MODULE
+    or the project's manage.py. Outside a project (micro-benchmarks only)
+    a minimal configuration is used.
+    """
+    import django
+    from django.conf import settings
+
+    if settings.configured:
+        return
+    cwd = os.getcwd()
+    if cwd not in sys.path:
+        sys.path.insert(0, cwd)
+    if settings_module:
+        os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+    elif "DJANGO_SETTINGS_MODULE" not in os.environ:
+        manage = Path("manage.py")
+        found = None
+        if manage.exists():
+            found = re.search(
+                r"DJANGO_SETTINGS_MODULE['\"],\s*['\"]([\w.]+)['\"]",
+                manage.read_text(encoding="utf-8"),
+            )
+        if found:
+            os.environ["DJANGO_SETTINGS_MODULE"] = found.group(1)
+        else:
+            settings.configure(
+                DEBUG=False,
+                SECRET_KEY="shanks-bench",
+                ALLOWED_HOSTS=["*"],
+                ROOT_URLCONF=__name__,
+                INSTALLED_APPS=["django.contrib.contenttypes"],
+                DATABASES={},
+            )
+    django.setup()
+
+
+# No project URLs when running outside a project
+urlpatterns = []
+
+
+def discover_paths():
+    """GET-able paths of the project: path() routes without parameters"""
+    from django.urls import URLPattern, URLResolver, get_resolver
+    from django.urls.resolvers import RoutePattern
+
+    found = []
+
+    def walk(patterns, prefix):
+        for entry in patterns:
+            pattern = entry.pattern
+            if not isinstance(pattern, RoutePattern) or pattern.converters:
+                continue
+            route = prefix + str(pattern)
+            if isinstance(entry, URLResolver):
+                if entry.namespace == "admin":
+                    continue
+                walk(entry.url_patterns, route)
+            elif isinstance(entry, URLPattern):
+                found.append("/" + route)
+
+    walk(get_resolver().url_patterns, "")
+    return sorted(set(found))
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (ms) of one route"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def _default_host():
+    from django.conf import settings
+
+    hosts = [h for h in settings.ALLOWED_HOSTS if h != "*"]
+    if not hosts:
+        return "localhost"
+    return hosts[0].lstrip(".")
+
+
+def drive(
+    path,
+    method="GET",
+    requests=1000,
+    concurrency=10,
+    warmup=50,
+    data=None,
+    headers=None,
+    host=None,
+):
+    """
+    Send `requests` requests to `path` from `concurrency` threads
+
+    Requests go through Django's test client, so the whole stack (Django
+    middleware, URL resolving, the Shanks pipeline) is measured in-process.
+    Responses with status >= 500 count as errors.
+    """
+    from django.db import connections
+    from django.test import Client
+
+    host = host or _default_host()
+    extra = {
+        f"HTTP_{k.upper().replace('-', '_')}": v for k, v in (headers or {}).items()
+    }
+    body = None if data is None else json.dumps(data)
+
+    def client_call(client):
+        call = getattr(client, method.lower())
+        if body is None:
+            return lambda: call(path, **extra)
+        return lambda: call(path, body, content_type="application/json", **extra)
+
+    warm = client_call(Client(HTTP_HOST=host, raise_request_exception=False))
+    for _ in range(warmup):
+        warm()
+
+    tickets = itertools.count()
+    latencies = []
+    errors = []
+
+    def worker():
+        send = client_call(Client(HTTP_HOST=host, raise_request_exception=False))
+        try:
+            while next(tickets) < requests:
+                start = time.perf_counter()
+                response = send()
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 500:
+                    errors.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="shanks-bench") as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return summarize(latencies, len(errors), time.perf_counter() - start)
+
+
+def _per_call(func, number, repeat=3):
+    """Best-of-`repeat` time per call in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return round(best / number * 1e6, 3)
+
+
+def micro_suite(number=2000):
+    """
+    Framework micro-benchmarks, in microseconds per operation
+
+    routing:       resolving a parameterized path among 50 Shanks routes
+    middleware:    a request through 5 pass-through middlewares
+    cache_hit:     a GET answered by auto_cache
+    serialization: Response(...).to_django_response() of 100 rows
+    cors:          a cross-origin GET with a wildcard-subdomain policy
+    """
+    from django.test import RequestFactory
+    from django.urls.resolvers import RegexPattern, URLResolver
+
+    from ..app import App
+    from ..cache import get_cache
+    from ..cors import CORS
+    from ..response import Response
+
+    factory = RequestFactory()
+    results = {}
+
+    app = App(enable_cache=False)
+    for i in range(50):
+        app.get(f"bench/resource{i}/<id>")(lambda req, id: {"id": id})
+    resolver = URLResolver(RegexPattern(r"^/"), app.get_urls())
+    results["routing"] = _per_call(
+        lambda: resolver.resolve("/bench/resource49/7"), number
+    )
+
+    def passthrough(req, res, next):
+        return next()
+
+    app = App(enable_cache=False)
+    for _ in range(5):
+        app.use(passthrough)
+    app.get("bench/middleware")(lambda req: {"ok": True})
+    view = app.routes[-1]["view"]
+    request = factory.get("/bench/middleware")
+    results["middleware"] = _per_call(lambda: view(request), number)
+
+    app = App()
+    app.get("bench/cached")(lambda req: {"ok": True})
+    view = app.routes[-1]["view"]
+    request = factory.get("/__shanks_bench__/cached")
+    view(request)
+    results["cache_hit"] = _per_call(lambda: view(request), number)
+    get_cache().invalidate_pattern("/__shanks_bench__")
+
+    rows = [
+        {"id": i, "title": f"Post {i}", "published": i % 2 == 0} for i in range(100)
+    ]
+    request = factory.get("/bench/rows")
+    results["serialization"] = _per_call(
+        lambda: Response({"posts": rows}).to_django_response(request), number
+    )
+
+    app = App(enable_cache=False)
+    CORS.enable(app, origins=["https://*.example.com"], credentials=True)
+    app.get("bench/cors")(lambda req: {"ok": True})
+    view = app.routes[-1]["view"]
+    request = factory.get("/bench/cors", HTTP_ORIGIN="https://app.example.com")
+    results["cors"] = _per_call(lambda: view(request), number)
+    return results
+
+
+def compare(current, baseline, threshold=0.10):
+    """
+    Regressions of `current` against `baseline` (both as saved by --save)
+
+    A route regresses when a latency percentile grows, or its throughput
+    drops, by more than `threshold`; a micro-benchmark when it gets
+    slower by more than `threshold`.
+
+    Returns a list of (name, metric, baseline, current, relative change).
+    """
+    regressions = []
+    for key, now in current.get("routes", {}).items():
+        before = baseline.get("routes", {}).get(key)
+        if not before:
+            continue
+        for metric in LATENCY_METRICS:
+            if before.get(metric) and now[metric] > before[metric] * (1 + threshold):
+                change = now[metric] / before[metric] - 1
+                regressions.append((key, metric, before[metric], now[metric], change))
+        if before.get("rps") and now["rps"] < before["rps"] * (1 - threshold):
+            change = now["rps"] / before["rps"] - 1
+            regressions.append((key, "rps", before["rps"], now["rps"], change))
+    for name, now in current.get("micro", {}).items():
+        before = baseline.get("micro", {}).get(name)
+        if before and now > before * (1 + threshold):
+            regressions.append((name, "us_per_op", before, now, now / before - 1))
+    return regressions
+
+
+def _print_table(title, header, rows):
+    print(f"\n{title}")
+    widths = [
+        max(len(str(row[i])) for row in [header] + rows) for i in range(len(header))
+    ]
+    line = "  ".join(str(h).ljust(w) for h, w in zip(header, widths))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="shanks bench",
+        description="Load-test the project's routes in-process and run "
+        "the framework micro-benchmarks",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Paths to drive (default: all routes without parameters)",
+    )
+    parser.add_argument(
+        "-n", "--requests", type=int, default=1000, help="Requests per path"
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=10, help="Client threads"
+    )
+    parser.add_argument(
+        "-X", "--method", default="GET", help="HTTP method (default GET)"
+    )
+    parser.add_argument("-d", "--data", help="JSON request body")
+    parser.add_argument(
+        "-H", "--header", action="append", default=[], help="Extra header 'Name: value'"
+    )
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests first")
+    parser.add_argument("--settings", help="Django settings module")
+    parser.add_argument(
+        "--micro", action="store_true", help="Also run micro-benchmarks"
+    )
+    parser.add_argument(
+        "--micro-only", action="store_true", help="Only run micro-benchmarks"
+    )
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this saved JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative change counted as a regression (default 0.10)",
+    )
+    return parser
+
+
+def run_bench(argv=None):
+    """shanks bench [paths...] [options]"""
+    args = _parser().parse_args(sys.argv[2:] if argv is None else argv)
+    setup_project(args.settings)
+
+    results = {
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "routes": {},
+        "micro": {},
+    }
+
+    if not args.micro_only:
+        paths = args.paths or discover_paths()
+        if not paths:
+            print(
+                "[ERROR] No routes to benchmark. Pass paths, e.g. shanks bench /api/posts"
+            )
+            sys.exit(1)
+        headers = dict(h.split(":", 1) for h in args.header)
+        headers = {k.strip(): v.strip() for k, v in headers.items()}
+        data = json.loads(args.data) if args.data else None
+        method = args.method.upper()
+        rows = []
+        for path in paths:
+            stats = drive(
+                path,
+                method,
+                requests=args.requests,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+                data=data,
+                headers=headers,
+            )
+            results["routes"][f"{method} {path}"] = stats
+            rows.append(
+                [
+                    f"{method} {path}",
+                    stats["rps"],
+                    stats["p50_ms"],
+                    stats["p95_ms"],
+                    stats["p99_ms"],
+                    stats["errors"],
+                ]
+            )
+        _print_table(
+            f"Routes ({args.requests} requests, concurrency {args.concurrency})",
+            ["route", "req/s", "p50 ms", "p95 ms", "p99 ms", "errors"],
+            rows,
+        )
+
+    if args.micro or args.micro_only:
+        results["micro"] = micro_suite()
+        _print_table(
+            "Micro-benchmarks",
+            ["benchmark", "us/op"],
+            [[name, value] for name, value in results["micro"].items()],
+        )
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n✓ Results saved to {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            _print_table(
+                f"Regressions (> {args.threshold:.0%} vs {args.baseline})",
+                ["name", "metric", "baseline", "current", "change"],
+                [[n, m, b, c, f"{change:+.1%}"] for n, m, b, c, change in regressions],
+            )
+            sys.exit(1)
+        print(f"\n✓ No regressions against {args.baseline}")
@@ -30,12 +30,24 @@ def get_repository_template(model_name, endpoint_name, operations=None):
     functions = []
 
     if operations.get("read"):
-        functions.append('''def find_all(page=1, limit=10):
-    """Get paginated list"""
-    offset = (page - 1) * limit
-    items = {model_name}.objects.all()[offset:offset + limit]
-    total = {model_name}.objects.count()
-    return items, total
+        functions.append('''# Columns returned by list endpoints
+LIST_FIELDS = ["id", "title", "description", "created_at", "updated_at"]
+
+
+def find_all(cursor=None, limit=10, with_total=False):
+    """
+    Get a page of items using keyset (cursor) pagination
+
+    Deep pages cost the same as the first one. The total is only computed
+    when asked for, and uses a cheap estimate on PostgreSQL. Items are plain
+    dicts selected with values(), no model instances are built.
+    """
+    return {model_name}.find_many(
+        cursor=cursor,
+        take=limit,
+        count="estimate" if with_total else False,
+        select=LIST_FIELDS,
+    )
 
 
 def find_by_id(item_id):
@@ -86,27 +98,22 @@ def get_service_template(model_name, endpoint_name, endpoint_plural, operations=
     functions = []
 
     if operations.get("read"):
-        functions.append(f'''def get_{endpoint_plural}_list(page=1, limit=10):
-    """Get paginated list of items"""
-    items, total = {endpoint_name}_repository.find_all(page, limit)
+        functions.append(
+            f'''def get_{endpoint_plural}_list(cursor=None, limit=10, with_total=False):
+    """Get a page of items (raises ValueError for an invalid cursor)"""
+    page = {endpoint_name}_repository.find_all(cursor, limit, with_total)
+    
+    pagination = {{
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+        "has_more": page.has_more,
+    }}
+    if page.total is not None:
+        pagination["total"] = page.total
     
     return {{
-        "data": [
-            {{
-                "id": item.id,
-                "title": item.title,
-                "description": item.description,
-                "created_at": item.created_at.isoformat(),
-                "updated_at": item.updated_at.isoformat(),
-            }}
-            for item in items
-        ],
-        "pagination": {{
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }}
+        "data": page.items,
+        "pagination": pagination
     }}
 
 
@@ -126,7 +133,8 @@ def get_{endpoint_name}_by_id(item_id):
             "id": item.created_by.id,
             "username": item.created_by.username
         }}
-    }}''')
+    }}'''
+        )
 
     if operations.get("create"):
         functions.append(f'''def create_{endpoint_name}(title, description, user):
@@ -177,11 +185,21 @@ def get_controller_template(
 
     if operations.get("read"):
         functions.append(f'''def list_{endpoint_plural}(req):
-    """Handle list request"""
-    page = int(req.query.get("page", 1))
-    limit = int(req.query.get("limit", 10))
+    """Handle list request (?cursor=...&limit=10&total=true)"""
+    cursor = req.query.get("cursor")
+    try:
+        limit = int(req.query.get("limit", 10))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return BaseDTO.error(message="limit must be a positive integer", status=400)
+    limit = min(limit, 100)
+    with_total = req.query.get("total") == "true"
     
-    result = {endpoint_name}_service.get_{endpoint_plural}_list(page, limit)
+    try:
+        result = {endpoint_name}_service.get_{endpoint_plural}_list(cursor, limit, with_total)
+    except ValueError:
+        return BaseDTO.error(message="Invalid cursor", status=400)
     return BaseDTO.success(
         data=result["data"],
         pagination=result["pagination"]
@@ -5,6 +5,7 @@ import sys
 from .commands import create_project, run_server
 from .crud import create_crud_endpoint
 from .auth import create_auth_endpoint
+from .bench import run_bench
 from .convert import generate_django, kamusari
 
 
@@ -21,6 +22,7 @@ def main():
         print(
             "  shanks kamusari                  Convert to Django in-place (destructive)"
         )
+        print("  shanks bench [paths] [--micro]   Benchmark routes and the framework")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -42,6 +44,8 @@ def main():
         generate_django()
     elif command == "kamusari":
         kamusari()
+    elif command == "bench":
+        run_bench()
     else:
         print(f"Unknown command: {command}")
         print("\nAvailable commands:")
@@ -51,6 +55,7 @@ def main():
         print("  create auth     - Generate auth endpoints")
         print("  generate django - Convert to pure Django (safe)")
         print("  kamusari        - Convert to Django in-place (destructive)")
+        print("  bench           - Benchmark routes and the framework")
         sys.exit(1)
 
 
@@ -0,0 +1,254 @@
+"""Content negotiation codecs for Shanks - JSON, MessagePack and CBOR"""
+
+import importlib
+import json
+from typing import Any, Dict, List, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Codec:
+    """
+    Base codec - turns handler return values into bytes and back
+
+    Subclass it and register the instance to add a new wire format:
+
+        class YamlCodec(Codec):
+            media_type = "application/yaml"
+
+            def encode(self, data):
+                return yaml.safe_dump(data).encode()
+
+            def decode(self, raw):
+                return yaml.safe_load(raw)
+
+        codecs.register(YamlCodec())
+    """
+
+    media_type = "application/octet-stream"
+    aliases = ()
+
+    def encode(self, data: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, raw: bytes) -> Any:
+        raise NotImplementedError
+
+    def is_available(self) -> bool:
+        """Whether the codec's backing library is importable"""
+        return True
+
+
+class JSONCodec(Codec):
+    """JSON codec (default) - same encoder Django's JsonResponse uses"""
+
+    media_type = "application/json"
+
+    def encode(self, data):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8")
+
+    def decode(self, raw):
+        return json.loads(raw)
+
+
+def _json_default(obj):
+    # Reuse the JSON encoder's conversions (datetime, Decimal, UUID...)
+    return DjangoJSONEncoder().default(obj)
+
+
+class _OptionalCodec(Codec):
+    """Codec backed by an optional third-party library, imported lazily"""
+
+    module_name = ""
+    package_name = ""
+    format_name = ""
+
+    def __init__(self):
+        self._lib = None
+        self._available = None
+
+    def _module(self):
+        if self._lib is None:
+            try:
+                self._lib = importlib.import_module(self.module_name)
+            except ImportError:
+                raise ImportError(
+                    f"{self.package_name} is required for {self.format_name} "
+                    f"support. Install it with: pip install {self.package_name}"
+                )
+        return self._lib
+
+    def is_available(self):
+        if self._available is None:
+            try:
+                self._module()
+                self._available = True
+            except ImportError:
+                self._available = False
+        return self._available
+
+
+class MsgPackCodec(_OptionalCodec):
+    """MessagePack codec (requires: pip install msgpack)"""
+
+    media_type = "application/msgpack"
+    aliases = ("application/x-msgpack", "application/vnd.msgpack")
+    module_name = package_name = "msgpack"
+    format_name = "MessagePack"
+
+    def encode(self, data):
+        return self._module().packb(data, default=_json_default, use_bin_type=True)
+
+    def decode(self, raw):
+        return self._module().unpackb(raw, raw=False)
+
+
+class CBORCodec(_OptionalCodec):
+    """CBOR codec (requires: pip install cbor2)"""
+
+    media_type = "application/cbor"
+    module_name = package_name = "cbor2"
+    format_name = "CBOR"
+
+    def encode(self, data):
+        return self._module().dumps(data, default=_cbor_default)
+
+    def decode(self, raw):
+        return self._module().loads(raw)
+
+
+def _cbor_default(encoder, obj):
+    encoder.encode(_json_default(obj))
+
+
+class CodecRegistry:
+    """
+    Registry of codecs keyed by media type
+
+    Negotiation results are memoized per Accept header, so the common case
+    (the same client sending the same header) is a single dict lookup.
+    """
+
+    _NEGOTIATION_CACHE_SIZE = 256
+
+    def __init__(self, default: Optional[Codec] = None):
+        self._codecs: Dict[str, Codec] = {}
+        self._order: List[Codec] = []
+        self._negotiated: Dict[str, Codec] = {}
+        self.default = default or JSONCodec()
+        self.register(self.default)
+
+    def register(self, codec: Codec):
+        """Register a codec under its media type and aliases"""
+        if codec not in self._order:
+            self._order.append(codec)
+        self._codecs[codec.media_type] = codec
+        for alias in codec.aliases:
+            self._codecs[alias] = codec
+        self._negotiated.clear()
+        return codec
+
+    def unregister(self, media_type: str):
+        """Remove a codec (the default codec cannot be removed)"""
+        codec = self._codecs.get(media_type)
+        if codec is None or codec is self.default:
+            return
+        self._order.remove(codec)
+        self._codecs = {k: v for k, v in self._codecs.items() if v is not codec}
+        self._negotiated.clear()
+
+    def get(self, media_type: str) -> Optional[Codec]:
+        """Get codec for a media type (parameters like charset are ignored)"""
+        if not media_type:
+            return None
+        codec = self._codecs.get(media_type)
+        if codec is None:
+            codec = self._codecs.get(media_type.split(";", 1)[0].strip().lower())
+        if codec is not None and not codec.is_available():
+            return None
+        return codec
+
+    @property
+    def negotiable(self) -> bool:
+        """True when more than one codec can be selected via Accept"""
+        return sum(1 for codec in self._order if codec.is_available()) > 1
+
+    def negotiate(self, accept: Optional[str]) -> Codec:
+        """
+        Pick the best codec for an Accept header
+
+        Falls back to the default codec when nothing matches, so clients
+        that send no Accept header (or */*) always get JSON.
+        """
+        if not accept or len(self._order) == 1:
+            return self.default
+
+        codec = self._negotiated.get(accept)
+        if codec is not None:
+            return codec
+
+        codec = self._select(accept)
+        if len(self._negotiated) >= self._NEGOTIATION_CACHE_SIZE:
+            self._negotiated.clear()
+        self._negotiated[accept] = codec
+        return codec
+
+    def _select(self, accept: str) -> Codec:
+        candidates = []
+        for position, item in enumerate(accept.split(",")):
+            parts = item.split(";")
+            media_type = parts[0].strip().lower()
+            quality = 1.0
+            for param in parts[1:]:
+                key, _, value = param.partition("=")
+                if key.strip() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                candidates.append((-quality, position, media_type))
+
+        for _, _, media_type in sorted(candidates):
+            if media_type in ("*/*", "application/*"):
+                return self.default
+            codec = self.get(media_type)
+            if codec is not None:
+                return codec
+        return self.default
+
+
+# Global codec registry
+codecs = CodecRegistry()
+codecs.register(MsgPackCodec())
+codecs.register(CBORCodec())
+
+
+def get_codecs():
+    """Get global codec registry"""
+    return codecs
+
+
+def register_codec(codec: Codec):
+    """
+    Register a codec in the global registry
+
+    Example:
+        from shanks import register_codec
+        from shanks.codecs import Codec
+
+        register_codec(MyCodec())
+    """
+    return codecs.register(codec)
+
+
+__all__ = [
+    "Codec",
+    "JSONCodec",
+    "MsgPackCodec",
+    "CBORCodec",
+    "CodecRegistry",
+    "codecs",
+    "get_codecs",
+    "register_codec",
+]
@@ -0,0 +1,189 @@
+"""Concurrency limiting (bulkhead) middleware for Shanks Django"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Union
+
+
+class Bulkhead:
+    """
+    Caps in-flight requests, with a short bounded wait for a free slot
+
+    With `adaptive=True` the limit follows observed latency, AIMD style:
+    every request slower than `target_latency` cuts the limit by
+    `backoff` (at most once per target_latency), every fast one raises it
+    by 1/limit, between `min_limit` and `max_concurrent`.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: Optional[int] = None,
+        adaptive: bool = False,
+        target_latency: float = 0.5,
+        min_limit: int = 1,
+        backoff: float = 0.9,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_concurrent if max_queue is None else max_queue
+        self.adaptive = adaptive
+        self.target_latency = target_latency
+        self.min_limit = min(min_limit, max_concurrent)
+        self.backoff = backoff
+        self.limit = float(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition(threading.Lock())
+
+    def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting up to `timeout` seconds; False when shed"""
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            if timeout <= 0 or self.waiting >= self.max_queue:
+                self.rejected += 1
+                return False
+            deadline = time.monotonic() + timeout
+            self.waiting += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        if self.in_flight < int(self.limit):
+                            break
+                        self.rejected += 1
+                        return False
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: Optional[float] = None):
+        """Free a slot; `latency` feeds the adaptive limit"""
+        with self._cond:
+            self.in_flight -= 1
+            if self.adaptive and latency is not None:
+                self._adapt(latency)
+            self._cond.notify()
+
+    def _adapt(self, latency):
+        if latency > self.target_latency:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        elif self.limit < self.max_concurrent:
+            self.limit = min(float(self.max_concurrent), self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+class ConcurrencyLimit:
+    """
+    Bulkhead middleware: caps in-flight requests and sheds the excess
+
+    Requests over the cap wait up to `queue_timeout` seconds for a slot
+    (at most `max_queue` of them at once), then get 503 with Retry-After,
+    so a slow downstream can't take every worker with it. Attach it to a
+    group to isolate those routes from the rest of the app.
+
+    Args:
+        max_concurrent: In-flight requests allowed
+        queue_timeout: Seconds an excess request may wait for a slot
+        max_queue: Requests allowed to wait (defaults to max_concurrent)
+        key: None for one limit shared by every route the middleware
+            covers, 'route' for one limit per route, or a callable
+            taking req and returning a key
+        adaptive: Lower the limit while requests exceed target_latency
+        target_latency: Latency (seconds) the adaptive mode aims for
+        min_limit: Floor for the adaptive limit
+        retry_after: Retry-After value (seconds) on shed requests
+
+    Example:
+        from shanks import App, ConcurrencyLimit
+
+        app = App()
+
+        # Reports call a slow service: at most 4 at a time, each route
+        # of the group gets its own limit
+        reports = app.group(
+            'api/reports', ConcurrencyLimit(4, queue_timeout=0.5, key='route')
+        )
+
+        # Whole app: adapt the limit to keep latency under 300ms
+        app.use(ConcurrencyLimit(64, adaptive=True, target_latency=0.3))
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 10,
+        queue_timeout: float = 0.1,
+        max_queue: Optional[int] = None,
+        key: Union[None, str, Callable] = None,
+        adaptive: bool = False,
+        target_latency: float = 0.5,
+        min_limit: int = 1,
+        retry_after: int = 1,
+    ):
+        if max_concurrent <= 0:
+            raise ValueError("max_concurrent must be positive")
+        if key not in (None, "route") and not callable(key):
+            raise ValueError(f"Unknown concurrency key: {key}")
+        self.queue_timeout = queue_timeout
+        self.retry_after = str(retry_after)
+        self._key = key
+        self._options = {
+            "max_concurrent": max_concurrent,
+            "max_queue": max_queue,
+            "adaptive": adaptive,
+            "target_latency": target_latency,
+            "min_limit": min_limit,
+        }
+        self._shared = Bulkhead(**self._options) if key is None else None
+        self._bulkheads: Dict[str, Bulkhead] = {}
+        self._lock = threading.Lock()
+
+    def bulkhead(self, req) -> Bulkhead:
+        """Bulkhead this request counts against"""
+        if self._shared is not None:
+            return self._shared
+        key = req.route if self._key == "route" else self._key(req)
+        bulkhead = self._bulkheads.get(key)
+        if bulkhead is None:
+            with self._lock:
+                bulkhead = self._bulkheads.get(key)
+                if bulkhead is None:
+                    bulkhead = self._bulkheads[key] = Bulkhead(**self._options)
+        return bulkhead
+
+    def stats(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """Limit, in-flight, waiting and rejected counts per bulkhead"""
+        if self._shared is not None:
+            return {"*": self._shared.stats()}
+        return {key: bulkhead.stats() for key, bulkhead in self._bulkheads.items()}
+
+    def __call__(self, req, res, next):
+        bulkhead = self.bulkhead(req)
+        if not bulkhead.acquire(self.queue_timeout):
+            from .response import Response
+
+            return Response({"error": "Service overloaded"}, status=503).header(
+                "Retry-After", self.retry_after
+            )
+        start = time.perf_counter()
+        try:
+            return next()
+        finally:
+            bulkhead.release(time.perf_counter() - start)
+
+
+__all__ = ["Bulkhead", "ConcurrencyLimit"]
@@ -103,21 +103,27 @@ def get_allowed_hosts(default="*"):
     return env_list("ALLOWED_HOSTS", [default])
 
 
-def get_database(base_dir):
-    """Get database configuration"""
+def get_database(base_dir, mode=None, sqlite_profile=None):
+    """
+    Get database configuration
+
+    `mode` (or the DATABASE_POOL_MODE env var) selects connection reuse
+    defaults: 'wsgi', 'asgi', 'serverless' or 'pgbouncer'.
+    `sqlite_profile` (or SQLITE_PROFILE) set to 'performance' tunes the
+    default SQLite database (see DatabaseConfig.sqlite).
+    """
     database_url = env("DATABASE_URL")
 
     if database_url:
         from .db import DatabaseConfig
 
-        return {"default": DatabaseConfig.from_url(database_url)}
+        mode = mode or env("DATABASE_POOL_MODE")
+        return {"default": DatabaseConfig.from_url(database_url, mode=mode)}
 
-    return {
-        "default": {
-            "ENGINE": "django.db.backends.sqlite3",
-            "NAME": base_dir / "db.sqlite3",
-        }
-    }
+    from .db import DatabaseConfig
+
+    profile = sqlite_profile or env("SQLITE_PROFILE")
+    return {"default": DatabaseConfig.sqlite(base_dir / "db.sqlite3", profile=profile)}
 
 
 def get_installed_apps(extra_apps=None):
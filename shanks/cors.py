@@ -1,8 +1,163 @@
 """Built-in CORS support for Shanks Django"""
 
-from typing import List, Optional, Union
+import re
+from typing import Dict, List, Optional, Pattern, Tuple, Union
 
-from .response import Response
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .headers import HeaderBlock
+
+OriginsLike = Union[str, Pattern, List[Union[str, Pattern]]]
+
+DEFAULT_METHODS = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
+DEFAULT_HEADERS = "Content-Type, Authorization, X-Requested-With"
+
+
+def _join(value: Union[str, List[str]]) -> str:
+    return ", ".join(value) if isinstance(value, (list, tuple)) else value
+
+
+def _wildcard_to_regex(origin: str) -> Pattern:
+    """'https://*.example.com' -> matches any (nested) subdomain"""
+    escaped = re.escape(origin).replace(r"\*", r"[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*")
+    return re.compile(f"^{escaped}$")
+
+
+class CORSPolicy:
+    """
+    CORS configuration compiled once into lookup tables
+
+    - Exact origins are kept in a frozenset (O(1) lookup)
+    - Wildcard subdomains ('https://*.example.com') and compiled regexes are
+      matched once per distinct origin and the result is memoized
+    - Header blocks for actual and preflight responses are built once per
+      (origin) / (origin, requested headers) and reused
+
+    Example:
+        policy = CORSPolicy(
+            origins=["https://app.example.com", "https://*.example.dev"],
+            credentials=True,
+        )
+    """
+
+    _CACHE_SIZE = 1024
+
+    def __init__(
+        self,
+        origins: OriginsLike = "*",
+        methods: Union[str, List[str]] = "*",
+        headers: Union[str, List[str]] = "*",
+        credentials: bool = False,
+        max_age: int = 86400,
+    ):
+        self.credentials = credentials
+        self.max_age = max_age
+        self.allow_all = origins == "*"
+
+        exact = set()
+        matchers = []
+        if not self.allow_all:
+            if isinstance(origins, (str, re.Pattern)):
+                origins = [origins]
+            for origin in origins:
+                if isinstance(origin, re.Pattern):
+                    matchers.append(origin)
+                elif "*" in origin:
+                    matchers.append(_wildcard_to_regex(origin))
+                else:
+                    exact.add(origin)
+        self.origins = frozenset(exact)
+        self._matchers: Tuple[Pattern, ...] = tuple(matchers)
+
+        self._allow_methods = DEFAULT_METHODS if methods == "*" else _join(methods)
+        self._echo_headers = headers == "*"
+        self._allow_headers = DEFAULT_HEADERS if headers == "*" else _join(headers)
+
+        # The response depends on the Origin header unless every origin gets '*'
+        self.varies = not (self.allow_all and not credentials)
+
+        self._matched: Dict[str, bool] = {}
+        self._response_blocks: Dict[Optional[str], Optional[HeaderBlock]] = {}
+        self._preflight_blocks: Dict[Tuple[str, str], HeaderBlock] = {}
+
+    def allowed_origin(self, origin: Optional[str]) -> Optional[str]:
+        """Value for Access-Control-Allow-Origin, or None if not allowed"""
+        if self.allow_all:
+            # '*' is not valid together with credentials, reflect instead
+            return origin if (self.credentials and origin) else "*"
+        if not origin:
+            return None
+        if origin in self.origins:
+            return origin
+        if not self._matchers:
+            return None
+
+        matched = self._matched.get(origin)
+        if matched is None:
+            matched = any(matcher.match(origin) for matcher in self._matchers)
+            if len(self._matched) >= self._CACHE_SIZE:
+                self._matched.clear()
+            self._matched[origin] = matched
+        return origin if matched else None
+
+    def headers_for(self, origin: Optional[str]) -> Optional[HeaderBlock]:
+        """Header block for an actual (non-preflight) response"""
+        allowed = self.allowed_origin(origin)
+        if allowed is None:
+            return None
+        block = self._response_blocks.get(allowed)
+        if block is None:
+            headers = {"Access-Control-Allow-Origin": allowed}
+            if self.credentials:
+                headers["Access-Control-Allow-Credentials"] = "true"
+            block = HeaderBlock(headers)
+            if len(self._response_blocks) >= self._CACHE_SIZE:
+                self._response_blocks.clear()
+            self._response_blocks[allowed] = block
+        return block
+
+    def preflight_headers(
+        self, origin: Optional[str], requested_headers: str = ""
+    ) -> HeaderBlock:
+        """Header block for a preflight response, cached per (origin, headers)"""
+        key = (origin or "", requested_headers if self._echo_headers else "")
+        block = self._preflight_blocks.get(key)
+        if block is None:
+            headers = {}
+            allowed = self.allowed_origin(origin)
+            if allowed:
+                headers["Access-Control-Allow-Origin"] = allowed
+            if self.credentials:
+                headers["Access-Control-Allow-Credentials"] = "true"
+            headers["Access-Control-Allow-Methods"] = self._allow_methods
+            headers["Access-Control-Allow-Headers"] = key[1] or self._allow_headers
+            headers["Access-Control-Max-Age"] = str(self.max_age)
+            block = HeaderBlock(headers)
+            if len(self._preflight_blocks) >= self._CACHE_SIZE:
+                self._preflight_blocks.clear()
+            self._preflight_blocks[key] = block
+        return block
+
+    def preflight_response(self, request) -> HttpResponse:
+        """Build the 204 response for an OPTIONS preflight request"""
+        meta = request.META
+        block = self.preflight_headers(
+            meta.get("HTTP_ORIGIN"), meta.get("HTTP_ACCESS_CONTROL_REQUEST_HEADERS", "")
+        )
+        response = block.apply(HttpResponse(status=204))
+        if self.varies:
+            patch_vary_headers(response, ("Origin",))
+        return response
+
+    def apply(self, request, response):
+        """Add CORS headers for an actual request to a Django response"""
+        block = self.headers_for(request.META.get("HTTP_ORIGIN"))
+        if block:
+            block.apply(response)
+        if self.varies:
+            patch_vary_headers(response, ("Origin",))
+        return response
 
 
 class CORS:
@@ -19,7 +174,7 @@ class CORS:
 
         # Or with custom settings
         CORS.enable(app,
-            origins=['http://localhost:3000', 'https://myapp.com'],
+            origins=['http://localhost:3000', 'https://*.myapp.com'],
             methods=['GET', 'POST', 'PUT', 'DELETE'],
             headers=['Content-Type', 'Authorization'],
             credentials=True
@@ -29,7 +184,7 @@ class CORS:
     @staticmethod
     def enable(
         app,
-        origins: Union[str, List[str]] = "*",
+        origins: OriginsLike = "*",
         methods: Union[str, List[str]] = "*",
         headers: Union[str, List[str]] = "*",
         credentials: bool = False,
@@ -40,7 +195,8 @@ class CORS:
 
         Args:
             app: Shanks App instance
-            origins: Allowed origins ('*' or list of origins)
+            origins: Allowed origins ('*', or list of origins, wildcard
+                subdomains like 'https://*.myapp.com' and compiled regexes)
             methods: Allowed methods ('*' or list of methods)
             headers: Allowed headers ('*' or list of headers)
             credentials: Allow credentials (cookies, auth headers)
@@ -59,106 +215,11 @@ class CORS:
                 credentials=True
             )
         """
-
-        def cors_middleware(req):
-            # Get origin from request
-            origin = req.headers.get("Origin", "")
-
-            # Check if origin is allowed
-            if origins == "*":
-                allowed_origin = "*"
-            elif isinstance(origins, list):
-                if origin in origins:
-                    allowed_origin = origin
-                else:
-                    allowed_origin = None
-            else:
-                allowed_origin = origins if origin == origins else None
-
-            # Handle preflight OPTIONS request
-            if req.method == "OPTIONS":
-                response = Response().status_code(204)
-
-                if allowed_origin:
-                    response.header("Access-Control-Allow-Origin", allowed_origin)
-
-                if credentials:
-                    response.header("Access-Control-Allow-Credentials", "true")
-
-                # Methods
-                if methods == "*":
-                    response.header(
-                        "Access-Control-Allow-Methods",
-                        "GET, POST, PUT, DELETE, PATCH, OPTIONS",
-                    )
-                elif isinstance(methods, list):
-                    response.header("Access-Control-Allow-Methods", ", ".join(methods))
-                else:
-                    response.header("Access-Control-Allow-Methods", methods)
-
-                # Headers
-                if headers == "*":
-                    requested_headers = req.headers.get(
-                        "Access-Control-Request-Headers", ""
-                    )
-                    if requested_headers:
-                        response.header(
-                            "Access-Control-Allow-Headers", requested_headers
-                        )
-                    else:
-                        response.header(
-                            "Access-Control-Allow-Headers",
-                            "Content-Type, Authorization, X-Requested-With",
-                        )
-                elif isinstance(headers, list):
-                    response.header("Access-Control-Allow-Headers", ", ".join(headers))
-                else:
-                    response.header("Access-Control-Allow-Headers", headers)
-
-                response.header("Access-Control-Max-Age", str(max_age))
-
-                return response.to_django_response(req.django)
-
-            # For actual requests, we'll add headers in the response wrapper
-            # Store CORS config in request for later use
-            req._cors_config = {
-                "allowed_origin": allowed_origin,
-                "credentials": credentials,
-            }
-
-        # Add CORS middleware
-        app.use(cors_middleware)
-
-        # Wrap the _create_view to add CORS headers to responses
-        original_create_view = app._create_view
-
-        def create_view_with_cors(handler, method):
-            view = original_create_view(handler, method)
-
-            def wrapped_view(request, *args, **kwargs):
-                response = view(request, *args, **kwargs)
-
-                # Add CORS headers to response
-                if hasattr(request, "_shanks_request"):
-                    shanks_req = request._shanks_request
-                    if hasattr(shanks_req, "_cors_config"):
-                        cors_config = shanks_req._cors_config
-                        if cors_config["allowed_origin"]:
-                            response["Access-Control-Allow-Origin"] = cors_config[
-                                "allowed_origin"
-                            ]
-                        if cors_config["credentials"]:
-                            response["Access-Control-Allow-Credentials"] = "true"
-
-                return response
-
-            return wrapped_view
-
-        app._create_view = create_view_with_cors
+        app.use(CORS.middleware(origins, methods, headers, credentials, max_age))
 
     @staticmethod
     def middleware(
-        origins: Union[str, List[str]] = "*",
+        origins: OriginsLike = "*",
         methods: Union[str, List[str]] = "*",
         headers: Union[str, List[str]] = "*",
         credentials: bool = False,
@@ -167,6 +228,9 @@ class CORS:
         """
         Create a CORS middleware function
 
+        When passed to app.use(), the compiled policy is installed into the
+        app's response pipeline instead of running as a regular middleware.
+
         Example:
             from shanks import App, CORS
 
@@ -178,61 +242,21 @@ class CORS:
                 credentials=True
             ))
         """
+        policy = CORSPolicy(origins, methods, headers, credentials, max_age)
 
         def cors_middleware(req):
-            origin = req.headers.get("Origin", "")
-
-            # Check if origin is allowed
-            if origins == "*":
-                allowed_origin = "*"
-            elif isinstance(origins, list):
-                allowed_origin = origin if origin in origins else None
-            else:
-                allowed_origin = origins if origin == origins else None
-
-            # Handle preflight
+            # Only preflights are answered here; the response pipeline adds
+            # the CORS headers to actual requests
             if req.method == "OPTIONS":
-                response = Response().status_code(204)
-
-                if allowed_origin:
-                    response.header("Access-Control-Allow-Origin", allowed_origin)
-
-                if credentials:
-                    response.header("Access-Control-Allow-Credentials", "true")
-
-                if methods == "*":
-                    response.header(
-                        "Access-Control-Allow-Methods",
-                        "GET, POST, PUT, DELETE, PATCH, OPTIONS",
-                    )
-                elif isinstance(methods, list):
-                    response.header("Access-Control-Allow-Methods", ", ".join(methods))
-
-                if headers == "*":
-                    requested_headers = req.headers.get(
-                        "Access-Control-Request-Headers", ""
-                    )
-                    response.header(
-                        "Access-Control-Allow-Headers",
-                        requested_headers
-                        or "Content-Type, Authorization, X-Requested-With",
-                    )
-                elif isinstance(headers, list):
-                    response.header("Access-Control-Allow-Headers", ", ".join(headers))
-
-                response.header("Access-Control-Max-Age", str(max_age))
-                return response
-
-            # Store for actual requests
-            req._cors_origin = allowed_origin
-            req._cors_credentials = credentials
+                return policy.preflight_response(req.django)
 
+        cors_middleware._cors_policy = policy
         return cors_middleware
 
 
 def enable_cors(
     app,
-    origins: Union[str, List[str]] = "*",
+    origins: OriginsLike = "*",
     methods: Union[str, List[str]] = "*",
     headers: Union[str, List[str]] = "*",
     credentials: bool = False,
@@ -0,0 +1,193 @@
+"""Request deadlines for Shanks Django"""
+
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Absolute time.monotonic() deadline of the current request, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("shanks_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The current request ran past its timeout"""
+
+
+def current_deadline() -> Optional[float]:
+    """Deadline of the current request (time.monotonic() based) or None"""
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the current request's deadline, or None
+
+    Pass it on to outbound calls so they give up together with the request.
+
+    Example:
+        from shanks.deadline import remaining
+
+        @app.get('api/weather', timeout=2)
+        def weather(req):
+            reply = requests.get(WEATHER_URL, timeout=remaining())
+            return reply.json()
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check():
+    """Raise DeadlineExceeded if the current request is out of time"""
+    deadline = _deadline.get()
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded()
+
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+def _is_query_canceled(error) -> bool:
+    """Whether a DatabaseError is PostgreSQL cancelling a statement"""
+    cause = error.__cause__
+    # psycopg 3 reports the SQLSTATE as `sqlstate`, psycopg2 as `pgcode`
+    codes = (getattr(cause, "sqlstate", None), getattr(cause, "pgcode", None))
+    return QUERY_CANCELED in codes
+
+
+class _QueryGuard:
+    """
+    execute_wrapper that refuses queries once the deadline has passed
+
+    On PostgreSQL it also sets statement_timeout to the time left, so one
+    runaway query is cancelled by the server and surfaces as
+    DeadlineExceeded:
+
+    - In a transaction, with SET LOCAL: it ends with the transaction (or
+      the savepoint it was set in), so it never outlives the request
+    - In autocommit, with a session-level SET that is reset when the
+      request ends; a connection that can't be reset is closed instead
+      of being reused. Skipped behind PgBouncer transaction pooling
+      (DISABLE_SERVER_SIDE_CURSORS, see POOL_MODES["pgbouncer"]), where
+      the session is shared with other clients
+    """
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.sessions = []
+        # Registered with on_commit() next to each SET LOCAL: Django drops
+        # it when the transaction or savepoint ends, as PostgreSQL does
+        # with the SET LOCAL
+        self._marker = lambda: None
+
+    def __call__(self, execute, sql, params, many, context):
+        left = self.deadline - time.monotonic()
+        if left <= 0:
+            raise DeadlineExceeded()
+        connection = context["connection"]
+        if connection.vendor != "postgresql":
+            return execute(sql, params, many, context)
+        # Raw cursor: the SET itself must not go through the wrappers
+        limited = self._limit(connection, context["cursor"].cursor, left)
+        try:
+            return execute(sql, params, many, context)
+        except Exception as error:
+            if limited and _is_query_canceled(error):
+                raise DeadlineExceeded() from error
+            raise
+
+    def _limit(self, connection, cursor, left) -> bool:
+        """Apply statement_timeout if needed; whether one is in effect"""
+        timeout = max(1, int(left * 1000))
+        if not connection.get_autocommit():
+            if not connection.in_atomic_block:
+                # Manual transaction: no on_commit(), set it every time
+                cursor.execute(f"SET LOCAL statement_timeout = {timeout}")
+                return True
+            if not any(hook[1] is self._marker for hook in connection.run_on_commit):
+                cursor.execute(f"SET LOCAL statement_timeout = {timeout}")
+                connection.on_commit(self._marker)
+            return True
+        if connection in self.sessions:
+            return True
+        if connection.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+            return False
+        self.sessions.append(connection)
+        cursor.execute(f"SET statement_timeout = {timeout}")
+        return True
+
+    def reset(self):
+        for connection in self.sessions:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.cursor.execute("SET statement_timeout TO DEFAULT")
+            except Exception:
+                # Never hand the request's timeout to the next request
+                connection.close()
+
+
+@contextmanager
+def deadline_scope(timeout: Optional[float]):
+    """
+    Run a block under a deadline `timeout` seconds from now
+
+    Nested scopes never extend an outer deadline. Database queries made
+    inside the block fail with DeadlineExceeded once time is up.
+
+    Example:
+        with deadline_scope(5):
+            rebuild_search_index()
+    """
+    if timeout is None:
+        yield _deadline.get()
+        return
+    from django.db import connections
+
+    deadline = time.monotonic() + timeout
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    guard = _QueryGuard(deadline)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(guard))
+            yield deadline
+    finally:
+        guard.reset()
+        _deadline.reset(token)
+
+
+async def _wait_for(coroutine, deadline):
+    import asyncio
+
+    if deadline is None:
+        return await coroutine
+    try:
+        return await asyncio.wait_for(coroutine, max(0.0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded()
+
+
+def run_coroutine(coroutine, deadline=None):
+    """
+    Run an async handler's coroutine from the sync view
+
+    The coroutine is cancelled when the deadline passes.
+    """
+    from asgiref.sync import async_to_sync
+
+    return async_to_sync(_wait_for)(coroutine, deadline)
+
+
+__all__ = [
+    "DeadlineExceeded",
+    "check",
+    "current_deadline",
+    "deadline_scope",
+    "remaining",
+    "run_coroutine",
+]
@@ -0,0 +1,144 @@
+"""Precompiled static header blocks for Shanks responses"""
+
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+from django.http.response import ResponseHeaders
+
+HeadersLike = Union["HeaderBlock", Mapping[str, str], None]
+
+
+class HeaderBlock:
+    """
+    Immutable set of response headers compiled once and applied in one step
+
+    Header names and values are validated when the block is built, so
+    applying it to a response is a plain dict merge instead of one
+    validated ``response[key] = value`` write per header. Headers that the
+    handler already set on the response are never overwritten.
+
+    Example:
+        from shanks import App, HeaderBlock
+
+        app = App()
+        app.set_headers(HeaderBlock.security())
+
+        @app.get("api/config", headers=HeaderBlock.cache_control(max_age=60))
+        def get_config(req):
+            return {"theme": "dark"}
+    """
+
+    __slots__ = ("_entries", "_items")
+
+    def __init__(self, headers: Optional[Mapping[str, str]] = None):
+        # Let Django validate and normalize names/values exactly once
+        entries = dict(ResponseHeaders(dict(headers or {}))._store)
+        object.__setattr__(self, "_entries", entries)
+        object.__setattr__(self, "_items", tuple(entries.values()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("HeaderBlock is immutable")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, key):
+        return key.lower() in self._entries
+
+    def __eq__(self, other):
+        return isinstance(other, HeaderBlock) and self._entries == other._entries
+
+    def __hash__(self):
+        return hash(frozenset(self._entries.items()))
+
+    def __repr__(self):
+        return f"HeaderBlock({dict(self._items)!r})"
+
+    def get(self, key, default=None):
+        """Get a header value (case-insensitive)"""
+        entry = self._entries.get(key.lower())
+        return entry[1] if entry else default
+
+    def items(self) -> Tuple[Tuple[str, str], ...]:
+        """Header (name, value) pairs"""
+        return self._items
+
+    def merge(self, other: HeadersLike) -> "HeaderBlock":
+        """Return a new block with `other` layered on top of this one"""
+        other = HeaderBlock.coerce(other)
+        if not other:
+            return self
+        if not self:
+            return other
+        merged = dict(self._items)
+        merged.update(other._items)
+        return HeaderBlock(merged)
+
+    def apply(self, response):
+        """Add the headers to a Django response without overriding existing ones"""
+        if not self._entries:
+            return response
+        store = getattr(getattr(response, "headers", None), "_store", None)
+        if store is None:
+            for key, value in self._items:
+                response.setdefault(key, value)
+        elif store.keys().isdisjoint(self._entries):
+            store.update(self._entries)
+        else:
+            for key, entry in self._entries.items():
+                store.setdefault(key, entry)
+        return response
+
+    @staticmethod
+    def coerce(headers: HeadersLike) -> Optional["HeaderBlock"]:
+        """Turn a dict (or None) into a HeaderBlock"""
+        if headers is None or isinstance(headers, HeaderBlock):
+            return headers
+        return HeaderBlock(headers)
+
+    @classmethod
+    def security(
+        cls,
+        frame_options: str = "DENY",
+        referrer_policy: str = "same-origin",
+        hsts_seconds: int = 0,
+    ) -> "HeaderBlock":
+        """
+        Common security headers
+
+        Example:
+            app.set_headers(HeaderBlock.security(hsts_seconds=31536000))
+        """
+        headers: Dict[str, str] = {
+            "X-Content-Type-Options": "nosniff",
+            "X-Frame-Options": frame_options,
+            "Referrer-Policy": referrer_policy,
+        }
+        if hsts_seconds:
+            headers["Strict-Transport-Security"] = (
+                f"max-age={hsts_seconds}; includeSubDomains"
+            )
+        return cls(headers)
+
+    @classmethod
+    def cache_control(
+        cls, max_age: int = 0, public: bool = False, no_store: bool = False
+    ) -> "HeaderBlock":
+        """
+        Cache-Control header block
+
+        Example:
+            @app.get("api/categories", headers=HeaderBlock.cache_control(300))
+        """
+        if no_store:
+            return cls({"Cache-Control": "no-store"})
+        scope = "public" if public else "private"
+        return cls({"Cache-Control": f"{scope}, max-age={max_age}"})
+
+
+__all__ = ["HeaderBlock"]
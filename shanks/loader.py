@@ -0,0 +1,209 @@
+"""DataLoader - batched, per-request memoized lookups for Shanks"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from asgiref.sync import sync_to_async
+
+BatchFn = Callable[[List[Hashable]], Dict[Hashable, Any]]
+
+
+class Deferred:
+    """Placeholder returned by DataLoader.load(), resolved on first .get()"""
+
+    __slots__ = ("loader", "key")
+
+    def __init__(self, loader, key):
+        self.loader = loader
+        self.key = key
+
+    def get(self):
+        """Resolve this key, loading every queued key in the same batch"""
+        return self.loader._resolve(self.key)
+
+    def __repr__(self):
+        return f"Deferred({self.key!r})"
+
+
+class DataLoader:
+    """
+    Collects load(key) calls and resolves them with one batch call
+
+    `batch_fn` receives a list of keys and returns a {key: value} mapping;
+    keys it doesn't return resolve to None. Results are memoized for the
+    lifetime of the loader, so create one per request (Model.loader(req)
+    does this for you).
+
+    Sync example:
+        categories = Category.loader(req)
+        rows = [
+            {"title": post.title, "category": categories.load(post.category_id)}
+            for post in posts
+        ]
+        return {"posts": DataLoader.resolve(rows)}  # one query for all categories
+
+    Async example:
+        category = await categories.aload(post.category_id)
+    """
+
+    def __init__(self, batch_fn: BatchFn, max_batch_size: Optional[int] = None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self._values: Dict[Hashable, Any] = {}
+        self._pending: Dict[Hashable, None] = {}
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        # The event loop only keeps weak references to tasks
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+
+    def load(self, key) -> Deferred:
+        """Queue a key and return a Deferred for it"""
+        if key not in self._values:
+            self._pending[key] = None
+        return Deferred(self, key)
+
+    def load_many(self, keys: Iterable) -> List[Any]:
+        """Load several keys now, in as few batches as possible"""
+        keys = list(keys)
+        for key in keys:
+            if key not in self._values:
+                self._pending[key] = None
+        self.dispatch()
+        return [self._values.get(key) for key in keys]
+
+    def dispatch(self):
+        """Resolve all queued keys"""
+        if self._pending:
+            keys = list(self._pending)
+            self._pending.clear()
+            self._fetch(keys)
+
+    def prime(self, key, value):
+        """Seed the cache with a value loaded elsewhere"""
+        self._values[key] = value
+        self._pending.pop(key, None)
+        return self
+
+    def clear(self, key=None):
+        """Forget one key, or everything"""
+        if key is None:
+            self._values.clear()
+        else:
+            self._values.pop(key, None)
+        return self
+
+    def _resolve(self, key):
+        if key not in self._values:
+            self._pending[key] = None
+            self.dispatch()
+        return self._values.get(key)
+
+    def _fetch(self, keys):
+        size = self.max_batch_size or len(keys)
+        for start in range(0, len(keys), size):
+            chunk = keys[start : start + size]
+            self.batches += 1
+            found = self.batch_fn(chunk)
+            for key in chunk:
+                self._values[key] = found.get(key)
+
+    async def aload(self, key):
+        """
+        Load a key from async code
+
+        Calls made in the same event loop tick (e.g. inside asyncio.gather)
+        are resolved together in one batch, run in a worker thread.
+        """
+        if key in self._values:
+            return self._values[key]
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._futures:
+                loop.call_soon(self._start_dispatch, loop)
+            future = self._futures[key] = loop.create_future()
+        return await future
+
+    async def aload_many(self, keys: Iterable) -> List[Any]:
+        """Async counterpart of load_many()"""
+        return list(await asyncio.gather(*(self.aload(key) for key in keys)))
+
+    def _start_dispatch(self, loop):
+        task = loop.create_task(self._adispatch())
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _adispatch(self):
+        futures = self._futures
+        self._futures = {}
+        try:
+            await sync_to_async(self._fetch)(list(futures))
+        except Exception as exc:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(self._values.get(key))
+
+    @staticmethod
+    def resolve(data):
+        """
+        Replace every Deferred inside dicts/lists/tuples with its value
+
+        Each loader runs one batch for all of its queued keys.
+        """
+        if isinstance(data, Deferred):
+            return data.get()
+        if isinstance(data, dict):
+            return {key: DataLoader.resolve(value) for key, value in data.items()}
+        if isinstance(data, (list, tuple)):
+            return type(data)(DataLoader.resolve(value) for value in data)
+        return data
+
+
+def _model_batch_fn(model, field):
+    if field == "pk":
+        attname = model._meta.pk.attname
+    else:
+        attname = model._meta.get_field(field).attname
+    lookup = f"{field}__in"
+
+    def batch(keys):
+        queryset = model._default_manager.filter(**{lookup: keys})
+        return {getattr(obj, attname): obj for obj in queryset}
+
+    return batch
+
+
+def model_loader(model, req=None, field: str = "pk") -> DataLoader:
+    """
+    DataLoader that fetches `model` rows by a unique field with field__in
+
+    When a request is given, the loader is stored in req.state and reused
+    for the rest of the request.
+    """
+    if req is not None:
+        loaders = req.state.get("dataloaders")
+        if loaders is None:
+            loaders = req.state.dataloaders = {}
+        loader = loaders.get((model, field))
+        if loader is None:
+            loader = loaders[(model, field)] = model_loader(model, field=field)
+        return loader
+
+    from django.db import router
+
+    from .orm import _batch_size
+
+    lookup_field = model._meta.pk if field == "pk" else model._meta.get_field(field)
+    return DataLoader(
+        _model_batch_fn(model, field),
+        max_batch_size=_batch_size(
+            model, [lookup_field], using=router.db_for_read(model)
+        ),
+    )
+
+
+__all__ = ["DataLoader", "Deferred", "model_loader"]
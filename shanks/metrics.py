@@ -0,0 +1,453 @@
+"""Request metrics with Prometheus exposition for Shanks Django"""
+
+import glob
+import hmac
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger("shanks.metrics")
+
+# Prometheus' default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Observation of the request being handled, for cache and DB hooks
+_current: ContextVar[Optional["Observation"]] = ContextVar(
+    "shanks_metrics_observation", default=None
+)
+
+_COUNTERS = (
+    "count",
+    "seconds",
+    "handler_seconds",
+    "queries",
+    "query_seconds",
+    "cache_hits",
+    "cache_misses",
+)
+
+
+class RouteStats:
+    """Totals for one (route, method) in one thread"""
+
+    __slots__ = _COUNTERS + ("buckets", "statuses", "in_flight")
+
+    def __init__(self, size):
+        for name in _COUNTERS:
+            setattr(self, name, 0)
+        self.buckets = [0] * size
+        self.statuses: Dict[int, int] = {}
+        self.in_flight = 0
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in _COUNTERS}
+        data["buckets"] = list(self.buckets)
+        statuses = self.statuses.copy()
+        data["statuses"] = {str(code): n for code, n in statuses.items()}
+        data["in_flight"] = self.in_flight
+        return data
+
+    def merge(self, data, gauges=True):
+        for name in _COUNTERS:
+            setattr(self, name, getattr(self, name) + data[name])
+        for index, value in enumerate(data["buckets"]):
+            self.buckets[index] += value
+        for code, n in data["statuses"].items():
+            self.statuses[int(code)] = self.statuses.get(int(code), 0) + n
+        if gauges:
+            self.in_flight += data["in_flight"]
+
+
+class Observation:
+    """One request being measured; also a context manager"""
+
+    __slots__ = (
+        "stats",
+        "start",
+        "handler_seconds",
+        "queries",
+        "query_seconds",
+        "cache_hits",
+        "cache_misses",
+        "response",
+        "_metrics",
+        "_token",
+    )
+
+    def __init__(self, metrics, stats):
+        self._metrics = metrics
+        self.stats = stats
+        self.handler_seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.response = None
+
+    def __enter__(self):
+        self.stats.in_flight += 1
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _current.reset(self._token)
+
+        stats = self.stats
+        stats.in_flight -= 1
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.buckets[bisect_left(self._metrics.buckets, elapsed)] += 1
+        stats.handler_seconds += self.handler_seconds
+        stats.queries += self.queries
+        stats.query_seconds += self.query_seconds
+        stats.cache_hits += self.cache_hits
+        stats.cache_misses += self.cache_misses
+        status = 500 if exc_type else getattr(self.response, "status_code", 500)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        self._metrics._maybe_flush()
+        return False
+
+
+class _ShardOwner:
+    """Thread-local handle whose finalizer retires its thread's shard"""
+
+    __slots__ = ("__weakref__",)
+
+
+def _retire_shard(metrics_ref, shard):
+    """Runs when a thread exits and its thread-local values are dropped"""
+    metrics = metrics_ref()
+    if metrics is not None:
+        metrics._retire(shard)
+
+
+def _flush_periodically(metrics_ref, interval):
+    """Flusher thread body; ends once its Metrics is garbage collected"""
+    while True:
+        time.sleep(interval)
+        metrics = metrics_ref()
+        if metrics is None:
+            return
+        metrics._flush_quietly()
+        del metrics
+
+
+def _record_query(execute, sql, params, many, context):
+    """execute_wrapper counting queries against the current request"""
+    observation = _current.get()
+    if observation is None or not observation._metrics.track_db:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        observation.queries += 1
+        observation.query_seconds += time.perf_counter() - start
+
+
+def record_cache(hit: bool):
+    """Count a response cache hit/miss against the current request"""
+    observation = _current.get()
+    if observation is not None:
+        if hit:
+            observation.cache_hits += 1
+        else:
+            observation.cache_misses += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to someone else
+        return True
+    return True
+
+
+class Metrics:
+    """
+    Built-in request metrics, exposed in the Prometheus text format
+
+    Installed with app.use(); it is recorded by the view pipeline itself
+    (not a middleware) per route template and method:
+
+    - shanks_requests_total (by status) and shanks_requests_in_flight
+    - shanks_request_duration_seconds histogram
+    - shanks_handler_seconds_total / shanks_middleware_seconds_total
+      (time in the handler vs. middleware chain and response building)
+    - shanks_db_queries_total / shanks_db_query_seconds_total
+    - shanks_cache_requests_total (auto_cache / @cache hits and misses)
+
+    Each thread updates its own counters, so recording takes no locks;
+    they are summed when /metrics is scraped. Counters of exited threads
+    are folded into a retired total.
+
+    For gunicorn and other pre-fork servers set `multiprocess_dir` (or the
+    SHANKS_METRICS_DIR environment variable) to a directory shared by the
+    workers: a background thread in each worker writes its totals there
+    every `flush_interval` seconds and /metrics merges all of them.
+
+    Args:
+        path: Route of the metrics endpoint (None to not add one)
+        buckets: Latency histogram buckets in seconds
+        token: Require 'Authorization: Bearer <token>' on the endpoint
+        track_db: Count database queries and their time per route
+        multiprocess_dir: Directory for cross-process aggregation
+        flush_interval: Seconds between a worker's writes to that directory
+
+    Example:
+        from shanks import App, Metrics
+
+        app = App()
+        app.use(Metrics())  # GET /metrics
+    """
+
+    _shanks_metrics = True
+
+    def __init__(
+        self,
+        path: Optional[str] = "metrics",
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        token: Optional[str] = None,
+        track_db: bool = True,
+        multiprocess_dir: Optional[str] = None,
+        flush_interval: float = 1.0,
+    ):
+        self.path = path.strip("/") if path else path
+        self.buckets = tuple(sorted(buckets))
+        self.token = token
+        self.track_db = track_db
+        self.multiprocess_dir = multiprocess_dir or os.environ.get("SHANKS_METRICS_DIR")
+        self.flush_interval = flush_interval
+        if self.multiprocess_dir is not None:
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+        if track_db:
+            from .app import _track_queries
+
+            _track_queries(_record_query, "shanks.metrics.queries")
+        self._local = threading.local()
+        self._shards = []
+        # Totals of threads that have exited
+        self._retired: Dict[Tuple[str, str], RouteStats] = {}
+        self._shards_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+
+    def _shard(self) -> Dict[Tuple[str, str], RouteStats]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._shards_lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, _retire_shard, weakref.ref(self), shard)
+        return shard
+
+    def _retire(self, shard):
+        """Fold an exited thread's shard into the retired totals"""
+        with self._shards_lock:
+            self._shards = [other for other in self._shards if other is not shard]
+            for key, stats in shard.items():
+                retired = self._retired.get(key)
+                if retired is None:
+                    retired = self._retired[key] = RouteStats(len(self.buckets) + 1)
+                retired.merge(stats.to_dict())
+
+    def observe(self, route: str, method: str) -> Observation:
+        """Context manager measuring one request"""
+        shard = self._shard()
+        key = (route, method)
+        stats = shard.get(key)
+        if stats is None:
+            stats = shard[key] = RouteStats(len(self.buckets) + 1)
+        return Observation(self, stats)
+
+    def collect(self) -> Dict[Tuple[str, str], RouteStats]:
+        """Totals of this process, summed over every thread"""
+        totals: Dict[Tuple[str, str], RouteStats] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+            for key, stats in self._retired.items():
+                merged = totals[key] = RouteStats(len(self.buckets) + 1)
+                merged.merge(stats.to_dict())
+        for shard in shards:
+            for key, stats in shard.copy().items():
+                merged = totals.get(key)
+                if merged is None:
+                    merged = totals[key] = RouteStats(len(self.buckets) + 1)
+                merged.merge(stats.to_dict())
+        return totals
+
+    def _file(self):
+        return os.path.join(self.multiprocess_dir, f"shanks-{os.getpid()}.json")
+
+    def _maybe_flush(self):
+        """Start this process' flusher thread on its first request"""
+        pid = os.getpid()
+        if self.multiprocess_dir is None or self._flusher_pid == pid:
+            return
+        # Per process: pre-fork workers don't inherit the parent's threads
+        with self._shards_lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        threading.Thread(
+            target=_flush_periodically,
+            args=(weakref.ref(self), self.flush_interval),
+            name="shanks-metrics-flush",
+            daemon=True,
+        ).start()
+
+    def flush(self):
+        """Write this process' totals to multiprocess_dir"""
+        data = {
+            "pid": os.getpid(),
+            "routes": [
+                [route, method, stats.to_dict()]
+                for (route, method), stats in self.collect().items()
+            ],
+        }
+        path = self._file()
+        # The flusher thread and a scrape may flush at the same time
+        with self._flush_lock:
+            fd, tmp = tempfile.mkstemp(
+                prefix=f"shanks-{os.getpid()}.",
+                suffix=".tmp",
+                dir=self.multiprocess_dir,
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write metrics to %s", self.multiprocess_dir)
+
+    def collect_all(self) -> Dict[Tuple[str, str], RouteStats]:
+        """Totals of every worker process (or of this one)"""
+        if self.multiprocess_dir is None:
+            return self.collect()
+        self._flush_quietly()
+        totals: Dict[Tuple[str, str], RouteStats] = {}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, "shanks-*.json")):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Counters of exited workers still count, their gauges don't
+            alive = _pid_alive(data["pid"])
+            for route, method, values in data["routes"]:
+                merged = totals.get((route, method))
+                if merged is None:
+                    merged = totals[(route, method)] = RouteStats(len(self.buckets) + 1)
+                merged.merge(values, gauges=alive)
+        return totals
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        totals = sorted(self.collect_all().items())
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("shanks_requests_total", "counter", "Requests handled")
+        for (route, method), stats in totals:
+            for status, n in sorted(stats.statuses.items()):
+                labels = _labels(route=route, method=method, status=status)
+                lines.append(f"shanks_requests_total{labels} {n}")
+
+        family("shanks_requests_in_flight", "gauge", "Requests being handled")
+        for (route, method), stats in totals:
+            labels = _labels(route=route, method=method)
+            lines.append(f"shanks_requests_in_flight{labels} {stats.in_flight}")
+
+        name = "shanks_request_duration_seconds"
+        family(name, "histogram", "Request latency")
+        for (route, method), stats in totals:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), stats.buckets):
+                cumulative += n
+                labels = _labels(route=route, method=method, le=bound)
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _labels(route=route, method=method)
+            lines.append(f"{name}_sum{labels} {stats.seconds}")
+            lines.append(f"{name}_count{labels} {stats.count}")
+
+        for name, help_text, amount in (
+            (
+                "shanks_handler_seconds_total",
+                "Time spent in handlers",
+                lambda stats: stats.handler_seconds,
+            ),
+            (
+                "shanks_middleware_seconds_total",
+                "Time spent outside handlers (middleware, response building)",
+                lambda stats: max(0.0, stats.seconds - stats.handler_seconds),
+            ),
+            (
+                "shanks_db_queries_total",
+                "Database queries",
+                lambda stats: stats.queries,
+            ),
+            (
+                "shanks_db_query_seconds_total",
+                "Database query time",
+                lambda stats: stats.query_seconds,
+            ),
+        ):
+            family(name, "counter", help_text)
+            for (route, method), stats in totals:
+                labels = _labels(route=route, method=method)
+                lines.append(f"{name}{labels} {amount(stats)}")
+
+        family("shanks_cache_requests_total", "counter", "Response cache lookups")
+        for (route, method), stats in totals:
+            for result, n in (("hit", stats.cache_hits), ("miss", stats.cache_misses)):
+                if n:
+                    labels = _labels(route=route, method=method, result=result)
+                    lines.append(f"shanks_cache_requests_total{labels} {n}")
+
+        return "\n".join(lines) + "\n"
+
+    def view(self, request):
+        """Django view serving render()"""
+        from django.http import HttpResponse
+
+        if self.token is not None:
+            supplied = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied, f"Bearer {self.token}"):
+                return HttpResponse("Unauthorized", status=401)
+        return HttpResponse(self.render(), content_type=CONTENT_TYPE)
+
+
+__all__ = ["DEFAULT_BUCKETS", "Metrics", "Observation", "record_cache"]
@@ -0,0 +1,250 @@
+"""N+1 query detection for Shanks - spot repeated query shapes per request"""
+
+import logging
+import os
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("shanks.nplusone")
+
+_SHANKS_DIR = os.path.dirname(os.path.abspath(__file__))
+_DJANGO_MARKER = os.sep + "django" + os.sep
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+_FROM_RE = re.compile(r'\bFROM\s+"?(\w+)"?', re.IGNORECASE)
+_WHERE_COLUMN_RE = re.compile(
+    r'\bWHERE\s+"?(\w+)"?\."?(\w+)"?\s*(?:=|IN\b)', re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize SQL so queries that differ only in literals compare equal
+
+    Example:
+        fingerprint('SELECT * FROM t WHERE id IN (%s, %s)')
+        -> 'SELECT * FROM t WHERE id IN (...)'
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _call_site() -> Optional[str]:
+    """First stack frame outside Django and Shanks (i.e. application code)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not (
+            _DJANGO_MARKER in filename
+            or filename.startswith(_SHANKS_DIR)
+            or filename.startswith("<")
+        ):
+            return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _model_for_table(table: str):
+    from django.apps import apps
+
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def suggest_fix(sql: str) -> Optional[str]:
+    """
+    Suggest select_related/prefetch_related for a repeated query
+
+    - Repeated primary key lookups on a table are forward ForeignKey
+      accesses: select_related() on the relation pointing to it
+    - Repeated lookups by a foreign key column are reverse accesses:
+      prefetch_related() on the related manager
+    """
+    match = _WHERE_COLUMN_RE.search(sql) or None
+    table_match = _FROM_RE.search(sql)
+    if not match or not table_match:
+        return None
+    table, column = match.group(1), match.group(2)
+    model = _model_for_table(table)
+    if model is None:
+        return None
+
+    if column == model._meta.pk.column:
+        from django.apps import apps
+
+        candidates = [
+            f"{other.__name__}.objects.select_related('{field.name}')"
+            for other in apps.get_models()
+            for field in other._meta.get_fields()
+            if getattr(field, "many_to_one", False)
+            and field.concrete
+            and field.related_model is model
+        ]
+        if candidates:
+            return " or ".join(candidates[:3])
+        return None
+
+    for field in model._meta.concrete_fields:
+        if field.column == column and field.is_relation:
+            accessor = field.remote_field.get_accessor_name()
+            target = field.related_model.__name__
+            return f"{target}.objects.prefetch_related('{accessor}')"
+    return None
+
+
+class QueryTracker:
+    """
+    Records query shapes executed while it is installed as an execute wrapper
+
+    Example:
+        tracker = QueryTracker()
+        with tracker.track():
+            list_posts(req)
+        tracker.report()
+    """
+
+    def __init__(self, threshold: int = 5):
+        self.threshold = threshold
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, str] = {}
+        self.sites: Dict[str, Optional[str]] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        shape = fingerprint(sql)
+        count = self.counts.get(shape, 0) + 1
+        self.counts[shape] = count
+        if count == 1:
+            self.samples[shape] = sql
+        elif count == 2:
+            # Only pay for stack inspection once a shape actually repeats
+            self.sites[shape] = _call_site()
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def track(self):
+        """Install the tracker on every configured database connection"""
+        from django.db import connections
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def report(self) -> List[Dict[str, object]]:
+        """Query shapes repeated at least `threshold` times, worst first"""
+        offenders = [
+            {
+                "query": shape,
+                "count": count,
+                "call_site": self.sites.get(shape),
+                "suggestion": suggest_fix(self.samples[shape]),
+            }
+            for shape, count in self.counts.items()
+            if count >= self.threshold
+        ]
+        offenders.sort(key=lambda item: item["count"], reverse=True)
+        return offenders
+
+
+def format_report(route: str, offenders: List[Dict[str, object]]) -> str:
+    """Human-readable report for logs and assertion messages"""
+    lines = [f"N+1 queries detected in {route}:"]
+    for item in offenders:
+        lines.append(f"  {item['count']}x {item['query']}")
+        if item["call_site"]:
+            lines.append(f"     at {item['call_site']}")
+        if item["suggestion"]:
+            lines.append(f"     try {item['suggestion']}")
+    return "\n".join(lines)
+
+
+def n_plus_one_detector(
+    threshold: int = 5, log: bool = True, header: bool = True, raise_error=False
+):
+    """
+    Create a middleware that reports N+1 query patterns per request
+
+    Args:
+        threshold: How many identical query shapes count as N+1
+        log: Log a warning on the 'shanks.nplusone' logger
+        header: Add an X-N-Plus-One response header (count and worst query)
+        raise_error: Raise AssertionError instead (useful in tests/CI)
+
+    Example:
+        from shanks import n_plus_one_detector
+
+        if settings.DEBUG:
+            app.use(n_plus_one_detector(threshold=3))
+    """
+
+    def n_plus_one_middleware(req, res, next):
+        tracker = QueryTracker(threshold)
+        with tracker.track():
+            result = next()
+
+        offenders = tracker.report()
+        if not offenders:
+            return result
+
+        route = f"{req.method} {req.route or req.path}"
+        message = format_report(route, offenders)
+        if raise_error:
+            raise AssertionError(message)
+        if log:
+            logger.warning(message)
+        if header:
+            worst = offenders[0]
+            from .response import _decorate
+
+            result = _decorate(
+                result,
+                {
+                    "X-N-Plus-One": f"{len(offenders)} repeated; "
+                    f"worst {worst['count']}x"
+                },
+            )
+        return result
+
+    return n_plus_one_middleware
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold: int = 5):
+    """
+    Test helper: fail if any query shape repeats `threshold` times or more
+
+    Example:
+        from shanks.nplusone import assert_no_n_plus_one
+
+        def test_list_posts(client):
+            with assert_no_n_plus_one(threshold=3):
+                client.get("/api/v1/posts")
+    """
+    tracker = QueryTracker(threshold)
+    with tracker.track():
+        yield tracker
+    offenders = tracker.report()
+    if offenders:
+        raise AssertionError(format_report("block", offenders))
+
+
+__all__ = [
+    "QueryTracker",
+    "fingerprint",
+    "suggest_fix",
+    "n_plus_one_detector",
+    "assert_no_n_plus_one",
+]
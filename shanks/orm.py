@@ -1,39 +1,600 @@
 """ORM wrapper for Shanks Django - Prisma-like syntax"""
 
-from django.db import models
+import base64
+import datetime
+import json
+from itertools import islice
+
+import django
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router
+from django.db.models import F, Q, options
+from django.db.models.signals import class_prepared
 from django.utils.text import slugify as django_slugify
 
+from . import querycache
+
+# Allow `class Meta: shanks_cache = 60` (query result cache TTL) on models
+if "shanks_cache" not in options.DEFAULT_NAMES:
+    options.DEFAULT_NAMES = options.DEFAULT_NAMES + ("shanks_cache",)
+
+# Rows per INSERT/UPDATE when neither the caller nor the backend sets a limit
+DEFAULT_BATCH_SIZE = 1000
+
+# Rows fetched per round trip by stream()
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _chunked(iterable, size):
+    """Yield lists of at most `size` items without materializing the input"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _batch_size(model, fields, batch_size=None, using=None):
+    """
+    Pick a batch size that respects the backend's query parameter limit
+
+    SQLite caps the number of bound parameters per statement (999 on older
+    builds), so a 10-column insert can only carry ~99 rows; Postgres and
+    MySQL have no such limit and use DEFAULT_BATCH_SIZE.
+    """
+    ops = connections[using or router.db_for_write(model)].ops
+    wanted = batch_size or DEFAULT_BATCH_SIZE
+    backend_limit = ops.bulk_batch_size(list(fields), range(wanted))
+    return max(1, min(wanted, backend_limit))
+
+
+def _as_instance(model, row):
+    return row if isinstance(row, model) else model(**row)
+
+
+class Page:
+    """
+    One page of keyset-paginated results
+
+    Iterates like a list of model instances and carries the opaque cursor
+    for the next page (None on the last page).
+    """
+
+    __slots__ = ("items", "next_cursor", "has_more", "total")
+
+    def __init__(self, items, next_cursor=None, has_more=False, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_more = has_more
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __repr__(self):
+        return f"<Page items={len(self.items)} has_more={self.has_more}>"
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that keeps microseconds, so no row is skipped"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _encode_cursor(values):
+    raw = json.dumps(values, cls=_CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor, fields):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError):
+        raise ValueError("Invalid cursor")
+
+
+def _keyset_ordering(model, order_by):
+    """Resolve order_by into [(name, field, descending)] ending with the pk"""
+    if not order_by:
+        order_by = list(model._meta.ordering) or ["pk"]
+    elif isinstance(order_by, str):
+        order_by = [order_by]
+
+    pk = model._meta.pk
+    ordering = []
+    for item in order_by:
+        descending = item.startswith("-")
+        name = item.lstrip("-")
+        field = pk if name == "pk" else model._meta.get_field(name)
+        ordering.append((field.attname, field, descending))
+
+    # Unique tiebreaker so rows with equal sort values are never skipped
+    if not any(field is pk for _, field, _ in ordering):
+        ordering.append((pk.attname, pk, ordering[-1][2]))
+    return ordering
+
+
+def _keyset_order_by(ordering):
+    """order_by() arguments for a resolved ordering; NULLs always sort last"""
+    expressions = []
+    for name, field, descending in ordering:
+        if field.null:
+            column = F(name)
+            expressions.append(
+                column.desc(nulls_last=True)
+                if descending
+                else column.asc(nulls_last=True)
+            )
+        else:
+            expressions.append(("-" if descending else "") + name)
+    return expressions
+
+
+def _keyset_filter(ordering, values):
+    """(a, b) > (x, y)  ->  a > x OR (a = x AND b > y), per-column direction"""
+    condition = Q()
+    equal = Q()
+    for (name, field, descending), value in zip(ordering, values):
+        if value is None:
+            # NULLs sort last, so no row comes after one in this column
+            equal &= Q(**{f"{name}__isnull": True})
+            continue
+        lookup = "lt" if descending else "gt"
+        after = Q(**{f"{name}__{lookup}": value})
+        if field.null:
+            after |= Q(**{f"{name}__isnull": True})
+        condition |= equal & after
+        equal &= Q(**{name: value})
+    return condition
+
+
+def estimated_count(queryset):
+    """
+    Cheap row-count estimate
+
+    On PostgreSQL this reads the planner statistics (pg_class.reltuples for
+    the whole table, EXPLAIN for filtered querysets) instead of scanning
+    every row. Other backends fall back to an exact COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0) until the table has been analyzed
+        if row and row[0] > 0:
+            return int(row[0])
+        return queryset.count()
+
+    plan = json.loads(queryset.explain(format="json"))
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
+
+
+def _select_paths(select):
+    """['id', 'author.name'] -> ['id', 'author__name']"""
+    return [name.replace(".", "__") for name in select]
+
+
+def project(queryset, select, as_tuples=False):
+    """
+    Compile a field selection into values()/values_list()
+
+    Rows come back as plain dicts keyed by the selected names (or tuples in
+    select order) with relations joined in SQL, so no model instances are
+    built. Dotted names follow relations.
+
+    Example:
+        project(Post.objects.all(), ["id", "title", "category.name"])
+        # <QuerySet [{'id': 1, 'title': '...', 'category.name': '...'}]>
+    """
+    paths = _select_paths(select)
+    if as_tuples:
+        return queryset.values_list(*paths)
+    fields = [path for name, path in zip(select, paths) if name == path]
+    aliases = {name: F(path) for name, path in zip(select, paths) if name != path}
+    return queryset.values(*fields, **aliases)
+
+
+def paginate(
+    queryset,
+    take=20,
+    cursor=None,
+    order_by=None,
+    count=False,
+    select=None,
+    as_tuples=False,
+):
+    """
+    Keyset (cursor) pagination for any queryset
+
+    Each page costs one indexed range scan regardless of how deep it is,
+    unlike OFFSET pagination which reads and discards every skipped row.
+
+    Args:
+        queryset: QuerySet to paginate
+        take: Page size
+        cursor: Opaque cursor from a previous Page.next_cursor
+        order_by: Field names ('-created_at'); defaults to Meta.ordering.
+            The primary key is appended as a tiebreaker.
+        count: False (no count), True (exact COUNT) or "estimate"
+        select: Optional field names; items become dicts (or tuples with
+            as_tuples=True) instead of model instances, see project()
+
+    Returns:
+        Page
+    """
+    model = queryset.model
+    ordering = _keyset_ordering(model, order_by)
+    fields = [field for _, field, _ in ordering]
+
+    total = None
+    if count == "estimate":
+        total = estimated_count(queryset)
+    elif count:
+        total = queryset.count()
+
+    queryset = queryset.order_by(*_keyset_order_by(ordering))
+    if cursor:
+        queryset = queryset.filter(
+            _keyset_filter(ordering, _decode_cursor(cursor, fields))
+        )
+
+    names = [name for name, _, _ in ordering]
+    if select:
+        # Fetch the cursor columns after the projection and split them off
+        width = len(select)
+        rows = list(queryset.values_list(*_select_paths(select), *names)[: take + 1])
+        has_more = len(rows) > take
+        rows = rows[:take]
+        if as_tuples:
+            items = [row[:width] for row in rows]
+        else:
+            items = [dict(zip(select, row)) for row in rows]
+        last_values = list(rows[-1][width:]) if rows else None
+    else:
+        items = list(queryset[: take + 1])
+        has_more = len(items) > take
+        items = items[:take]
+        last_values = [getattr(items[-1], name) for name in names] if items else None
+
+    next_cursor = None
+    if has_more:
+        next_cursor = _encode_cursor(last_values)
+    return Page(items, next_cursor, has_more, total)
+
+
+def stream(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterate over a large queryset in constant memory
+
+    - PostgreSQL: server-side cursor via .iterator(chunk_size)
+    - Other backends: chunked keyset scan (one indexed range query per
+      chunk), since e.g. MySQL drivers buffer the whole result set
+    - values()/values_list() projections, sliced querysets and orderings
+      that aren't plain model fields fall back to .iterator(chunk_size)
+
+    Example:
+        for post in stream(Post.objects.filter(published=True), 500):
+            export(post)
+    """
+    if (
+        connections[queryset.db].vendor != "postgresql"
+        and queryset._fields is None
+        and not queryset.query.is_sliced
+    ):
+        try:
+            ordering = _keyset_ordering(
+                queryset.model, list(queryset.query.order_by) or None
+            )
+        except (AttributeError, FieldDoesNotExist):
+            ordering = None
+        if ordering is not None:
+            yield from _keyset_stream(queryset, ordering, chunk_size)
+            return
+    yield from queryset.iterator(chunk_size=chunk_size)
+
+
+def _keyset_stream(queryset, ordering, chunk_size):
+    names = [name for name, _, _ in ordering]
+    queryset = queryset.order_by(*_keyset_order_by(ordering))
+    chunk_queryset = queryset
+    while True:
+        chunk = list(chunk_queryset[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+        chunk_queryset = queryset.filter(
+            _keyset_filter(ordering, [getattr(last, name) for name in names])
+        )
+
+
+class ShanksQuerySet(models.QuerySet):
+    """QuerySet returned by Model.find_many() and Model.objects"""
+
+    def stream(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iterate in constant memory (see shanks.orm.stream)
+
+        Example:
+            for post in Post.find_many(published=True).stream(chunk_size=500):
+                ...
+        """
+        return stream(self, chunk_size)
+
+    # Writes that bypass model signals still invalidate the query cache
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        querycache.invalidate(self.model, self.db)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        querycache.invalidate(self.model, self.db)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        querycache.invalidate(self.model, self.db)
+        return rows
+
 
 # Re-export Django models with Shanks naming
 class Model(models.Model):
     """Base model class with Prisma-like methods"""
 
+    objects = ShanksQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
     @classmethod
-    def find_many(cls, **filters):
-        """Find many records (Prisma-like)"""
-        return cls.objects.filter(**filters)
+    def find_many(
+        cls,
+        cursor=None,
+        take=None,
+        order_by=None,
+        count=False,
+        select=None,
+        as_tuples=False,
+        cache=None,
+        **filters,
+    ):
+        """
+        Find many records (Prisma-like)
+
+        Without `take`/`cursor` a QuerySet is returned. With them, results
+        are keyset-paginated and a Page is returned (see paginate()).
+
+        With `select`, rows are plain dicts (or tuples) built straight from
+        values()/values_list() - no model instances (see project()):
+
+            Post.find_many(select=["id", "title", "category.name"])
+
+        With `cache=<seconds>` (or Meta.shanks_cache) the result is read
+        through the query cache and returned as a list instead of a QuerySet.
+
+        Example:
+            page = Post.find_many(published=True, take=20, order_by=["-created_at"])
+            next_page = Post.find_many(
+                published=True, take=20, order_by=["-created_at"],
+                cursor=page.next_cursor,
+            )
+        """
+        ttl = querycache.resolve_ttl(cls, cache)
+        queryset = cls.objects.filter(**filters)
+        if take is None and cursor is None:
+            if isinstance(order_by, str):
+                order_by = [order_by]
+            if order_by:
+                queryset = queryset.order_by(*order_by)
+            if select:
+                queryset = project(queryset, select, as_tuples)
+            if ttl:
+                return querycache.cached(
+                    cls, ttl, "many", queryset, lambda: list(queryset)
+                )
+            return queryset
+
+        def page():
+            return paginate(
+                queryset,
+                take=take or 20,
+                cursor=cursor,
+                order_by=order_by,
+                count=count,
+                select=select,
+                as_tuples=as_tuples,
+            )
+
+        if ttl:
+            extra = (take, cursor, order_by, count, select, as_tuples)
+            return querycache.cached(cls, ttl, "page", queryset, page, extra)
+        return page()
 
     @classmethod
-    def find_first(cls, **filters):
+    def iterate_all(cls, chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+        """
+        Iterate over every matching record in constant memory
+
+        Example:
+            return stream_response(
+                {"id": post.id, "title": post.title}
+                for post in Post.iterate_all(published=True)
+            )
+        """
+        return stream(cls.objects.filter(**filters), chunk_size)
+
+    @classmethod
+    def find_first(cls, cache=None, **filters):
         """Find first record (Prisma-like)"""
-        return cls.objects.filter(**filters).first()
+        queryset = cls.objects.filter(**filters)
+        ttl = querycache.resolve_ttl(cls, cache)
+        if ttl:
+            return querycache.cached(cls, ttl, "first", queryset, queryset.first)
+        return queryset.first()
 
     @classmethod
-    def find_unique(cls, **filters):
-        """Find unique record (Prisma-like)"""
-        try:
-            return cls.objects.get(**filters)
-        except cls.DoesNotExist:
-            return None
+    def find_unique(cls, cache=None, **filters):
+        """
+        Find unique record (Prisma-like)
+
+        Example:
+            # Served from the query cache for 60s, invalidated on writes
+            category = Category.find_unique(slug="news", cache=60)
+        """
+        queryset = cls.objects.filter(**filters)
+
+        def get():
+            try:
+                return queryset.get()
+            except cls.DoesNotExist:
+                return None
+
+        ttl = querycache.resolve_ttl(cls, cache)
+        if ttl:
+            return querycache.cached(cls, ttl, "unique", queryset, get)
+        return get()
+
+    @classmethod
+    def loader(cls, req=None, field="pk"):
+        """
+        DataLoader that batches lookups by `field` into one field__in query
+
+        Pass the request to share one memoized loader per request.
+
+        Example:
+            categories = Category.loader(req)
+            rows = [{"category": categories.load(p.category_id)} for p in posts]
+            return {"posts": DataLoader.resolve(rows)}
+        """
+        from .loader import model_loader
+
+        return model_loader(cls, req, field)
 
     @classmethod
     def create(cls, **data):
         """Create record (Prisma-like)"""
         return cls.objects.create(**data)
 
+    @classmethod
+    def create_many(cls, rows, batch_size=None, ignore_conflicts=False):
+        """
+        Create many records with batched INSERTs (Prisma-like createMany)
+
+        Rows can be dicts or unsaved instances, and any iterable (including
+        generators) is consumed chunk by chunk. Returns the number of rows sent.
+
+        Example:
+            Post.create_many(
+                ({"title": row["title"]} for row in csv_rows),
+                batch_size=5000,
+            )
+        """
+        fields = cls._meta.concrete_fields
+        size = _batch_size(cls, fields, batch_size)
+        count = 0
+        for chunk in _chunked(rows, size):
+            objs = [_as_instance(cls, row) for row in chunk]
+            cls.objects.bulk_create(
+                objs, batch_size=size, ignore_conflicts=ignore_conflicts
+            )
+            count += len(objs)
+        return count
+
+    @classmethod
+    def update_many(cls, objects, fields, batch_size=None):
+        """
+        Save changed `fields` of many instances with batched UPDATEs
+
+        Unlike update(where, data), every instance can carry its own values.
+        Returns the number of rows updated.
+
+        Example:
+            for post in posts:
+                post.views += 1
+            Post.update_many(posts, ["views"])
+        """
+        model_fields = [cls._meta.get_field(name) for name in fields]
+        # bulk_update binds pk + one CASE per field for every row
+        size = _batch_size(cls, model_fields + [cls._meta.pk], batch_size)
+        count = 0
+        for chunk in _chunked(objects, size):
+            updated = cls.objects.bulk_update(chunk, fields, batch_size=size)
+            count += len(chunk) if updated is None else updated
+        return count
+
+    @classmethod
+    def upsert_many(cls, rows, conflict_fields, update_fields, batch_size=None):
+        """
+        Insert rows, updating `update_fields` when `conflict_fields` collide
+
+        Uses INSERT ... ON CONFLICT DO UPDATE (ON DUPLICATE KEY UPDATE on
+        MySQL) through bulk_create(update_conflicts=True). Requires Django 4.1+.
+        Returns the number of rows sent.
+
+        Example:
+            Category.upsert_many(
+                [{"slug": "news", "name": "News"}],
+                conflict_fields=["slug"],
+                update_fields=["name"],
+            )
+        """
+        if django.VERSION < (4, 1):
+            raise ImproperlyConfigured(
+                "upsert_many requires Django 4.1 or newer (installed: %s)"
+                % django.get_version()
+            )
+
+        alias = router.db_for_write(cls)
+        unique_fields = conflict_fields
+        if not connections[alias].features.supports_update_conflicts_with_target:
+            # MySQL resolves conflicts on any unique key and rejects a target
+            unique_fields = None
+
+        fields = cls._meta.concrete_fields
+        size = _batch_size(cls, fields, batch_size)
+        count = 0
+        for chunk in _chunked(rows, size):
+            objs = [_as_instance(cls, row) for row in chunk]
+            cls.objects.bulk_create(
+                objs,
+                batch_size=size,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields,
+            )
+            count += len(objs)
+        return count
+
     @classmethod
     def update(cls, where, data):
         """Update records (Prisma-like)"""
@@ -45,11 +606,13 @@ class Model(models.Model):
         return cls.objects.filter(**filters).delete()
 
     @classmethod
-    def count(cls, **filters):
+    def count(cls, cache=None, **filters):
         """Count records (Prisma-like)"""
-        if filters:
-            return cls.objects.filter(**filters).count()
-        return cls.objects.count()
+        queryset = cls.objects.filter(**filters) if filters else cls.objects.all()
+        ttl = querycache.resolve_ttl(cls, cache)
+        if ttl:
+            return querycache.cached(cls, ttl, "count", queryset, queryset.count)
+        return queryset.count()
 
     def update_self(self, **data):
         """Update current instance"""
@@ -63,6 +626,15 @@ class Model(models.Model):
         self.delete()
 
 
+def _track_shanks_models(sender, **kwargs):
+    """Invalidate query cache entries of every concrete Shanks model on writes"""
+    if issubclass(sender, Model) and not sender._meta.abstract:
+        querycache.track_model(sender)
+
+
+class_prepared.connect(_track_shanks_models)
+
+
 # Field types
 CharField = models.CharField
 TextField = models.TextField
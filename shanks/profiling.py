@@ -0,0 +1,329 @@
+"""Sampling request profiler for Shanks Django"""
+
+import cProfile
+import hashlib
+import hmac
+import itertools
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from io import StringIO
+from typing import Dict, Optional, Tuple
+
+PROFILE_HEADER = "X-Shanks-Profile"
+
+MODES = ("cprofile", "sample")
+
+# From Python 3.12 cProfile hooks every thread through sys.monitoring
+DEFAULT_MODE = "sample" if sys.version_info >= (3, 12) else "cprofile"
+
+
+def _signature(secret: str, expires: str) -> str:
+    return hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+
+
+def sign(secret: str, ttl: float = 300) -> str:
+    """
+    Header value that makes the Profiler profile a request
+
+    It is valid for `ttl` seconds, so a leaked value soon stops working.
+
+    Example:
+        curl -H "X-Shanks-Profile: $(python -c 'from shanks.profiling import
+            sign; print(sign(SECRET))')" https://api.example.com/api/posts
+    """
+    expires = str(int(time.time() + ttl))
+    return f"{expires}.{_signature(secret, expires)}"
+
+
+def verify(secret: str, value: str) -> bool:
+    """Whether `value` was made by sign(secret) and has not expired"""
+    expires, _, digest = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(digest, _signature(secret, expires))
+
+
+class RouteProfile:
+    """Profiles of one (route, method), merged"""
+
+    __slots__ = ("requests", "stats", "stacks")
+
+    def __init__(self):
+        self.requests = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.stacks: Counter = Counter()
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack every `interval` seconds"""
+
+    def __init__(self, ident: int, interval: float):
+        super().__init__(name="shanks-profiler", daemon=True)
+        self.target = ident
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+def _slug(route: str, method: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", f"{method} {route}").strip("_") or "root"
+
+
+class Profiler:
+    """
+    Profile a sample of production requests, aggregated per route
+
+    Installed with app.use(); the view pipeline profiles 1 in `every`
+    requests, plus any request carrying a header made by sign(secret).
+    Other requests pay one counter increment.
+
+    Modes:
+        "cprofile": deterministic cProfile; served as pstats text or a
+            binary .prof file (snakeviz, pstats.Stats)
+        "sample": a thread samples the request's stack every `interval`
+            seconds; much lower overhead, served as flamegraph "collapsed"
+            stacks (flamegraph.pl, speedscope)
+
+    The default is "sample" on Python 3.12+ and "cprofile" before. Only the
+    request's own thread is profiled, except by "cprofile" on 3.12+: there
+    it records every thread, so a profile also holds the calls of requests
+    running alongside it, and a request that starts while another is being
+    profiled is skipped. The body of an async handler, which runs on the
+    event loop thread, shows up as a wait.
+
+    The endpoint (GET /_profile) lists the profiled routes as JSON;
+    `?route=<template>&method=GET&format=text|pstats|collapsed` returns
+    one profile. It requires `token` ('Authorization: Bearer <token>') and
+    without one is only served when DEBUG is on. With `dump_dir`, each
+    route's profile is also written there after every profiled request.
+
+    Args:
+        every: Profile 1 in `every` requests (0: only signed requests)
+        secret: Key for signed profiling requests (see sign())
+        mode: "cprofile" or "sample" (default: see above)
+        interval: Sampling interval of the "sample" mode, in seconds
+        path: Route of the endpoint (None to not add one)
+        token: Bearer token required by the endpoint
+        dump_dir: Directory to write <route>.<pid>.prof/.collapsed files to
+        header: Request header carrying the signature
+
+    Example:
+        from shanks import App, Profiler
+
+        app = App()
+        app.use(Profiler(every=1000, secret=env("PROFILE_SECRET"),
+                         token=env("PROFILE_TOKEN")))
+    """
+
+    # Recognized by App.use(): profiling is done by the view pipeline itself
+    _shanks_profiler = True
+
+    def __init__(
+        self,
+        every: int = 1000,
+        secret: Optional[str] = None,
+        mode: Optional[str] = None,
+        interval: float = 0.005,
+        path: Optional[str] = "_profile",
+        token: Optional[str] = None,
+        dump_dir: Optional[str] = None,
+        header: str = PROFILE_HEADER,
+    ):
+        if mode is None:
+            mode = DEFAULT_MODE
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.every = every
+        self.secret = secret
+        self.mode = mode
+        self.interval = interval
+        self.path = path.strip("/") if path else path
+        self.token = token
+        self.dump_dir = dump_dir
+        self.header = header
+        self._counter = itertools.count(1)
+        self._profiles: Dict[Tuple[str, str], RouteProfile] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def should_profile(self, request) -> bool:
+        """Whether this request is in the sample"""
+        if self.secret is not None:
+            value = request.headers.get(self.header)
+            if value and verify(self.secret, value):
+                return True
+        return self.every > 0 and next(self._counter) % self.every == 0
+
+    @contextmanager
+    def profile(self, route: str, method: str):
+        """Profile the block and add the result to the route's profile"""
+        if getattr(self._local, "active", False):
+            # Already profiling this thread (a view calling another view)
+            yield
+            return
+        self._local.active = True
+        try:
+            if self.mode == "sample":
+                sampler = _StackSampler(threading.get_ident(), self.interval)
+                sampler.start()
+                try:
+                    yield
+                finally:
+                    self._add(route, method, stacks=sampler.stop())
+                return
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another request is being profiled (Python 3.12+)
+                yield
+                return
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._add(route, method, stats=pstats.Stats(profiler))
+        finally:
+            self._local.active = False
+
+    def _add(self, route, method, stats=None, stacks=None):
+        with self._lock:
+            profile = self._profiles.get((route, method))
+            if profile is None:
+                profile = self._profiles[(route, method)] = RouteProfile()
+            profile.requests += 1
+            if stats is not None:
+                if profile.stats is None:
+                    profile.stats = stats
+                else:
+                    profile.stats.add(stats)
+            if stacks:
+                profile.stacks.update(stacks)
+            if self.dump_dir is not None:
+                self._dump(route, method, profile)
+
+    def _dump(self, route, method, profile):
+        os.makedirs(self.dump_dir, exist_ok=True)
+        base = os.path.join(self.dump_dir, f"{_slug(route, method)}.{os.getpid()}")
+        if profile.stats is not None:
+            profile.stats.dump_stats(base + ".prof")
+        if profile.stacks:
+            tmp = f"{base}.collapsed.tmp"
+            with open(tmp, "w") as f:
+                f.write(self._collapsed(profile))
+            os.replace(tmp, base + ".collapsed")
+
+    def routes(self):
+        """Profiled routes with their number of profiled requests"""
+        with self._lock:
+            return [
+                {"route": route, "method": method, "requests": profile.requests}
+                for (route, method), profile in sorted(self._profiles.items())
+            ]
+
+    def get(self, route: str, method: str = "GET") -> Optional[RouteProfile]:
+        return self._profiles.get((route, method))
+
+    def text(self, route: str, method: str = "GET", sort="cumulative", limit=50):
+        """pstats report of a route ("cprofile" mode)"""
+        profile = self.get(route, method)
+        if profile is None or profile.stats is None:
+            return None
+        out = StringIO()
+        with self._lock:
+            profile.stats.stream = out
+            profile.stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def pstats(self, route: str, method: str = "GET") -> Optional[bytes]:
+        """Binary pstats data of a route, as written by dump_stats()"""
+        profile = self.get(route, method)
+        if profile is None or profile.stats is None:
+            return None
+        with self._lock:
+            return marshal.dumps(profile.stats.stats)
+
+    @staticmethod
+    def _collapsed(profile) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in profile.stacks.items())
+
+    def collapsed(self, route: str, method: str = "GET") -> Optional[str]:
+        """Flamegraph collapsed stacks of a route ("sample" mode)"""
+        profile = self.get(route, method)
+        if profile is None or not profile.stacks:
+            return None
+        with self._lock:
+            return self._collapsed(profile)
+
+    def reset(self):
+        """Drop every profile collected so far"""
+        with self._lock:
+            self._profiles.clear()
+
+    def view(self, request):
+        """Django view serving the profiles"""
+        from django.conf import settings
+        from django.http import HttpResponse, JsonResponse
+
+        if self.token is not None:
+            supplied = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied, f"Bearer {self.token}"):
+                return HttpResponse("Unauthorized", status=401)
+        elif not settings.DEBUG:
+            return HttpResponse("Profiler endpoint needs a token", status=403)
+
+        route = request.GET.get("route")
+        if route is None:
+            return JsonResponse({"mode": self.mode, "routes": self.routes()})
+        method = request.GET.get("method", "GET").upper()
+        output = request.GET.get("format", "text")
+        if output == "pstats":
+            data = self.pstats(route, method)
+            content_type = "application/octet-stream"
+        elif output == "collapsed":
+            data = self.collapsed(route, method)
+            content_type = "text/plain; charset=utf-8"
+        elif output == "text":
+            sort = request.GET.get("sort", "cumulative")
+            if sort not in pstats.Stats.sort_arg_dict_default:
+                return JsonResponse({"error": f"Unknown sort key: {sort}"}, status=400)
+            data = self.text(route, method, sort=sort)
+            content_type = "text/plain; charset=utf-8"
+        else:
+            return JsonResponse({"error": f"Unknown format: {output}"}, status=400)
+        if data is None:
+            message = f"No {output} profile for {method} {route}"
+            return JsonResponse({"error": message}, status=404)
+        response = HttpResponse(data, content_type=content_type)
+        if output == "pstats":
+            filename = f"{_slug(route, method)}.prof"
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+__all__ = ["PROFILE_HEADER", "Profiler", "RouteProfile", "sign", "verify"]
@@ -0,0 +1,150 @@
+"""Query result cache for Model read methods with model-level invalidation"""
+
+import copy
+import hashlib
+import os
+
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .cache import get_cache
+
+# TTL used by cache=True / Meta.shanks_cache = True
+DEFAULT_TTL = 60
+
+# Generations outlive cached results by a wide margin
+GENERATION_TTL = 86400
+
+stats = {"hits": 0, "misses": 0}
+
+
+def _label(model):
+    return model._meta.concrete_model._meta.label_lower
+
+
+def _generation_key(model):
+    return f"shanks:orm:gen:{_label(model)}"
+
+
+def generation(model) -> str:
+    """Current generation token of a model (changes on every write)"""
+    backend = get_cache()
+    key = _generation_key(model)
+    value = backend.get(key)
+    if value is None:
+        value = os.urandom(6).hex()
+        backend.set(key, value, ttl=GENERATION_TTL)
+    return value
+
+
+def bump_generation(model):
+    """
+    Invalidate every cached read of a model
+
+    A fresh random token is written instead of incrementing a counter, so
+    concurrent writers never need a read-modify-write round trip.
+    """
+    get_cache().set(_generation_key(model), os.urandom(6).hex(), ttl=GENERATION_TTL)
+
+
+def invalidate(model, using=None):
+    """
+    Bump a model's generation after a write on connection `using`
+
+    Inside a transaction the generation is bumped again on commit: a reader
+    on another connection may cache the pre-commit rows under the first
+    bump, and only a later one evicts them.
+    """
+    bump_generation(model)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: bump_generation(model), using=using)
+
+
+def _on_write(sender, using=None, **kwargs):
+    invalidate(sender, using)
+
+
+def track_model(model):
+    """Bump the model's generation on post_save / post_delete (and on commit)"""
+    uid = f"shanks.querycache:{model._meta.label_lower}"
+    post_save.connect(_on_write, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(_on_write, sender=model, weak=False, dispatch_uid=uid)
+
+
+def resolve_ttl(model, cache):
+    """
+    TTL for a read: the per-call `cache=` argument wins over Meta.shanks_cache
+
+    None/False disable caching, True uses DEFAULT_TTL, a number is seconds.
+    """
+    if cache is None:
+        cache = getattr(model._meta, "shanks_cache", None)
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return DEFAULT_TTL
+    return cache
+
+
+def query_key(model, kind, queryset, extra=()):
+    """
+    Cache key from the compiled SQL and parameters of a queryset
+
+    Equivalent filters written in a different order share a key, and the
+    model generation is part of the key so writes orphan old entries.
+    Returns None for querysets that can't match anything.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    raw = f"{kind}|{sql}|{params!r}|{extra!r}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"shanks:orm:{_label(model)}:{generation(model)}:{digest}"
+
+
+def _detach(value):
+    """Shallow copies, so callers can't mutate what is stored in the cache"""
+    if isinstance(value, list):
+        return [copy.copy(item) for item in value]
+    if hasattr(value, "next_cursor"):
+        page = copy.copy(value)
+        page.items = _detach(value.items)
+        return page
+    return copy.copy(value)
+
+
+def cached(model, ttl, kind, queryset, compute, extra=()):
+    """
+    Return compute() through the cache backend when `ttl` is set
+
+    Example:
+        cached(Post, 60, "count", qs, qs.count)
+    """
+    key = query_key(model, kind, queryset, extra) if ttl else None
+    if key is None:
+        return compute()
+
+    backend = get_cache()
+    hit = backend.get(key)
+    if hit is not None:
+        stats["hits"] += 1
+        return _detach(hit[0])
+
+    stats["misses"] += 1
+    value = compute()
+    # Wrapped in a tuple so a cached None is distinguishable from a miss
+    backend.set(key, (value,), ttl=ttl)
+    return _detach(value)
+
+
+__all__ = [
+    "DEFAULT_TTL",
+    "bump_generation",
+    "invalidate",
+    "cached",
+    "generation",
+    "resolve_ttl",
+    "track_model",
+]
@@ -0,0 +1,323 @@
+"""Rate limiting middleware for Shanks Django"""
+
+import logging
+import math
+import time
+from typing import Callable, Iterable, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger("shanks.ratelimit")
+
+KeyLike = Union[str, Tuple[str, ...], Callable]
+
+
+class Decision(NamedTuple):
+    """Outcome of one rate limit check"""
+
+    allowed: bool
+    remaining: int
+    reset: float  # seconds until the bucket is full again
+    retry_after: float  # seconds until the next request is allowed
+
+
+def _decide(now, tat, interval, capacity):
+    """
+    Token bucket as GCRA: the whole bucket state is one timestamp
+
+    `tat` (theoretical arrival time) is when the bucket would be full again.
+    Each request pushes it `interval` seconds further; a request is
+    rejected when that would put it more than `capacity` intervals ahead.
+    Returns (decision, new_tat or None when rejected).
+    """
+    tat = max(tat, now)
+    new_tat = tat + interval
+    allow_at = new_tat - capacity * interval
+    if now < allow_at:
+        return Decision(False, 0, tat - now, allow_at - now), None
+    remaining = int((now - allow_at) / interval + 1e-9)
+    return Decision(True, remaining, new_tat - now, 0.0), new_tat
+
+
+class MemoryBackend:
+    """
+    In-process buckets, one float per key
+
+    Checks take no lock: the read and write of a key's timestamp are single
+    dict operations, so concurrent threads can at worst let a request or
+    two through over the limit, never corrupt the state. Expired keys (and
+    then the oldest ones) are pruned once the table grows past `max_keys`.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats = {}
+
+    def hit(self, key, interval, capacity) -> Decision:
+        now = time.monotonic()
+        decision, new_tat = _decide(now, self._tats.get(key, now), interval, capacity)
+        if new_tat is not None:
+            self._tats[key] = new_tat
+            if len(self._tats) > self.max_keys:
+                self._prune(now)
+        return decision
+
+    def _prune(self, now):
+        tats = self._tats
+        for key, tat in list(tats.items()):
+            if tat <= now:
+                tats.pop(key, None)
+        # Still full: forget the least recently inserted keys, leaving
+        # headroom so pruning doesn't run again on the next request
+        excess = len(tats) - int(self.max_keys * 0.9)
+        if excess > 0:
+            for key in list(tats)[:excess]:
+                tats.pop(key, None)
+
+    def reset(self):
+        self._tats.clear()
+
+
+# GCRA in one atomic script. Redis' own clock is used so app servers with
+# skewed clocks share the same buckets; numbers are returned as strings
+# because Lua numbers are truncated to integers in replies.
+_GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - capacity * interval
+if now < allow_at then
+    return {0, tostring(tat - now), tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat - now), '0'}
+"""
+
+
+class RedisBackend:
+    """
+    Cluster-wide buckets in Redis, checked with one atomic Lua script
+
+    Uses Redis.get_client() unless a client is given. When Redis is
+    unreachable requests are allowed (and logged) instead of failing.
+
+    Example:
+        from shanks import RateLimit
+        from shanks.db import Redis
+
+        Redis.connect(host="localhost")
+        app.use(RateLimit(limit=100, period=60, backend="redis"))
+    """
+
+    def __init__(self, client=None, prefix: str = "shanks:ratelimit:"):
+        self.prefix = prefix
+        self._client = client
+        self._script = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from .db import Redis
+
+            self._client = Redis.get_client()
+        return self._client
+
+    def hit(self, key, interval, capacity) -> Decision:
+        from redis.exceptions import RedisError
+
+        if self._script is None:
+            self._script = self.client.register_script(_GCRA_SCRIPT)
+        try:
+            allowed, reset, retry_after = self._script(
+                keys=[self.prefix + key], args=[interval, capacity]
+            )
+        except RedisError as exc:
+            logger.warning("Rate limit check failed, allowing request: %s", exc)
+            return Decision(True, capacity, 0.0, 0.0)
+        reset, retry_after = float(reset), float(retry_after)
+        if not int(allowed):
+            return Decision(False, 0, reset, retry_after)
+        remaining = int(capacity - reset / interval + 1e-9)
+        return Decision(True, remaining, reset, 0.0)
+
+
+def _client_ip(req, trust_proxy):
+    meta = req.django.META
+    if trust_proxy:
+        forwarded = meta.get("HTTP_X_FORWARDED_FOR")
+        if forwarded:
+            # Each trusted proxy appends the address it saw; anything left of
+            # those entries came from the client and may be spoofed
+            hops = forwarded.split(",")
+            if len(hops) >= trust_proxy:
+                return hops[-trust_proxy].strip()
+    return meta.get("REMOTE_ADDR", "")
+
+
+def _user_or_ip(req, trust_proxy):
+    """Authenticated user id (req.user_id or Django's request.user), else ip"""
+    user_id = req.state.get("user_id")
+    if user_id is None:
+        user = getattr(req.django, "user", None)
+        if user is not None and user.is_authenticated:
+            user_id = user.pk
+    if user_id is None:
+        return _client_ip(req, trust_proxy)
+    return f"user:{user_id}"
+
+
+class RateLimit:
+    """
+    Rate limiting middleware (token bucket)
+
+    Allows `limit` requests per `period` seconds per key, with bursts of up
+    to `burst` requests (default: `limit`). Responses carry RateLimit-Limit,
+    RateLimit-Remaining, RateLimit-Reset and RateLimit-Policy headers;
+    rejected requests get 429 with Retry-After.
+
+    App.use() runs the limiter ahead of the response cache, so cached
+    responses are limited too and never carry another client's headers.
+
+    Args:
+        limit: Requests allowed per period
+        period: Window in seconds
+        burst: Bucket size (defaults to limit)
+        key: 'ip', 'user' (falls back to ip), 'route', a tuple of those, or
+            a callable taking req and returning a string
+        backend: 'memory', 'redis' or a backend instance
+        routes: Only limit these routes (route templates, matched on the
+            full route or its trailing segments, e.g. 'login')
+        methods: Only limit these HTTP methods
+        trust_proxy: Number of reverse proxies in front of the app (True
+            means one). The client ip is the X-Forwarded-For entry appended
+            by the outermost of them, counted from the right
+        name: Bucket namespace, so several limiters can share a backend
+
+    Example:
+        from shanks import App, RateLimit
+
+        app = App()
+        app.use(RateLimit(limit=100, period=60))
+
+        # Strict limit for expensive endpoints, per client and route
+        app.use(RateLimit(
+            limit=5, period=60, key=("ip", "route"), routes=["auth/login"]
+        ))
+    """
+
+    # Recognized by App.use(): placed ahead of the response cache
+    _shanks_rate_limit = True
+
+    def __init__(
+        self,
+        limit: int = 100,
+        period: float = 60,
+        burst: Optional[int] = None,
+        key: KeyLike = "ip",
+        backend="memory",
+        routes: Optional[Iterable[str]] = None,
+        methods: Optional[Iterable[str]] = None,
+        trust_proxy: Union[bool, int] = False,
+        name: Optional[str] = None,
+    ):
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit and period must be positive")
+        self.limit = limit
+        self.period = period
+        self.capacity = burst or limit
+        self.interval = period / limit
+        if trust_proxy < 0:
+            raise ValueError("trust_proxy must be a number of proxies")
+        self.trust_proxy = int(trust_proxy)
+        self.name = name or f"{limit}/{period:g}"
+        self.routes = None if routes is None else tuple(r.strip("/") for r in routes)
+        self.methods = None if methods is None else {m.upper() for m in methods}
+        self.backend = self._backend(backend)
+        self._key = self._key_function(key)
+        self._matches = {}
+        self._policy = f"{limit};w={period:g}"
+        if self.capacity != limit:
+            self._policy += f";burst={self.capacity}"
+
+    @staticmethod
+    def _backend(backend):
+        if backend == "memory":
+            return MemoryBackend()
+        if backend == "redis":
+            return RedisBackend()
+        if isinstance(backend, str):
+            raise ValueError(
+                f"Unknown rate limit backend '{backend}', expected 'memory' or 'redis'"
+            )
+        return backend
+
+    def _key_function(self, key):
+        if callable(key):
+            return key
+        parts = (key,) if isinstance(key, str) else tuple(key)
+        getters = {
+            "ip": lambda req: _client_ip(req, self.trust_proxy),
+            "user": lambda req: _user_or_ip(req, self.trust_proxy),
+            "route": lambda req: req.route or req.path,
+        }
+        unknown = [part for part in parts if part not in getters]
+        if unknown:
+            raise ValueError(f"Unknown rate limit key: {', '.join(unknown)}")
+        selected = [getters[part] for part in parts]
+        if len(selected) == 1:
+            return selected[0]
+        return lambda req: "|".join(str(getter(req)) for getter in selected)
+
+    def _applies(self, req):
+        if self.methods is not None and req.method not in self.methods:
+            return False
+        if self.routes is None:
+            return True
+        route = req.route or req.path.strip("/")
+        matched = self._matches.get(route)
+        if matched is None:
+            if len(self._matches) >= 1024:
+                self._matches.clear()
+            matched = self._matches[route] = any(
+                route == r or route.endswith("/" + r) for r in self.routes
+            )
+        return matched
+
+    def check(self, req) -> Decision:
+        """Consume one token for this request's key"""
+        return self.backend.hit(
+            f"{self.name}:{self._key(req)}", self.interval, self.capacity
+        )
+
+    def headers(self, decision: Decision):
+        """RateLimit-* headers for a decision"""
+        headers = {
+            "RateLimit-Limit": str(self.capacity),
+            "RateLimit-Remaining": str(decision.remaining),
+            "RateLimit-Reset": str(math.ceil(decision.reset)),
+            "RateLimit-Policy": self._policy,
+        }
+        if not decision.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+        return headers
+
+    def __call__(self, req, res, next):
+        if not self._applies(req):
+            return next()
+        decision = self.check(req)
+        if not decision.allowed:
+            from .response import Response
+
+            response = Response({"error": "Too many requests"}, status=429)
+            for name, value in self.headers(decision).items():
+                response.header(name, value)
+            return response
+        from .response import _decorate
+
+        return _decorate(next(), self.headers(decision), replace=False)
+
+
+__all__ = ["Decision", "MemoryBackend", "RateLimit", "RedisBackend"]
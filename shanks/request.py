@@ -1,38 +1,165 @@
 import json
 
+from .codecs import codecs
+
+_UNSET = object()
+
+
+class RequestState:
+    """
+    Per-request storage for middleware and extensions
+
+    Created lazily on first access to ``req.state``, so requests that never
+    store anything don't pay for it.
+
+    Example:
+        def auth_middleware(req, res, next):
+            req.state.user_id = 42
+            return next()
+
+        @app.get("api/me")
+        def me(req):
+            return {"user_id": req.state.user_id}
+    """
+
+    def get(self, name, default=None):
+        """Get a value, or default if it was never set"""
+        return self.__dict__.get(name, default)
+
+    def __contains__(self, name):
+        return name in self.__dict__
+
+    def __repr__(self):
+        return f"RequestState({self.__dict__!r})"
+
 
 class Request:
     """Express-like request wrapper for Django"""
 
-    def __init__(self, django_request):
-        self._request = django_request
-        self.method = django_request.method
-        self.path = django_request.path
-        self.headers = django_request.headers
-        # Expose Django request for full access
-        self.django = django_request
+    # Everything except the wrapped Django request is materialized lazily
+    __slots__ = (
+        "_request",
+        "_body",
+        "_query",
+        "_params",
+        "_state",
+        "_route",
+        "_deadline",
+    )
+
+    def __init__(self, django_request, params=None, route=None, deadline=None):
+        # Slots are filled through their descriptors: going through
+        # __setattr__ would look up every name on the class first
+        _set_request(self, django_request)
+        _set_route(self, route)
+        _set_deadline(self, deadline)
+        _set_body(self, _UNSET)
+        _set_query(self, None)
+        _set_params(self, params)
+        _set_state(self, None)
+
+    def __getattr__(self, name):
+        # Legacy ad-hoc attributes (e.g. req.user_id = 1) live in req.state
+        if name.startswith("__"):
+            raise AttributeError(name)
+        state = self._state
+        if state is not None and name in state.__dict__:
+            return state.__dict__[name]
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    def __setattr__(self, name, value):
+        if hasattr(Request, name):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.state, name, value)
+
+    def __delattr__(self, name):
+        if hasattr(Request, name):
+            object.__delattr__(self, name)
+        else:
+            delattr(self.state, name)
+
+    @property
+    def django(self):
+        """Underlying Django request (full access)"""
+        return self._request
+
+    @property
+    def method(self):
+        """HTTP method"""
+        return self._request.method
+
+    @property
+    def path(self):
+        """Request path"""
+        return self._request.path
+
+    @property
+    def route(self):
+        """Route template that matched, e.g. 'api/posts/<post_id>'"""
+        return self._route
+
+    @property
+    def deadline(self):
+        """
+        time.monotonic() deadline set by the route timeout, or None
+
+        shanks.deadline.remaining() gives the seconds left.
+        """
+        return self._deadline
+
+    @property
+    def headers(self):
+        """Request headers (case-insensitive)"""
+        return self._request.headers
+
+    @property
+    def state(self):
+        """Per-request storage for middleware and extensions"""
+        state = self._state
+        if state is None:
+            state = self._state = RequestState()
+        return state
 
     @property
     def body(self):
-        """Get parsed request body"""
-        if self._request.content_type == "application/json":
+        """Get parsed request body (JSON, MessagePack, CBOR or form data)"""
+        if self._body is _UNSET:
+            self._body = self._parse_body()
+        return self._body
+
+    def _parse_body(self):
+        content_type = self._request.content_type
+        if content_type == "application/json":
             try:
                 return json.loads(self._request.body)
             except (json.JSONDecodeError, ValueError, UnicodeDecodeError) as e:
                 # Return empty dict for invalid JSON, but could also raise error
                 # depending on desired behavior
                 return {}
+        codec = codecs.get(content_type)
+        if codec is not None:
+            try:
+                return codec.decode(self._request.body)
+            except (ValueError, TypeError):
+                return {}
         return self._request.POST.dict()
 
     @property
     def query(self):
         """Get query parameters"""
-        return self._request.GET.dict()
+        if self._query is None:
+            self._query = self._request.GET.dict()
+        return self._query
 
     @property
     def params(self):
         """Get URL parameters (set by router)"""
-        return getattr(self, "_params", {})
+        if self._params is None:
+            self._params = {}
+        return self._params
 
     def get(self, key, default=None):
         """Get value from query, body, or params"""
@@ -69,3 +196,12 @@ class Request:
     def META(self):
         """Get request META"""
         return self._request.META
+
+
+_set_request = Request._request.__set__
+_set_body = Request._body.__set__
+_set_query = Request._query.__set__
+_set_params = Request._params.__set__
+_set_state = Request._state.__set__
+_set_route = Request._route.__set__
+_set_deadline = Request._deadline.__set__
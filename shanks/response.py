@@ -1,17 +1,34 @@
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+import copy
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    HttpResponse,
+    HttpResponseBase,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render as django_render
+from django.utils.cache import patch_vary_headers
+
+from .codecs import codecs
 
 
 class Response:
     """Express-like response builder"""
 
+    # Slots keep construction cheap: no per-instance __dict__, and the
+    # header/cookie containers are only allocated when actually used.
+    __slots__ = ("data", "status", "_headers", "_cookies", "_template", "_context")
+
     def __init__(self, data=None, status=200):
         self.data = data
         self.status = status
-        self._headers = {}
-        self._cookies = []
+        self._headers = None
+        self._cookies = None
         self._template = None
-        self._context = {}
+        self._context = None
 
     def json(self, data):
         """Send JSON response"""
@@ -25,11 +42,15 @@ class Response:
 
     def header(self, key, value):
         """Set response header"""
+        if self._headers is None:
+            self._headers = {}
         self._headers[key] = value
         return self
 
     def cookie(self, key, value, **options):
         """Set cookie"""
+        if self._cookies is None:
+            self._cookies = []
         self._cookies.append((key, value, options))
         return self
 
@@ -46,8 +67,15 @@ class Response:
         self._context["request"] = request
         return self
 
-    def to_django_response(self, request=None):
-        """Convert to Django response"""
+    def to_django_response(self, request=None, headers=None):
+        """
+        Convert to Django response
+
+        Args:
+            request: Django request (used for templates and Accept negotiation)
+            headers: Optional precompiled HeaderBlock applied in one step;
+                headers set with .header() take precedence over it
+        """
         # Handle redirect
         if self._template == "redirect":
             response = HttpResponseRedirect(self.data)
@@ -55,19 +83,203 @@ class Response:
         elif self._template and self._template != "redirect":
             response = django_render(request, self._template, self._context)
             response.status_code = self.status
-        # Handle JSON
+        # Handle JSON (or MessagePack/CBOR when the client asks for it)
         elif isinstance(self.data, dict):
-            response = JsonResponse(self.data, status=self.status)
+            response = self._encode(request)
         # Handle plain text/HTML
         else:
             response = HttpResponse(self.data, status=self.status)
 
         # Set headers
-        for key, value in self._headers.items():
-            response[key] = value
+        if self._headers:
+            for key, value in self._headers.items():
+                response[key] = value
+
+        # Apply static header block
+        if headers:
+            headers.apply(response)
 
         # Set cookies
-        for key, value, options in self._cookies:
-            response.set_cookie(key, value, **options)
+        if self._cookies:
+            for key, value, options in self._cookies:
+                response.set_cookie(key, value, **options)
 
         return response
+
+    def _encode(self, request):
+        """Encode data with the codec negotiated from the Accept header"""
+        accept = request.META.get("HTTP_ACCEPT") if request is not None else None
+        codec = codecs.negotiate(accept)
+        if codec is codecs.default:
+            response = JsonResponse(self.data, status=self.status)
+        else:
+            response = HttpResponse(
+                codec.encode(self.data),
+                content_type=codec.media_type,
+                status=self.status,
+            )
+        if codecs.negotiable:
+            patch_vary_headers(response, ("Accept",))
+        return response
+
+
+def _decorate(result, headers=None, cookies=(), replace=True):
+    """
+    Add headers and cookies to whatever a handler returned
+
+    Dicts are wrapped in a Response. A handler's Response is copied first:
+    the response cache may hold the same object, and it must not pick up
+    per-request headers or cookies.
+
+    Args:
+        headers: Mapping of header names to values
+        cookies: Iterable of (key, value, options) tuples
+        replace: Overwrite headers the handler already set
+    """
+    if isinstance(result, dict):
+        result = Response(result)
+    elif isinstance(result, Response):
+        result = copy.copy(result)
+        result._headers = dict(result._headers) if result._headers else None
+        result._cookies = list(result._cookies) if result._cookies else None
+    if isinstance(result, Response):
+        for name, value in (headers or {}).items():
+            if replace or not (result._headers and name in result._headers):
+                result.header(name, value)
+        for key, value, options in cookies:
+            result.cookie(key, value, **options)
+    elif isinstance(result, HttpResponseBase):
+        for name, value in (headers or {}).items():
+            if replace or name not in result:
+                result[name] = value
+        for key, value, options in cookies:
+            result.set_cookie(key, value, **options)
+    return result
+
+
+STREAM_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+    "csv": "text/csv",
+}
+
+# Rows joined into one chunk before it is handed to the server
+_ROWS_PER_CHUNK = 100
+
+
+class _Echo:
+    """File-like object for csv.writer that returns the line instead"""
+
+    def write(self, value):
+        return value
+
+
+class _NDJSONWriter:
+    def __init__(self):
+        self._encode = DjangoJSONEncoder().encode
+
+    def row(self, row):
+        return self._encode(row) + "\n"
+
+    def close(self):
+        return ""
+
+
+class _JSONArrayWriter:
+    def __init__(self):
+        self._encode = DjangoJSONEncoder().encode
+        self._separator = "["
+
+    def row(self, row):
+        line = self._separator + self._encode(row)
+        self._separator = ","
+        return line
+
+    def close(self):
+        return "[]" if self._separator == "[" else "]"
+
+
+class _CSVWriter:
+    def __init__(self):
+        self._writer = csv.writer(_Echo())
+        self._header = None
+
+    def row(self, row):
+        if not isinstance(row, dict):
+            return self._writer.writerow(row)
+        line = ""
+        if self._header is None:
+            self._header = list(row)
+            line = self._writer.writerow(self._header)
+        return line + self._writer.writerow([row.get(key) for key in self._header])
+
+    def close(self):
+        return ""
+
+
+_STREAM_WRITERS = {"ndjson": _NDJSONWriter, "json": _JSONArrayWriter, "csv": _CSVWriter}
+
+
+def _chunks(rows, writer):
+    buffer = []
+    for row in rows:
+        buffer.append(writer.row(row))
+        if len(buffer) >= _ROWS_PER_CHUNK:
+            yield "".join(buffer)
+            buffer = []
+    buffer.append(writer.close())
+    chunk = "".join(buffer)
+    if chunk:
+        yield chunk
+
+
+async def _achunks(rows, writer):
+    buffer = []
+    async for row in rows:
+        buffer.append(writer.row(row))
+        if len(buffer) >= _ROWS_PER_CHUNK:
+            yield "".join(buffer)
+            buffer = []
+    buffer.append(writer.close())
+    chunk = "".join(buffer)
+    if chunk:
+        yield chunk
+
+
+def stream_response(rows, format="ndjson", filename=None, status=200):
+    """
+    Stream an iterable of rows without building the whole body in memory
+
+    Pair it with Model.iterate_all() / find_many(...).stream() for exports
+    that run in constant memory.
+
+    Args:
+        rows: Iterable or async iterable of dicts (or tuples/lists for csv)
+        format: 'ndjson', 'json' (a JSON array) or 'csv'
+        filename: Send as an attachment with this filename
+        status: HTTP status code
+
+    Example:
+        @app.get("api/posts/export")
+        def export_posts(req):
+            rows = Post.find_many(select=["id", "title"]).stream(chunk_size=1000)
+            return stream_response(rows, format="csv", filename="posts.csv")
+    """
+    if format not in _STREAM_WRITERS:
+        raise ValueError(
+            f"Unknown stream format '{format}', expected one of: "
+            + ", ".join(_STREAM_WRITERS)
+        )
+    writer = _STREAM_WRITERS[format]()
+    if hasattr(rows, "__aiter__"):
+        content = _achunks(rows, writer)
+    else:
+        content = _chunks(rows, writer)
+    response = StreamingHttpResponse(
+        content,
+        content_type=STREAM_CONTENT_TYPES[format],
+        status=status,
+    )
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
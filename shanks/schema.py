@@ -41,9 +41,16 @@ class Schema:
                 meta_attrs["db_table"] = options["table"]
             if "ordering" in options:
                 meta_attrs["ordering"] = options["ordering"]
+            if "cache" in options:
+                meta_attrs["shanks_cache"] = options["cache"]
 
         attrs["Meta"] = type("Meta", (), meta_attrs)
 
+        # QuerySet with .stream(), shared with shanks.orm.Model
+        from .orm import ShanksQuerySet
+
+        attrs["objects"] = ShanksQuerySet.as_manager()
+
         # Convert JSON-like fields to Django fields
         for field_name, field_def in fields.items():
             attrs[field_name] = Schema._create_field(field_def)
@@ -79,7 +86,11 @@ class Schema:
                 return models.ManyToManyField(model, **options)
 
             # Regular field with options
-            field_class = Schema._get_field_by_type(field_type)
+            field_class = Schema._get_field_class_by_type(field_type)
+            if field_class is None:
+                field_class = models.CharField
+            if field_class is models.CharField:
+                options.setdefault("max_length", 255)
             return field_class(**options)
 
         return field_def
@@ -128,6 +139,8 @@ class Schema:
             "boolean": models.BooleanField,
             "date": models.DateTimeField,
             # Additional types
+            "integer": models.IntegerField,
+            "datetime": models.DateTimeField,
             "text": models.TextField,
             "float": models.FloatField,
             "email": models.EmailField,
@@ -137,54 +150,10 @@ class Schema:
         }
         return type_map.get(field_type)
 
-    @staticmethod
-    def _get_field_by_type(field_type):
-        """Get Django field class by type string (legacy)"""
-        type_map = {
-            "string": models.CharField(max_length=255),
-            "text": models.TextField(),
-            "number": models.IntegerField(),
-            "integer": models.IntegerField(),
-            "float": models.FloatField(),
-            "boolean": models.BooleanField(default=False),
-            "date": models.DateTimeField(auto_now_add=True),
-            "datetime": models.DateTimeField(auto_now_add=True),
-            "email": models.EmailField(),
-            "url": models.URLField(),
-            "slug": models.SlugField(),
-            "json": models.JSONField(),
-        }
-        return type_map.get(field_type, models.CharField(max_length=255))
-
     @staticmethod
     def _add_prisma_methods(model_class):
         """Add Prisma-like methods to model"""
 
-        @classmethod
-        def find_many(cls, **filters):
-            return cls.objects.filter(**filters)
-
-        @classmethod
-        def find_first(cls, **filters):
-            return cls.objects.filter(**filters).first()
-
-        @classmethod
-        def find_unique(cls, **filters):
-            try:
-                return cls.objects.get(**filters)
-            except cls.DoesNotExist:
-                return None
-
-        @classmethod
-        def create(cls, **data):
-            return cls.objects.create(**data)
-
-        @classmethod
-        def count(cls, **filters):
-            if filters:
-                return cls.objects.filter(**filters).count()
-            return cls.objects.count()
-
         def update_self(self, **data):
             for key, value in data.items():
                 setattr(self, key, value)
@@ -194,12 +163,29 @@ class Schema:
         def delete_self(self):
             self.delete()
 
+        # Shared with shanks.orm.Model
+        from .orm import Model
+
+        for name in (
+            "find_many",
+            "find_first",
+            "find_unique",
+            "count",
+            "create",
+            "create_many",
+            "update_many",
+            "upsert_many",
+            "loader",
+            "iterate_all",
+        ):
+            setattr(model_class, name, classmethod(getattr(Model, name).__func__))
+
+        # Invalidate cached reads (find_unique(cache=...) etc.) on writes
+        from .querycache import track_model
+
+        track_model(model_class)
+
         # Attach methods
-        model_class.find_many = find_many
-        model_class.find_first = find_first
-        model_class.find_unique = find_unique
-        model_class.create = create
-        model_class.count = count
         model_class.update_self = update_self
         model_class.delete_self = delete_self
 
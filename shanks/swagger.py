@@ -136,7 +136,9 @@ class SwaggerUI:
 
             # Get method from route
             method = "get"  # Default
-            if hasattr(route["view"], "__name__"):
+            if hasattr(route["view"], "_http_method"):
+                method = route["view"]._http_method.lower()
+            elif hasattr(route["view"], "__name__"):
                 view_name = route["view"].__name__.lower()
                 if "post" in view_name:
                     method = "post"
@@ -160,6 +162,19 @@ class SwaggerUI:
 
             if doc.get("requestBody"):
                 spec["paths"][path][method]["requestBody"] = doc["requestBody"]
+            elif getattr(route["view"], "_body_schema", None) is not None:
+                # Route-level body schema (e.g. @app.post(route, body={...}))
+                spec["paths"][path][method]["requestBody"] = {
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": route["view"]._body_schema.to_openapi()
+                        }
+                    },
+                }
+                responses = dict(spec["paths"][path][method]["responses"])
+                responses.setdefault("422", {"description": "Validation failed"})
+                spec["paths"][path][method]["responses"] = responses
 
         return spec
 
@@ -0,0 +1,215 @@
+"""Per-phase request timing (Server-Timing) for Shanks Django"""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Union
+
+logger = logging.getLogger("shanks.timing")
+
+# Timeline of the request being handled, for the DB hook
+_current: ContextVar[Optional["Timeline"]] = ContextVar(
+    "shanks_timing_timeline", default=None
+)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.!#$%&'*+^`|~-]")
+
+
+def phase_name(middleware) -> str:
+    """Server-Timing metric name of a middleware"""
+    name = getattr(middleware, "__name__", None) or type(middleware).__name__
+    return _UNSAFE.sub("_", name)
+
+
+class Timeline:
+    """
+    Exclusive time per phase of one request; also a context manager
+
+    Phases nest like the middleware chain: while a middleware waits on
+    next(), the clock runs for the inner phase, so each phase reports only
+    its own time. Time outside every phase is reported as "app".
+    """
+
+    __slots__ = (
+        "phases",
+        "start",
+        "request",
+        "response",
+        "_timing",
+        "_route",
+        "_method",
+        "_stack",
+        "_last",
+        "_token",
+    )
+
+    def __init__(self, timing, route, method, request=None):
+        self._timing = timing
+        self.request = request
+        self._route = route
+        self._method = method
+        self.phases: Dict[str, float] = {}
+        self.response = None
+
+    def enter(self, name: str):
+        now = time.perf_counter()
+        top = self._stack[-1]
+        self.phases[top] = self.phases.get(top, 0.0) + now - self._last
+        self._stack.append(name)
+        self._last = now
+
+    def exit(self):
+        now = time.perf_counter()
+        top = self._stack.pop()
+        self.phases[top] = self.phases.get(top, 0.0) + now - self._last
+        self._last = now
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._stack = ["app"]
+        self.start = self._last = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        self.phases["app"] = self.phases.get("app", 0.0) + now - self._last
+        _current.reset(self._token)
+        self._timing._report(self, now - self.start, exc_type)
+        return False
+
+
+def _record_query(execute, sql, params, many, context):
+    """execute_wrapper charging query time to the "db" phase"""
+    timeline = _current.get()
+    if timeline is None:
+        return execute(sql, params, many, context)
+    timeline.enter("db")
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timeline.exit()
+
+
+class _Phase:
+    """Charges a block to a phase of the current request's timeline"""
+
+    __slots__ = ("name", "timeline")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timeline = _current.get()
+        self.timeline.enter(self.name)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timeline.exit()
+        return False
+
+
+class ServerTiming:
+    """
+    Per-middleware and per-phase timing of every request
+
+    Installed with app.use(); the view pipeline then times each middleware
+    (auto_cache, smart_cache_invalidation, auth, ...), body validation, the
+    handler, database queries and response serialization
+    (to_django_response plus static/CORS headers). The timed middleware
+    chain is built once per chain; apps without ServerTiming run the plain
+    chain, so the cost when disabled is a few `is None` checks.
+
+    The result is sent as a Server-Timing header (durations in ms, shown by
+    browser dev tools) and logged to the "shanks.timing" logger with the
+    phases in `record.timing`.
+
+    Args:
+        header: Add the Server-Timing header; True, False, a
+            callable(request) -> bool (e.g. only for staff), or None (the
+            default) for only when DEBUG is on, since it reveals internals
+        log: Emit a log record per request
+        log_level: Level of that record
+        track_db: Time database queries as their own "db" phase
+
+    Example:
+        from shanks import App, ServerTiming
+
+        app = App()
+        app.use(ServerTiming(header=lambda req: req.user.is_staff))
+
+        # Server-Timing: auto_cache;dur=0.08, auth;dur=0.31,
+        #   handler;dur=2.40, db;dur=6.12, serialize;dur=0.22,
+        #   app;dur=0.05, total;dur=9.18
+    """
+
+    # Recognized by App.use(): timing is done by the view pipeline itself
+    _server_timing = True
+
+    def __init__(
+        self,
+        header: Union[bool, Callable, None] = None,
+        log: bool = True,
+        log_level: int = logging.INFO,
+        track_db: bool = True,
+    ):
+        self.header = header
+        self.log = log
+        self.log_level = log_level
+        self._chains = {}
+        if track_db:
+            from .app import _track_queries
+
+            _track_queries(_record_query, "shanks.timing.queries")
+
+    def measure(self, route: str, method: str, request=None) -> Timeline:
+        """Context manager timing one request"""
+        return Timeline(self, route, method, request)
+
+    def chain(self, middlewares):
+        """Timed version of a middleware chain, built once per chain"""
+        from .app import _wrap_chain
+
+        return _wrap_chain(self._chains, middlewares, _Phase)
+
+    @staticmethod
+    def header_value(phases: Dict[str, float], total: float) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+    def _report(self, timeline: Timeline, total: float, exc_type):
+        response = timeline.response
+        if response is not None and exc_type is None:
+            header = self.header
+            if header is None:
+                from django.conf import settings
+
+                header = settings.DEBUG
+            elif callable(header):
+                header = header(timeline.request)
+            if header:
+                response["Server-Timing"] = self.header_value(timeline.phases, total)
+
+        if self.log and logger.isEnabledFor(self.log_level):
+            status = 500 if exc_type else getattr(response, "status_code", None)
+            logger.log(
+                self.log_level,
+                "%s %s %s %.2fms",
+                timeline._method,
+                timeline._route,
+                status,
+                total * 1000,
+                extra={
+                    "route": timeline._route,
+                    "method": timeline._method,
+                    "status": status,
+                    "duration_ms": round(total * 1000, 3),
+                    "timing": {
+                        name: round(seconds * 1000, 3)
+                        for name, seconds in timeline.phases.items()
+                    },
+                },
+            )
+
+
+__all__ = ["ServerTiming", "Timeline", "phase_name"]
@@ -0,0 +1,211 @@
+"""OpenTelemetry tracing for Shanks Django"""
+
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Optional
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.propagators.textmap import Getter
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover - exercised without opentelemetry
+    trace = None
+    Getter = object
+
+# Tracer of the request being handled; None outside traced requests
+_tracer: ContextVar[Optional["trace.Tracer"]] = ContextVar(
+    "shanks_tracing_tracer", default=None
+)
+
+_NOOP = nullcontext()
+
+
+def span(name: str, **attributes):
+    """
+    Child span of the current request's span
+
+    A no-op (yielding None) outside traced requests or without
+    opentelemetry, so library code can call it unconditionally.
+
+    Example:
+        from shanks.tracing import span
+
+        with span("render invoice", invoice_id=invoice.id):
+            pdf = render_invoice(invoice)
+    """
+    tracer = _tracer.get()
+    if tracer is None:
+        return _NOOP
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def inject(headers: Optional[dict] = None) -> dict:
+    """
+    Add the W3C traceparent of the current span to outbound headers
+
+    Example:
+        requests.get(URL, headers=inject({"Accept": "application/json"}))
+    """
+    headers = {} if headers is None else headers
+    if trace is not None:
+        propagate.inject(headers)
+    return headers
+
+
+class _MetaGetter(Getter):
+    """Read propagation headers from a Django request.META"""
+
+    def get(self, carrier, key):
+        value = carrier.get("HTTP_" + key.upper().replace("-", "_"))
+        return [value] if value is not None else None
+
+    def keys(self, carrier):
+        return [
+            key[5:].lower().replace("_", "-")
+            for key in carrier
+            if key.startswith("HTTP_")
+        ]
+
+
+_META = _MetaGetter()
+
+
+def _operation(sql: str) -> str:
+    words = sql.split(None, 1)
+    return words[0].upper() if words else "SQL"
+
+
+def _trace_query(execute, sql, params, many, context):
+    """execute_wrapper creating a client span per SQL statement"""
+    tracer = _tracer.get()
+    if tracer is None:
+        return execute(sql, params, many, context)
+    connection = context["connection"]
+    operation = _operation(sql)
+    attributes = {
+        "db.system": connection.vendor,
+        "db.name": str(connection.settings_dict.get("NAME", "")),
+        "db.operation": operation,
+        "db.statement": sql,
+    }
+    with tracer.start_as_current_span(
+        operation, kind=SpanKind.CLIENT, attributes=attributes
+    ):
+        return execute(sql, params, many, context)
+
+
+def _middleware_span(name: str):
+    return _tracer.get().start_as_current_span(f"middleware {name}")
+
+
+class RequestSpan:
+    """Server span of one request; also a context manager"""
+
+    __slots__ = ("response", "_tracing", "_span_cm", "_span", "_token")
+
+    def __init__(self, tracing, request, route, method):
+        self._tracing = tracing
+        self.response = None
+        parent = None
+        if tracing.propagate:
+            parent = propagate.extract(request.META, getter=_META)
+        self._span_cm = tracing.tracer.start_as_current_span(
+            f"{method} {route}",
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": method,
+                "http.route": route,
+                "url.path": request.path,
+            },
+        )
+
+    def __enter__(self):
+        self._span = self._span_cm.__enter__()
+        self._token = _tracer.set(self._tracing.tracer)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _tracer.reset(self._token)
+        status = getattr(self.response, "status_code", None)
+        if status is not None and exc_type is None:
+            self._span.set_attribute("http.response.status_code", status)
+            if status >= 500:
+                self._span.set_status(Status(StatusCode.ERROR))
+        return self._span_cm.__exit__(exc_type, exc, tb)
+
+
+class Tracing:
+    """
+    OpenTelemetry spans for every request
+
+    Installed with app.use(). Each request gets a server span named after
+    its route template ("GET api/posts/<id>"), continuing the caller's
+    trace from the W3C `traceparent` header. Child spans cover every
+    middleware, response cache lookups/stores (auto_cache, @cache) and each
+    SQL statement, including those run by Model.find_*.
+
+    Without opentelemetry installed, app.use(Tracing()) does nothing.
+
+    Args:
+        tracer_provider: TracerProvider to use (default: the global one
+            configured by your exporter setup)
+        propagate: Continue traces from incoming `traceparent` headers
+        track_db: Create a span per SQL statement
+
+    Example:
+        from shanks import App, Tracing
+
+        app = App()
+        app.use(Tracing())
+
+        # In tests
+        tracing = Tracing.in_memory()
+        app.use(tracing)
+        ...
+        names = [s.name for s in tracing.exporter.get_finished_spans()]
+    """
+
+    # Recognized by App.use(): spans are created by the view pipeline itself
+    _shanks_tracing = True
+
+    def __init__(self, tracer_provider=None, propagate: bool = True, track_db=True):
+        self.enabled = trace is not None
+        self.propagate = propagate
+        self.exporter = None
+        self._chains = {}
+        if self.enabled:
+            self.tracer = trace.get_tracer("shanks", tracer_provider=tracer_provider)
+            if track_db:
+                from .app import _track_queries
+
+                _track_queries(_trace_query, "shanks.tracing.queries")
+
+    @classmethod
+    def in_memory(cls, **kwargs) -> "Tracing":
+        """Tracing with its own provider exporting to memory (needs the SDK)"""
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+            InMemorySpanExporter,
+        )
+
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        tracing = cls(tracer_provider=provider, **kwargs)
+        tracing.exporter = exporter
+        return tracing
+
+    def request(self, request, route: str, method: str) -> RequestSpan:
+        """Context manager holding one request's server span"""
+        return RequestSpan(self, request, route, method)
+
+    def chain(self, middlewares):
+        """Traced version of a middleware chain, built once per chain"""
+        from .app import _wrap_chain
+
+        return _wrap_chain(self._chains, middlewares, _middleware_span)
+
+
+__all__ = ["RequestSpan", "Tracing", "inject", "span"]
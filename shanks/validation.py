@@ -0,0 +1,428 @@
+"""Declarative request body validation compiled to fast validators"""
+
+import datetime
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import models
+from django.utils.dateparse import parse_datetime
+
+from .request import _UNSET
+from .response import Response
+
+MISSING = object()
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+URL_RE = re.compile(r"^https?://[^\s/$.?#][^\s]*$", re.IGNORECASE)
+SLUG_RE = re.compile(r"^[-a-zA-Z0-9_]+$")
+
+_TRUE = frozenset(["true", "1", "yes", "on"])
+_FALSE = frozenset(["false", "0", "no", "off"])
+
+# Django field class -> validator kind (subclasses first)
+_FIELD_KINDS = (
+    (models.EmailField, "email"),
+    (models.URLField, "url"),
+    (models.SlugField, "slug"),
+    (models.CharField, "string"),
+    (models.TextField, "string"),
+    (models.BooleanField, "boolean"),
+    (models.IntegerField, "number"),
+    (models.FloatField, "float"),
+    (models.DateTimeField, "datetime"),
+    (models.DateField, "datetime"),
+    (models.JSONField, "json"),
+)
+
+_PATTERNS = {"email": EMAIL_RE, "url": URL_RE, "slug": SLUG_RE}
+
+_OPENAPI_TYPES = {
+    "string": {"type": "string"},
+    "email": {"type": "string", "format": "email"},
+    "url": {"type": "string", "format": "uri"},
+    "slug": {"type": "string", "pattern": SLUG_RE.pattern},
+    "number": {"type": "integer"},
+    "float": {"type": "number"},
+    "boolean": {"type": "boolean"},
+    "datetime": {"type": "string", "format": "date-time"},
+    "json": {},
+}
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+    return MISSING
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return MISSING
+
+
+def _to_float(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return MISSING
+
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            return parsed
+    return MISSING
+
+
+class Field:
+    """A single compiled field rule"""
+
+    __slots__ = (
+        "name",
+        "kind",
+        "max_length",
+        "required",
+        "nullable",
+        "blank",
+        "default",
+    )
+
+    def __init__(self, name, kind, max_length, required, nullable, blank, default):
+        self.name = name
+        self.kind = kind
+        self.max_length = max_length
+        self.required = required
+        self.nullable = nullable
+        self.blank = blank
+        self.default = default
+
+    @classmethod
+    def from_definition(cls, name, definition):
+        """Build a field from the shanks.schema vocabulary ('string:100', ...)"""
+        from .schema import Schema
+
+        explicit = None
+        if isinstance(definition, dict):
+            definition = dict(definition)
+            explicit = definition.pop("required", None)
+        field = Schema._create_field(definition)
+        kind = "string"
+        for field_class, field_kind in _FIELD_KINDS:
+            if isinstance(field, field_class):
+                kind = field_kind
+                break
+
+        default = MISSING
+        if field.has_default():
+            default = field.get_default()
+        required = (
+            explicit
+            if explicit is not None
+            else not (field.blank or field.null or default is not MISSING)
+        )
+        return cls(
+            name=name,
+            kind=kind,
+            max_length=getattr(field, "max_length", None),
+            required=required,
+            nullable=field.null,
+            blank=field.blank,
+            default=None if default is MISSING else default,
+        )
+
+    def to_openapi(self) -> Dict[str, Any]:
+        schema = dict(_OPENAPI_TYPES[self.kind])
+        if self.max_length and self.kind in ("string", "email", "url", "slug"):
+            schema["maxLength"] = self.max_length
+        if self.nullable:
+            schema["nullable"] = True
+        if self.default is not None:
+            schema["default"] = self.default
+        return schema
+
+
+def _field_source(index: int, field: Field) -> List[str]:
+    """Generate the validation code for one field"""
+    key = repr(field.name)
+    lines = [f"value = data.get({key}, MISSING)"]
+
+    # Missing / null handling
+    if field.required:
+        lines += [
+            "if value is MISSING:",
+            f"    errors[{key}] = 'This field is required'",
+        ]
+    else:
+        lines += [
+            "if value is MISSING:",
+            f"    clean[{key}] = defaults[{index}]",
+        ]
+    if field.nullable:
+        lines += ["elif value is None:", f"    clean[{key}] = None"]
+    else:
+        lines += [
+            "elif value is None:",
+            f"    errors[{key}] = 'This field may not be null'",
+        ]
+
+    kind = field.kind
+    if kind in ("string", "email", "url", "slug"):
+        lines += [
+            "elif not isinstance(value, str):",
+            f"    errors[{key}] = 'Expected a string'",
+        ]
+        if field.max_length:
+            lines += [
+                f"elif len(value) > {field.max_length}:",
+                f"    errors[{key}] = "
+                f"'Ensure this value has at most {field.max_length} characters'",
+            ]
+        if field.blank:
+            lines += ["elif not value:", f"    clean[{key}] = value"]
+        else:
+            lines += [
+                "elif not value:",
+                f"    errors[{key}] = 'This field may not be blank'",
+            ]
+        if kind in _PATTERNS:
+            lines += [
+                f"elif not {kind.upper()}_RE.match(value):",
+                f"    errors[{key}] = 'Enter a valid {kind}'",
+            ]
+        lines += ["else:", f"    clean[{key}] = value"]
+    elif kind == "number":
+        lines += [
+            "elif type(value) is int:",
+            f"    clean[{key}] = value",
+            "elif (converted := _to_int(value)) is not MISSING:",
+            f"    clean[{key}] = converted",
+            "else:",
+            f"    errors[{key}] = 'Expected an integer'",
+        ]
+    elif kind == "float":
+        lines += [
+            "elif (converted := _to_float(value)) is not MISSING:",
+            f"    clean[{key}] = converted",
+            "else:",
+            f"    errors[{key}] = 'Expected a number'",
+        ]
+    elif kind == "boolean":
+        lines += [
+            "elif type(value) is bool:",
+            f"    clean[{key}] = value",
+            "elif (converted := _to_bool(value)) is not MISSING:",
+            f"    clean[{key}] = converted",
+            "else:",
+            f"    errors[{key}] = 'Expected a boolean'",
+        ]
+    elif kind == "datetime":
+        lines += [
+            "elif (converted := _to_datetime(value)) is not MISSING:",
+            f"    clean[{key}] = converted",
+            "else:",
+            f"    errors[{key}] = 'Enter a valid date/time'",
+        ]
+    else:  # json: anything goes
+        lines += ["else:", f"    clean[{key}] = value"]
+    return lines
+
+
+def _compile_python(fields: Tuple[Field, ...]):
+    """Generate a specialized validate(data) -> (clean, errors) function"""
+    body = [
+        "def validate(data):",
+        "    if not isinstance(data, dict):",
+        "        return None, {'__all__': 'Expected an object'}",
+        "    clean = {}",
+        "    errors = {}",
+    ]
+    for index, field in enumerate(fields):
+        body += ["    " + line for line in _field_source(index, field)]
+    body.append("    return clean, errors")
+
+    namespace = {
+        "MISSING": MISSING,
+        "EMAIL_RE": EMAIL_RE,
+        "URL_RE": URL_RE,
+        "SLUG_RE": SLUG_RE,
+        "_to_int": _to_int,
+        "_to_float": _to_float,
+        "_to_bool": _to_bool,
+        "_to_datetime": _to_datetime,
+        "defaults": tuple(field.default for field in fields),
+    }
+    source = "\n".join(body)
+    exec(compile(source, "<shanks.validation>", "exec"), namespace)
+    validate = namespace["validate"]
+    validate.__source__ = source
+    return validate
+
+
+def _compile_msgspec(fields: Tuple[Field, ...]):
+    """
+    Build a msgspec Struct decoder for JSON bodies, or None if unavailable
+
+    It is only a fast path: anything it rejects is re-checked by the
+    generated Python validator, which is the single source of error messages.
+    """
+    try:
+        import msgspec
+        from typing import Annotated
+    except ImportError:
+        return None
+
+    base_types = {
+        "number": int,
+        "float": float,
+        "boolean": bool,
+        "datetime": datetime.datetime,
+        "json": Any,
+    }
+    struct_fields = []
+    for field in fields:
+        if field.kind in base_types:
+            annotation = base_types[field.kind]
+        else:
+            constraints = {}
+            if field.max_length:
+                constraints["max_length"] = field.max_length
+            if not field.blank:
+                constraints["min_length"] = 1
+            if field.kind in _PATTERNS:
+                constraints["pattern"] = _PATTERNS[field.kind].pattern
+            annotation = (
+                Annotated[str, msgspec.Meta(**constraints)] if constraints else str
+            )
+        if field.nullable:
+            annotation = Optional[annotation]
+        if field.required:
+            struct_fields.append((field.name, annotation))
+        else:
+            struct_fields.append((field.name, annotation, field.default))
+
+    # Required fields must come before fields with defaults
+    struct_fields.sort(key=len)
+    try:
+        struct = msgspec.defstruct("Body", struct_fields)
+    except (TypeError, ValueError):
+        # e.g. field names that aren't valid identifiers
+        return None
+    decoder = msgspec.json.Decoder(struct)
+    asdict = msgspec.structs.asdict
+    errors = (msgspec.ValidationError, msgspec.DecodeError)
+
+    def decode(raw):
+        try:
+            return asdict(decoder.decode(raw))
+        except errors:
+            return None
+
+    return decode
+
+
+class Validator:
+    """
+    Request body schema compiled once into a specialized validator
+
+    Fields use the same vocabulary as shanks.schema:
+
+        CreatePost = Validator({
+            "title": "string:100",
+            "content": "text",
+            "email": "email",
+            "views": "number:blank",
+            "published": {"type": "boolean", "default": False},
+        })
+
+        @app.post("api/posts", body=CreatePost)
+        def create_post(req):
+            return {"title": req.body["title"]}  # already validated
+
+    Invalid bodies are answered with 422:
+
+        {"error": "Validation failed", "details": {"title": "This field is required"}}
+    """
+
+    def __init__(self, fields: Dict[str, Any], use_msgspec: bool = True):
+        self.definitions = dict(fields)
+        self.fields = tuple(
+            Field.from_definition(name, definition)
+            for name, definition in self.definitions.items()
+        )
+        self._validate = _compile_python(self.fields)
+        self._decode_json = _compile_msgspec(self.fields) if use_msgspec else None
+
+    @property
+    def backend(self) -> str:
+        """'msgspec' when the JSON fast path is active, otherwise 'python'"""
+        return "msgspec" if self._decode_json is not None else "python"
+
+    def validate(self, data) -> Tuple[Optional[dict], Dict[str, str]]:
+        """Validate parsed data, returning (clean_data, errors)"""
+        return self._validate(data)
+
+    def validate_request(self, req) -> Optional[Dict[str, str]]:
+        """
+        Validate a Shanks request body in place
+
+        On success req.body is replaced by the cleaned data and None is
+        returned; otherwise the error mapping is returned.
+        """
+        if self._decode_json is not None and req._body is _UNSET:
+            django_request = req.django
+            if django_request.content_type == "application/json":
+                clean = self._decode_json(django_request.body)
+                if clean is not None:
+                    req._body = clean
+                    return None
+
+        clean, errors = self._validate(req.body)
+        if errors:
+            return errors
+        req._body = clean
+        return None
+
+    def error_response(self, errors: Dict[str, str]) -> Response:
+        """Standard 422 response for validation errors"""
+        return Response({"error": "Validation failed", "details": errors}, status=422)
+
+    def to_openapi(self) -> Dict[str, Any]:
+        """OpenAPI schema object for this body"""
+        schema = {
+            "type": "object",
+            "properties": {field.name: field.to_openapi() for field in self.fields},
+        }
+        required = [field.name for field in self.fields if field.required]
+        if required:
+            schema["required"] = required
+        return schema
+
+
+def compile_schema(schema) -> Validator:
+    """Turn a dict schema (or an existing Validator) into a Validator"""
+    if isinstance(schema, Validator):
+        return schema
+    if isinstance(schema, dict):
+        return Validator(schema)
+    raise TypeError(
+        f"body schema must be a dict or Validator, got {type(schema).__name__}"
+    )
+
+
+__all__ = ["Validator", "compile_schema"]
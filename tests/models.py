@@ -0,0 +1,44 @@
+"""Models used by the ORM tests"""
+
+from shanks.orm import (
+    CASCADE,
+    CharField,
+    DateTimeField,
+    ForeignKey,
+    IntegerField,
+    Model,
+    TextField,
+)
+
+
+class Category(Model):
+    slug = CharField(max_length=50, unique=True)
+    name = CharField(max_length=100)
+
+    class Meta:
+        app_label = "tests"
+
+
+class Post(Model):
+    title = CharField(max_length=200)
+    views = IntegerField(default=0)
+    rating = IntegerField(null=True, blank=True)
+    category = ForeignKey(Category, on_delete=CASCADE, related_name="posts")
+
+    class Meta:
+        app_label = "tests"
+        ordering = ["id"]
+
+
+class Note(Model):
+    """Same fields as the `shanks create <name> --crud` entity template"""
+
+    title = CharField(max_length=200)
+    description = TextField(blank=True)
+    created_by = ForeignKey("auth.User", on_delete=CASCADE, related_name="notes")
+    created_at = DateTimeField(auto_now_add=True)
+    updated_at = DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = "tests"
+        ordering = ["-created_at"]
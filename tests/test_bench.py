@@ -0,0 +1,99 @@
+"""Tests for the `shanks bench` command"""
+
+import json
+
+import pytest
+from django.test import override_settings
+
+from shanks import App
+from shanks.cli.bench import compare, discover_paths, drive, micro_suite, run_bench
+
+app = App(enable_cache=False)
+
+
+@app.get("api/ping")
+def ping(req):
+    return {"pong": True}
+
+
+@app.get("api/items/<id>")
+def item(req, id):
+    return {"id": id}
+
+
+@app.get("api/broken")
+def broken(req):
+    raise RuntimeError("broken")
+
+
+urlpatterns = app.get_urls()
+
+pytestmark = pytest.mark.usefixtures("project_urls")
+
+
+@pytest.fixture
+def project_urls():
+    with override_settings(ROOT_URLCONF=__name__):
+        yield
+
+
+def test_routes_are_discovered_and_driven_concurrently():
+    assert discover_paths() == ["/", "/api/broken", "/api/ping"]
+
+    stats = drive("/api/ping", requests=40, concurrency=4, warmup=2)
+    assert stats["requests"] == 40 and stats["errors"] == 0
+    assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+    assert stats["rps"] > 0
+
+    assert drive("/api/broken", requests=5, concurrency=2, warmup=0)["errors"] == 5
+
+
+def test_regressions_against_a_baseline():
+    baseline = {
+        "routes": {
+            "GET /api/ping": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0, "rps": 1000}
+        },
+        "micro": {"routing": 10.0, "cors": 5.0},
+    }
+    current = {
+        "routes": {
+            "GET /api/ping": {"p50_ms": 1.05, "p95_ms": 2.5, "p99_ms": 3.0, "rps": 850}
+        },
+        "micro": {"routing": 10.5, "cors": 6.0, "new": 1.0},
+    }
+    found = {(name, metric) for name, metric, *_ in compare(current, baseline, 0.10)}
+    assert found == {
+        ("GET /api/ping", "p95_ms"),
+        ("GET /api/ping", "rps"),
+        ("cors", "us_per_op"),
+    }
+
+
+def test_micro_suite_covers_the_framework():
+    results = micro_suite(number=5)
+    assert set(results) == {
+        "routing",
+        "middleware",
+        "cache_hit",
+        "serialization",
+        "cors",
+    }
+    assert all(value > 0 for value in results.values())
+
+
+def test_cli_saves_results_and_fails_on_regression(tmp_path, capsys):
+    saved = tmp_path / "bench.json"
+    run_bench(
+        ["/api/ping", "-n", "20", "-c", "2", "--warmup", "0", "--save", str(saved)]
+    )
+    results = json.loads(saved.read_text())
+    assert results["routes"]["GET /api/ping"]["requests"] == 20
+    assert "GET /api/ping" in capsys.readouterr().out
+
+    fast = tmp_path / "fast.json"
+    results["routes"]["GET /api/ping"]["p95_ms"] = 1e-6
+    fast.write_text(json.dumps(results))
+    with pytest.raises(SystemExit) as exited:
+        run_bench(["/api/ping", "-n", "20", "-c", "2", "--baseline", str(fast)])
+    assert exited.value.code == 1
+    assert "p95_ms" in capsys.readouterr().out
@@ -0,0 +1,61 @@
+"""Tests for content negotiation codecs"""
+
+import json
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import Request, Response
+from shanks.codecs import CodecRegistry, JSONCodec, codecs
+
+
+def test_negotiate_defaults_to_json():
+    """Missing or wildcard Accept headers get JSON"""
+    assert codecs.negotiate(None) is codecs.default
+    assert codecs.negotiate("*/*") is codecs.default
+    assert codecs.negotiate("text/html, */*;q=0.8") is codecs.default
+
+
+def test_negotiate_respects_quality():
+    """Higher q-value wins, unknown media types are skipped"""
+
+    class FakeCodec(JSONCodec):
+        media_type = "application/x-fake"
+
+    registry = CodecRegistry()
+    fake = registry.register(FakeCodec())
+
+    assert registry.negotiate("application/x-fake") is fake
+    assert registry.negotiate("application/json, application/x-fake;q=0.5") is (
+        registry.default
+    )
+    assert registry.negotiate("image/png, application/x-fake;q=0.1") is fake
+
+    registry.unregister("application/x-fake")
+    assert registry.negotiate("application/x-fake") is registry.default
+
+
+def test_response_msgpack_roundtrip():
+    """Response encodes dicts as MessagePack when asked, Request decodes them"""
+    msgpack = pytest.importorskip("msgpack")
+    factory = RequestFactory()
+
+    django_req = factory.get("/items", HTTP_ACCEPT="application/msgpack")
+    resp = Response({"items": [1, 2, 3]}).to_django_response(django_req)
+    assert resp["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(resp.content) == {"items": [1, 2, 3]}
+
+    django_req = factory.post(
+        "/items",
+        data=msgpack.packb({"name": "shanks"}),
+        content_type="application/msgpack",
+    )
+    assert Request(django_req).body == {"name": "shanks"}
+
+
+def test_response_json_unchanged():
+    """Plain clients still get the JSON response"""
+    django_req = RequestFactory().get("/items")
+    resp = Response({"ok": True}).to_django_response(django_req)
+    assert resp["Content-Type"] == "application/json"
+    assert json.loads(resp.content) == {"ok": True}
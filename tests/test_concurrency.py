@@ -0,0 +1,111 @@
+"""Tests for the concurrency limiting (bulkhead) middleware"""
+
+import threading
+import time
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import App, ConcurrencyLimit
+from shanks.concurrency import Bulkhead
+
+factory = RequestFactory()
+
+
+def _app(limiter):
+    """App with a 'slow' route that blocks until released and a fast one"""
+    app = App(enable_cache=False)
+    app.use(limiter)
+    entered = threading.Event()
+    release = threading.Event()
+
+    @app.get("api/slow")
+    def slow(req):
+        entered.set()
+        release.wait(5)
+        return {"slow": True}
+
+    @app.get("api/fast")
+    def fast(req):
+        return {"fast": True}
+
+    return app, entered, release
+
+
+def _in_background(view, path):
+    responses = []
+    thread = threading.Thread(target=lambda: responses.append(view(factory.get(path))))
+    thread.start()
+    return thread, responses
+
+
+def test_excess_requests_are_shed_with_503():
+    limiter = ConcurrencyLimit(1, queue_timeout=0)
+    app, entered, release = _app(limiter)
+    slow, fast = app.routes[0]["view"], app.routes[1]["view"]
+
+    thread, responses = _in_background(slow, "/api/slow")
+    assert entered.wait(5)
+    shed = fast(factory.get("/api/fast"))
+    assert shed.status_code == 503 and shed["Retry-After"] == "1"
+    assert limiter.stats()["*"]["rejected"] == 1
+
+    release.set()
+    thread.join()
+    assert responses[0].status_code == 200
+    assert fast(factory.get("/api/fast")).status_code == 200
+
+
+def test_queued_request_gets_the_freed_slot():
+    limiter = ConcurrencyLimit(1, queue_timeout=5)
+    app, entered, release = _app(limiter)
+    slow, fast = app.routes[0]["view"], app.routes[1]["view"]
+
+    thread, _ = _in_background(slow, "/api/slow")
+    assert entered.wait(5)
+    queued, responses = _in_background(fast, "/api/fast")
+    while limiter.stats()["*"]["waiting"] == 0:
+        time.sleep(0.001)
+    release.set()
+    thread.join()
+    queued.join()
+    assert responses[0].status_code == 200
+    assert limiter.stats()["*"] == {
+        "limit": 1,
+        "in_flight": 0,
+        "waiting": 0,
+        "rejected": 0,
+    }
+
+
+def test_per_route_limits_isolate_routes():
+    limiter = ConcurrencyLimit(1, queue_timeout=0, key="route")
+    app, entered, release = _app(limiter)
+    slow, fast = app.routes[0]["view"], app.routes[1]["view"]
+
+    thread, _ = _in_background(slow, "/api/slow")
+    assert entered.wait(5)
+    assert fast(factory.get("/api/fast")).status_code == 200
+    assert slow(factory.get("/api/slow")).status_code == 503
+    release.set()
+    thread.join()
+
+    with pytest.raises(ValueError):
+        ConcurrencyLimit(key="user")
+
+
+def test_adaptive_limit_backs_off_and_recovers():
+    bulkhead = Bulkhead(10, adaptive=True, target_latency=0.2, min_limit=2)
+    assert bulkhead.acquire(0)
+    bulkhead.release(latency=1.0)
+    assert bulkhead.stats()["limit"] == 9
+
+    # Decreases are spaced by target_latency, so one slow burst counts once
+    assert bulkhead.acquire(0)
+    bulkhead.release(latency=1.0)
+    assert bulkhead.stats()["limit"] == 9
+
+    for _ in range(20):
+        assert bulkhead.acquire(0)
+        bulkhead.release(latency=0.01)
+    assert bulkhead.stats()["limit"] == 10
@@ -0,0 +1,83 @@
+"""Tests for the compiled CORS policy"""
+
+import re
+
+from django.test import RequestFactory
+
+from shanks import App, CORS, CORSPolicy
+
+
+def test_policy_exact_and_wildcard_origins():
+    """Exact origins, wildcard subdomains and regexes are all supported"""
+    policy = CORSPolicy(
+        origins=[
+            "http://localhost:3000",
+            "https://*.example.com",
+            re.compile(r"^https://preview-\d+\.example\.dev$"),
+        ]
+    )
+    assert policy.allowed_origin("http://localhost:3000") == "http://localhost:3000"
+    assert policy.allowed_origin("https://a.b.example.com") == "https://a.b.example.com"
+    assert policy.allowed_origin("https://example.com") is None
+    assert policy.allowed_origin("https://preview-12.example.dev") is not None
+    assert policy.allowed_origin("https://evil.com") is None
+
+
+def test_policy_caches_preflight_headers():
+    """Preflight header blocks are reused per (origin, requested headers)"""
+    policy = CORSPolicy(origins=["http://localhost:3000"])
+    first = policy.preflight_headers("http://localhost:3000", "X-Token")
+    assert policy.preflight_headers("http://localhost:3000", "X-Token") is first
+    assert first.get("Access-Control-Allow-Headers") == "X-Token"
+    assert policy.preflight_headers("http://localhost:3000", "X-Other") is not first
+
+
+def test_cors_enable_applies_headers_in_pipeline():
+    """CORS.enable adds headers without wrapping views or adding middleware"""
+    app = App(enable_cache=False)
+    CORS.enable(app, origins=["http://localhost:3000"], credentials=True)
+    calls = []
+
+    @app.get("items")
+    def items(req):
+        calls.append(True)
+        return {"items": []}
+
+    assert app.middlewares == []
+    factory = RequestFactory()
+
+    response = app.routes[0]["view"](
+        factory.get("/items", HTTP_ORIGIN="http://localhost:3000")
+    )
+    assert response["Access-Control-Allow-Origin"] == "http://localhost:3000"
+    assert response["Access-Control-Allow-Credentials"] == "true"
+    assert "Origin" in response["Vary"]
+    assert len(calls) == 1
+
+    response = app.routes[0]["view"](
+        factory.get("/items", HTTP_ORIGIN="https://evil.com")
+    )
+    assert "Access-Control-Allow-Origin" not in response
+
+
+def test_cors_preflight_through_urls():
+    """OPTIONS requests are answered by the compiled preflight"""
+    app = App(enable_cache=False)
+    CORS.enable(app, methods=["GET", "POST"])
+
+    @app.post("items")
+    def create_item(req):
+        return {"ok": True}
+
+    pattern = [p for p in app.get_urls() if p.name == "create_item"][0]
+    response = pattern.callback(
+        RequestFactory().options(
+            "/items",
+            HTTP_ORIGIN="http://localhost:3000",
+            HTTP_ACCESS_CONTROL_REQUEST_HEADERS="Content-Type",
+        )
+    )
+    assert response.status_code == 204
+    assert response["Access-Control-Allow-Origin"] == "*"
+    assert response["Access-Control-Allow-Methods"] == "GET, POST"
+    assert response["Access-Control-Allow-Headers"] == "Content-Type"
@@ -0,0 +1,194 @@
+"""Tests for database configuration helpers and replica routing"""
+
+import threading
+import time
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import DatabaseConfig, ReplicaRouter, Request, db, pool_stats
+from shanks.db import _ReadScope, _read_scope
+
+from .models import Post
+
+
+def _cluster(**kwargs):
+    return DatabaseConfig.cluster(
+        "sqlite:///primary.db", ["sqlite:///r1.db", "sqlite:///r2.db"], **kwargs
+    )
+
+
+def test_cluster_builds_primary_and_replicas():
+    databases = _cluster(weights=[3, 1], max_lag=5)
+    assert list(databases) == ["default", "replica_1", "replica_2"]
+    assert databases["replica_1"]["REPLICA_OF"] == "default"
+    assert databases["replica_1"]["WEIGHT"] == 3
+    assert databases["replica_2"]["TEST"] == {"MIRROR": "default"}
+    assert databases["default"]["REPLICA_MAX_LAG"] == 5
+
+    with pytest.raises(ValueError):
+        _cluster(policy="round_robin")
+    with pytest.raises(ValueError):
+        _cluster(weights=[1])
+
+
+def test_reads_use_healthy_replicas_and_writes_the_primary():
+    router = ReplicaRouter(_cluster(weights=[1, 0], max_lag=5))
+    # Probed by hand below instead of in the background
+    router.LAG_CHECK_INTERVAL = float("inf")
+    assert router.db_for_read(Post) == "replica_1"
+    assert router.db_for_write(Post) == "default"
+    assert router.allow_migrate("replica_1", "tests") is False
+
+    # replica_1 falls behind and is ejected
+    router.lag_probe = {"replica_1": 30.0, "replica_2": 1.0}.get
+    router.refresh_lag()
+    assert router.db_for_read(Post) == "replica_2"
+    assert router.stats()["replica_1"]["ejected"] is True
+
+    # Nothing healthy: fall back to the primary
+    router.lag_probe = lambda alias: float("inf")
+    router.refresh_lag()
+    assert router.db_for_read(Post) == "default"
+
+
+def test_lag_is_probed_outside_the_request():
+    """A slow probe runs in the background; reads route on the last values"""
+    router = ReplicaRouter(_cluster(weights=[1, 0], max_lag=5))
+    release = threading.Event()
+    probed = []
+
+    def slow_probe(alias):
+        release.wait(5)
+        probed.append(alias)
+        return 30.0 if alias == "replica_1" else 0.0
+
+    router.lag_probe = slow_probe
+    assert router.db_for_read(Post) == "replica_1"
+    assert router.db_for_read(Post) == "replica_1"
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(probed) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert probed == ["replica_1", "replica_2"]
+    # Wait for the probe thread to publish its results
+    router._lag_lock.acquire(timeout=5)
+    router._lag_lock.release()
+    assert router.db_for_read(Post) == "replica_2"
+
+
+def test_least_connections_spreads_concurrent_requests():
+    router = ReplicaRouter(_cluster(policy="least_connections"))
+    chosen = []
+    tokens = []
+    for _ in range(2):
+        tokens.append(_read_scope.set(_ReadScope()))
+        chosen.append(router.db_for_read(Post))
+    for token in reversed(tokens):
+        _read_scope.reset(token)
+    assert sorted(chosen) == ["replica_1", "replica_2"]
+    assert router.stats()["replica_1"]["in_flight"] == 1
+
+    # Release the counters taken above
+    from shanks.db import _release
+
+    for alias in chosen:
+        _release(alias)
+
+
+def test_middleware_pins_primary_after_write():
+    """Reads after a write stick to the primary, also for the next request"""
+    router = ReplicaRouter(_cluster())
+    middleware = ReplicaRouter.middleware(stick_seconds=5)
+    factory = RequestFactory()
+    seen = []
+
+    def write_then_read():
+        seen.append(router.db_for_read(Post))
+        router.db_for_write(Post)
+        seen.append(router.db_for_read(Post))
+        return {"ok": True}
+
+    result = middleware(Request(factory.post("/posts")), None, write_then_read)
+    response = result.to_django_response(factory.get("/"))
+    assert seen[0].startswith("replica_") and seen[1] == "default"
+    assert response.cookies["shanks_primary"]["max-age"] == 5
+    assert router.stats()[seen[0]]["in_flight"] == 0
+
+    seen.clear()
+    request = factory.get("/posts")
+    request.COOKIES["shanks_primary"] = "1"
+    middleware(Request(request), None, lambda: seen.append(router.db_for_read(Post)))
+    assert seen == ["default"]
+
+
+def test_pooling_modes_and_options(monkeypatch):
+    config = DatabaseConfig.postgres(database="app", mode="wsgi")
+    assert config["CONN_MAX_AGE"] == 600 and config["CONN_HEALTH_CHECKS"] is True
+
+    # The asgi pool needs Django 5.1+ and psycopg 3
+    monkeypatch.setattr(db, "_builtin_pool_available", lambda: True)
+    config = DatabaseConfig.from_url("postgres://u:p@db:5432/app", mode="asgi")
+    assert config["OPTIONS"]["pool"]["max_size"] == 10
+    assert config["CONN_MAX_AGE"] == 0
+
+    monkeypatch.setattr(db, "_builtin_pool_available", lambda: False)
+    config = DatabaseConfig.from_url("postgres://u:p@db:5432/app", mode="asgi")
+    assert "pool" not in config.get("OPTIONS", {})
+    assert config["CONN_MAX_AGE"] == 0
+
+    config = DatabaseConfig.postgres(pool={"max_size": 30}, conn_max_age=60)
+    assert config["OPTIONS"]["pool"] == {"min_size": 2, "max_size": 30, "timeout": 10.0}
+    assert config["CONN_MAX_AGE"] == 0
+
+    # MySQL falls back to persistent connections
+    config = DatabaseConfig.mysql(mode="asgi", conn_max_age=30)
+    assert "OPTIONS" not in config and config["CONN_MAX_AGE"] == 30
+    with pytest.raises(ValueError):
+        DatabaseConfig.mysql(pool=True)
+    with pytest.raises(ValueError):
+        DatabaseConfig.from_url("sqlite:///db.sqlite3", mode="nope")
+
+
+@pytest.mark.django_db
+def test_pool_stats_without_pool():
+    from django.db import connection
+
+    connection.ensure_connection()
+    stats = pool_stats()
+    assert stats["vendor"] == "sqlite"
+    assert stats["pooled"] is False and stats["connected"] is True
+
+
+@pytest.mark.django_db
+def test_sqlite_performance_profile_applies_pragmas(tmp_path):
+    """PRAGMAs run on every new connection via connection_created"""
+    from django.db.utils import ConnectionHandler
+
+    config = DatabaseConfig.sqlite(
+        str(tmp_path / "perf.db"), profile="performance", pragmas={"cache_size": -1024}
+    )
+    assert config["OPTIONS"] == {"transaction_mode": "IMMEDIATE"}
+    assert DatabaseConfig.sqlite("db.sqlite3") == {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": "db.sqlite3",
+    }
+
+    connection = ConnectionHandler({"default": config})["default"]
+    try:
+        with connection.cursor() as cursor:
+            results = {}
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size"):
+                cursor.execute(f"PRAGMA {name}")
+                results[name] = cursor.fetchone()[0]
+    finally:
+        connection.close()
+    assert results == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "busy_timeout": 5000,
+        "cache_size": -1024,
+    }
+
+    with pytest.raises(ValueError):
+        DatabaseConfig.sqlite(profile="turbo")
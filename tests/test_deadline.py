@@ -0,0 +1,193 @@
+"""Tests for per-route timeouts and deadline propagation"""
+
+import asyncio
+import time
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import App
+from shanks.deadline import DeadlineExceeded, check, deadline_scope, remaining
+
+from .models import Post
+
+factory = RequestFactory()
+
+
+def test_async_handler_is_cancelled_at_the_deadline():
+    app = App(enable_cache=False)
+    cancelled = []
+
+    @app.get("api/slow", timeout=0.05)
+    async def slow(req):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    @app.get("api/fast")
+    async def fast(req):
+        await asyncio.sleep(0)
+        return {"ok": True}
+
+    start = time.monotonic()
+    response = app.routes[0]["view"](factory.get("/api/slow"))
+    assert response.status_code == 504
+    assert time.monotonic() - start < 1 and cancelled == [True]
+    assert app.routes[1]["view"](factory.get("/api/fast")).status_code == 200
+
+
+@pytest.mark.django_db
+def test_sync_handler_queries_are_refused_after_the_deadline():
+    app = App(enable_cache=False)
+    seen = {}
+
+    @app.get("api/posts", timeout=0.05)
+    def posts(req):
+        seen["deadline"] = req.deadline
+        seen["remaining"] = remaining()
+        time.sleep(0.06)
+        return {"count": Post.count()}
+
+    response = app.routes[0]["view"](factory.get("/api/posts"))
+    assert response.status_code == 504
+    assert seen["deadline"] is not None and 0 < seen["remaining"] <= 0.05
+    assert remaining() is None
+    assert Post.count() == 0  # the guard is gone after the request
+
+
+def test_group_default_timeout_and_route_override():
+    app = App(enable_cache=False)
+    reports = app.group("api/reports", timeout=10)
+    nested = reports.group("daily")
+    left = {}
+
+    @reports.get("slow", timeout=30)
+    def slow(req):
+        left["slow"] = req.deadline - time.monotonic()
+        return {}
+
+    @nested.get("today")
+    def today(req):
+        left["today"] = req.deadline - time.monotonic()
+        return {}
+
+    @app.get("api/health")
+    def health(req):
+        left["health"] = req.deadline
+        return {}
+
+    for routes in (reports.routes, nested.routes, app.routes):
+        routes[0]["view"](factory.get("/"))
+    assert 29 < left["slow"] <= 30
+    assert 9 < left["today"] <= 10
+    assert left["health"] is None
+
+
+def test_nested_scopes_never_extend_the_deadline():
+    with deadline_scope(0.05) as outer:
+        with deadline_scope(60) as inner:
+            assert inner == outer
+        time.sleep(0.06)
+        with pytest.raises(DeadlineExceeded):
+            check()
+    assert remaining() is None
+
+
+class _FakePostgres:
+    """Just enough of a PostgreSQL connection for the query guard"""
+
+    vendor = "postgresql"
+
+    def __init__(self, pgbouncer=False, broken=False):
+        self.settings_dict = {"DISABLE_SERVER_SIDE_CURSORS": pgbouncer}
+        self.autocommit = True
+        self.in_atomic_block = False
+        self.run_on_commit = []
+        self.broken = broken
+        self.closed = False
+        self.statements = []
+
+    def get_autocommit(self):
+        return self.autocommit
+
+    def on_commit(self, func):
+        self.run_on_commit.append((set(), func, False))
+
+    # Raw cursor (context["cursor"].cursor) and cursor() for reset()
+    @property
+    def cursor(self):
+        return self
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        if self.broken and "DEFAULT" in sql:
+            raise RuntimeError("connection lost")
+        self.statements.append(sql.split(" =")[0])
+
+    def close(self):
+        self.closed = True
+
+
+def _run(guard, connection, error=None):
+    def execute(sql, params, many, context):
+        if error is not None:
+            raise error
+        return "rows"
+
+    return guard(
+        execute, "SELECT 1", (), False, {"connection": connection, "cursor": connection}
+    )
+
+
+def test_statement_timeout_never_outlives_the_request():
+    from django.db import OperationalError
+
+    from shanks.deadline import _QueryGuard
+
+    # Autocommit: one session SET, reset at the end (or the connection closed)
+    guard = _QueryGuard(time.monotonic() + 5)
+    connection, broken = _FakePostgres(), _FakePostgres(broken=True)
+    for conn in (connection, connection, broken):
+        assert _run(guard, conn) == "rows"
+    guard.reset()
+    assert connection.statements == [
+        "SET statement_timeout",
+        "SET statement_timeout TO DEFAULT",
+    ]
+    assert broken.closed and not connection.closed
+
+    # Transactions: SET LOCAL once per transaction
+    guard = _QueryGuard(time.monotonic() + 5)
+    connection = _FakePostgres()
+    connection.autocommit, connection.in_atomic_block = False, True
+    _run(guard, connection)
+    _run(guard, connection)
+    connection.run_on_commit = []  # the transaction committed
+    _run(guard, connection)
+    assert connection.statements == ["SET LOCAL statement_timeout"] * 2
+    guard.reset()
+    assert len(connection.statements) == 2
+
+    # PgBouncer transaction pooling: no session-level SET
+    guard = _QueryGuard(time.monotonic() + 5)
+    pooled = _FakePostgres(pgbouncer=True)
+    _run(guard, pooled)
+    assert pooled.statements == []
+
+    # A server-side cancel is a deadline, other errors are left alone
+    canceled = OperationalError("canceling statement due to statement timeout")
+    canceled.__cause__ = type("QueryCanceled", (Exception,), {"sqlstate": "57014"})()
+    with pytest.raises(DeadlineExceeded):
+        _run(_QueryGuard(time.monotonic() + 5), _FakePostgres(), canceled)
+    with pytest.raises(OperationalError):
+        _run(_QueryGuard(time.monotonic() + 5), pooled, canceled)
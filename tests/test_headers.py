@@ -0,0 +1,48 @@
+"""Tests for static header blocks"""
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from shanks import App, HeaderBlock, Response
+
+
+def test_header_block_is_immutable():
+    """Blocks are validated once and cannot be modified"""
+    block = HeaderBlock({"X-Frame-Options": "DENY"})
+    assert block.get("x-frame-options") == "DENY"
+    with pytest.raises(AttributeError):
+        block.extra = 1
+
+
+def test_header_block_does_not_override():
+    """Headers already on the response win over the block"""
+    block = HeaderBlock.security()
+    response = HttpResponse()
+    response["X-Frame-Options"] = "SAMEORIGIN"
+    block.apply(response)
+    assert response["X-Frame-Options"] == "SAMEORIGIN"
+    assert response["X-Content-Type-Options"] == "nosniff"
+
+
+def test_app_and_route_headers():
+    """App headers, route headers and handler headers are layered"""
+    app = App(enable_cache=False)
+    app.set_headers({"X-App": "app", "Cache-Control": "no-store"})
+
+    @app.get("config", headers=HeaderBlock.cache_control(max_age=60))
+    def config(req):
+        return Response({"ok": True}).header("X-Handler", "yes")
+
+    response = app.routes[0]["view"](RequestFactory().get("/config"))
+    assert response["X-App"] == "app"
+    assert response["Cache-Control"] == "private, max-age=60"
+    assert response["X-Handler"] == "yes"
+
+
+def test_response_uses_slots():
+    """Response has no per-instance __dict__"""
+    resp = Response({"ok": True})
+    assert not hasattr(resp, "__dict__")
+    with pytest.raises(AttributeError):
+        resp.extra = 1
@@ -0,0 +1,77 @@
+"""Tests for the DataLoader primitive"""
+
+import asyncio
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import DataLoader, Request
+from shanks.nplusone import QueryTracker
+
+from .models import Category, Post
+
+
+def test_load_batches_queued_keys():
+    """All keys queued before resolve() are fetched in one batch"""
+    calls = []
+
+    def batch(keys):
+        calls.append(keys)
+        return {key: key * 10 for key in keys if key != 3}
+
+    loader = DataLoader(batch)
+    data = {"items": [loader.load(1), loader.load(2), loader.load(1), loader.load(3)]}
+
+    assert DataLoader.resolve(data) == {"items": [10, 20, 10, None]}
+    assert calls == [[1, 2, 3]]
+    assert loader.load_many([2, 1]) == [20, 10]
+    assert loader.batches == 1
+
+
+def test_max_batch_size_splits_batches():
+    loader = DataLoader(lambda keys: {key: key for key in keys}, max_batch_size=2)
+    assert loader.load_many(range(5)) == [0, 1, 2, 3, 4]
+    assert loader.batches == 3
+
+
+def test_aload_batches_within_a_tick():
+    """Concurrent aload() calls share one batch"""
+    calls = []
+
+    def batch(keys):
+        calls.append(sorted(keys))
+        return {key: str(key) for key in keys}
+
+    loader = DataLoader(batch)
+
+    async def main():
+        first = await asyncio.gather(*(loader.aload(key) for key in (1, 2, 3)))
+        second = await loader.aload_many([3, 4])
+        return first, second
+
+    assert asyncio.run(main()) == (["1", "2", "3"], ["3", "4"])
+    assert calls == [[1, 2, 3], [4]]
+    assert not loader._dispatch_tasks
+
+
+@pytest.mark.django_db
+def test_model_loader_uses_one_query_per_request():
+    """Model.loader(req) replaces per-row FK queries and is memoized"""
+    for i in range(5):
+        category = Category.create(slug=f"c{i}", name=f"Category {i}")
+        Post.create(title=f"Post {i}", category=category)
+    req = Request(RequestFactory().get("/posts"))
+
+    tracker = QueryTracker()
+    with tracker.track():
+        categories = Category.loader(req)
+        rows = [
+            {"title": post.title, "category": categories.load(post.category_id)}
+            for post in Post.find_many()
+        ]
+        rows = DataLoader.resolve(rows)
+
+    assert [row["category"].name for row in rows] == [f"Category {i}" for i in range(5)]
+    assert tracker.total == 2
+    assert Category.loader(req) is categories
+    assert Category.loader() is not categories
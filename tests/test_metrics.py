@@ -0,0 +1,171 @@
+"""Tests for built-in request metrics"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import App, Metrics
+from shanks.cache import get_cache
+
+from .models import Category
+
+factory = RequestFactory()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+def _view(app, name):
+    return [route for route in app.routes if route["name"] == name][0]["view"]
+
+
+def _scrape(app, **headers):
+    return _view(app, "shanks_metrics")(factory.get("/metrics", **headers))
+
+
+@pytest.mark.django_db
+def test_routes_are_measured_by_template():
+    app = App()
+    metrics = Metrics(buckets=(0.5, 1.0))
+    app.use(metrics)
+
+    @app.get("api/categories/<slug>")
+    def category(req, slug):
+        return {"count": Category.count(), "again": Category.count()}
+
+    view = _view(app, "category")
+    for slug in ("news", "tech", "news"):
+        assert (
+            view(factory.get(f"/api/categories/{slug}"), slug=slug).status_code == 200
+        )
+
+    body = _scrape(app).content.decode()
+    labels = 'route="api/categories/<slug>",method="GET"'
+    assert f'shanks_requests_total{{{labels},status="200"}} 3' in body
+    assert f'shanks_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in body
+    assert f"shanks_request_duration_seconds_count{{{labels}}} 3" in body
+    assert f"shanks_requests_in_flight{{{labels}}} 0" in body
+    # The repeated GET was served by auto_cache without touching the database
+    assert f"shanks_db_queries_total{{{labels}}} 4" in body
+    assert f'shanks_cache_requests_total{{{labels},result="hit"}} 1' in body
+    assert f'shanks_cache_requests_total{{{labels},result="miss"}} 2' in body
+
+
+def test_endpoint_bypasses_the_response_cache_and_checks_the_token():
+    app = App()
+    app.use(Metrics(token="s3cret"))
+
+    @app.get("api/ping")
+    def ping(req):
+        return {"pong": True}
+
+    assert _scrape(app).status_code == 401
+    auth = {"HTTP_AUTHORIZATION": "Bearer s3cret"}
+    before = _scrape(app, **auth).content.decode()
+    _view(app, "ping")(factory.get("/api/ping"))
+    after = _scrape(app, **auth)
+    assert after["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert 'route="api/ping"' not in before
+    assert 'shanks_requests_total{route="api/ping",method="GET",status="200"} 1' in (
+        after.content.decode()
+    )
+
+
+def test_exceptions_count_as_500():
+    app = App(enable_cache=False)
+    metrics = Metrics(path=None)
+    app.use(metrics)
+
+    @app.get("api/boom")
+    def boom(req):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        app.routes[0]["view"](factory.get("/api/boom"))
+    stats = metrics.collect()[("api/boom", "GET")]
+    assert stats.statuses == {500: 1} and stats.in_flight == 0
+    assert all(route["name"] != "shanks_metrics" for route in app.routes)
+
+
+def test_exited_threads_are_folded_into_retired_totals():
+    metrics = Metrics(path=None, track_db=False)
+
+    def request():
+        with metrics.observe("api/ping", "GET") as observation:
+            observation.response = type("R", (), {"status_code": 200})()
+
+    for _ in range(5):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+    request()
+
+    assert len(metrics._shards) == 1
+    stats = metrics.collect()[("api/ping", "GET")]
+    assert stats.count == 6 and stats.statuses == {200: 6}
+
+
+def test_multiprocess_totals_are_merged(tmp_path):
+    metrics = Metrics(multiprocess_dir=str(tmp_path))
+    with metrics.observe("api/ping", "GET") as observation:
+        observation.response = type("R", (), {"status_code": 200})()
+
+    # A worker that has exited: its counters count, its gauges don't
+    exited = subprocess.run(
+        [sys.executable, "-c", "import os; print(os.getpid())"],
+        capture_output=True,
+        text=True,
+    )
+    worker = metrics.collect()[("api/ping", "GET")].to_dict()
+    worker["in_flight"] = 3
+    (tmp_path / "shanks-1.json").write_text(
+        json.dumps({"pid": int(exited.stdout), "routes": [["api/ping", "GET", worker]]})
+    )
+
+    totals = metrics.collect_all()[("api/ping", "GET")]
+    assert totals.count == 2 and totals.statuses == {200: 2}
+    assert totals.in_flight == 0
+
+
+def test_workers_flush_in_the_background(tmp_path, caplog):
+    directory = tmp_path / "metrics" / "workers"
+    metrics = Metrics(multiprocess_dir=str(directory), flush_interval=0.01)
+    assert directory.is_dir()
+
+    with metrics.observe("api/ping", "GET") as observation:
+        observation.response = type("R", (), {"status_code": 200})()
+    written = directory / f"shanks-{os.getpid()}.json"
+    deadline = time.monotonic() + 5
+    while not written.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert json.loads(written.read_text())["routes"][0][:2] == ["api/ping", "GET"]
+
+    # Concurrent flushes (flusher thread, scrapes) never share a temp file
+    threads = [
+        threading.Thread(target=lambda: [metrics.flush() for _ in range(20)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [p.name for p in directory.iterdir()] == [written.name]
+
+    # A failing flush is logged, never raised into a request or a scrape
+    metrics.multiprocess_dir = str(tmp_path / "missing")
+    with caplog.at_level(logging.ERROR, logger="shanks.metrics"):
+        with metrics.observe("api/ping", "GET") as observation:
+            observation.response = type("R", (), {"status_code": 200})()
+        assert metrics.collect_all() == {}
+    assert "Could not write metrics" in caplog.text
@@ -0,0 +1,111 @@
+"""Tests for N+1 query detection"""
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import App, Response, n_plus_one_detector
+from shanks.nplusone import QueryTracker, assert_no_n_plus_one, fingerprint
+
+from .models import Category, Post
+
+
+def _seed(count=5):
+    for i in range(count):
+        category = Category.create(slug=f"c{i}", name=f"Category {i}")
+        Post.create(title=f"Post {i}", category=category)
+
+
+def test_fingerprint_normalizes_literals():
+    """Queries differing only in literals share a shape"""
+    assert fingerprint("SELECT * FROM t WHERE id = 1") == fingerprint(
+        "SELECT *  FROM t WHERE id = 42"
+    )
+    assert fingerprint("SELECT * FROM t WHERE name = 'a'") == fingerprint(
+        "SELECT * FROM t WHERE name = 'it''s'"
+    )
+    assert fingerprint("SELECT * FROM t WHERE id IN (%s, %s)") == fingerprint(
+        "SELECT * FROM t WHERE id IN (%s, %s, %s)"
+    )
+
+
+@pytest.mark.django_db
+def test_tracker_reports_forward_fk_access():
+    """Lazy FK access in a loop is reported with a select_related hint"""
+    _seed()
+    tracker = QueryTracker(threshold=3)
+    with tracker.track():
+        names = [post.category.name for post in Post.find_many()]
+
+    assert len(names) == 5
+    (offender,) = tracker.report()
+    assert offender["count"] == 5
+    assert "test_nplusone.py" in offender["call_site"]
+    assert offender["suggestion"] == "Post.objects.select_related('category')"
+
+    tracker = QueryTracker(threshold=3)
+    with tracker.track():
+        [post.category.name for post in Post.find_many().select_related("category")]
+    assert tracker.report() == []
+
+
+@pytest.mark.django_db
+def test_tracker_suggests_prefetch_for_reverse_access():
+    """Reverse relation access in a loop suggests prefetch_related"""
+    _seed()
+    tracker = QueryTracker(threshold=3)
+    with tracker.track():
+        [list(category.posts.all()) for category in Category.find_many()]
+    (offender,) = tracker.report()
+    assert offender["suggestion"] == "Category.objects.prefetch_related('posts')"
+
+
+@pytest.mark.django_db
+def test_middleware_adds_header_and_logs(caplog):
+    """The middleware reports the matched route template"""
+    _seed()
+    app = App(enable_cache=False)
+    app.use(n_plus_one_detector(threshold=3))
+
+    @app.get("posts")
+    def list_posts(req):
+        return {"posts": [post.category.name for post in Post.find_many()]}
+
+    with caplog.at_level("WARNING", logger="shanks.nplusone"):
+        response = app.routes[0]["view"](RequestFactory().get("/posts"))
+
+    assert response.status_code == 200
+    assert response["X-N-Plus-One"] == "1 repeated; worst 5x"
+    assert "GET posts" in caplog.text
+    assert "select_related('category')" in caplog.text
+
+
+@pytest.mark.django_db
+def test_middleware_leaves_handler_response_untouched():
+    """The header goes on a copy, so a cached Response never carries it"""
+    _seed()
+    app = App(enable_cache=False)
+    app.use(n_plus_one_detector(threshold=3))
+    shared = Response({"ok": True}).header("X-Origin", "handler")
+
+    @app.get("posts")
+    def list_posts(req):
+        [post.category.name for post in Post.find_many()]
+        return shared
+
+    response = app.routes[0]["view"](RequestFactory().get("/posts"))
+
+    assert response["X-N-Plus-One"] == "1 repeated; worst 5x"
+    assert response["X-Origin"] == "handler"
+    assert shared._headers == {"X-Origin": "handler"}
+
+
+@pytest.mark.django_db
+def test_assert_no_n_plus_one_fails_on_repeats():
+    """The test helper raises with the formatted report"""
+    _seed()
+    with pytest.raises(AssertionError, match="N\\+1 queries detected"):
+        with assert_no_n_plus_one(threshold=3):
+            [post.category.name for post in Post.find_many()]
+
+    with assert_no_n_plus_one(threshold=3):
+        list(Post.find_many().select_related("category"))
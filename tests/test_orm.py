@@ -0,0 +1,235 @@
+"""Tests for the Prisma-like ORM helpers"""
+
+import json
+import sys
+import types
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import App
+from shanks.orm import _batch_size
+
+from .models import Category, Note, Post
+
+
+@pytest.mark.django_db
+def test_create_many_consumes_generators_in_batches():
+    """create_many accepts any iterable and reports the row count"""
+    category = Category.create(slug="news", name="News")
+    rows = ({"title": f"Post {i}", "category": category} for i in range(25))
+
+    assert Post.create_many(rows, batch_size=10) == 25
+    assert Post.count() == 25
+
+
+@pytest.mark.django_db
+def test_update_many_per_object_values():
+    """update_many saves different values per instance"""
+    category = Category.create(slug="news", name="News")
+    Post.create_many({"title": f"Post {i}", "category": category} for i in range(5))
+
+    posts = list(Post.find_many())
+    for post in posts:
+        post.views = post.id * 10
+    assert Post.update_many(posts, ["views"], batch_size=2) == 5
+    assert [p.views for p in Post.find_many()] == [p.id * 10 for p in posts]
+
+
+@pytest.mark.django_db
+def test_upsert_many_updates_conflicts():
+    """Existing rows are updated, new rows inserted"""
+    Category.create(slug="news", name="Old name")
+    Category.upsert_many(
+        [{"slug": "news", "name": "News"}, {"slug": "tech", "name": "Tech"}],
+        conflict_fields=["slug"],
+        update_fields=["name"],
+    )
+    assert Category.count() == 2
+    assert Category.find_unique(slug="news").name == "News"
+
+
+def test_batch_size_respects_backend_limit():
+    """SQLite's bound-parameter limit caps the batch size"""
+    fields = Post._meta.concrete_fields
+    assert _batch_size(Post, fields, batch_size=10) == 10
+    assert _batch_size(Post, fields, batch_size=10**9) < 10**9
+
+
+@pytest.mark.django_db
+def test_find_many_keyset_pagination_walks_all_rows():
+    """Following next_cursor visits every row exactly once"""
+    category = Category.create(slug="news", name="News")
+    # Duplicate sort values exercise the pk tiebreaker
+    Post.create_many(
+        {"title": f"Post {i}", "views": i // 3, "category": category} for i in range(10)
+    )
+
+    seen = []
+    cursor = None
+    while True:
+        page = Post.find_many(take=4, cursor=cursor, order_by=["-views"], count=True)
+        assert page.total == 10
+        seen.extend(post.id for post in page)
+        if not page.has_more:
+            assert page.next_cursor is None
+            break
+        cursor = page.next_cursor
+
+    expected = [p.id for p in Post.objects.order_by("-views", "-id")]
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_find_many_rejects_invalid_cursor():
+    """Tampered cursors raise ValueError"""
+    with pytest.raises(ValueError):
+        Post.find_many(take=5, cursor="not-a-cursor")
+
+
+def _generated_module(monkeypatch, name, source):
+    """Run generated code as module `name`, creating its parent packages"""
+    parts = name.split(".")
+    for i in range(1, len(parts)):
+        package = ".".join(parts[:i])
+        if package not in sys.modules:
+            monkeypatch.setitem(sys.modules, package, types.ModuleType(package))
+    module = types.ModuleType(name)
+    monkeypatch.setitem(sys.modules, name, module)
+    if len(parts) > 1:
+        monkeypatch.setattr(sys.modules[package], parts[-1], module, raising=False)
+    exec(compile(source, name, "exec"), module.__dict__)
+    return module
+
+
+@pytest.mark.django_db
+def test_crud_templates_list_with_cursors(monkeypatch):
+    """Generated repository/service/controller code pages through real rows"""
+    from django.contrib.auth.models import User
+
+    from shanks.cli.crud_templates import (
+        get_controller_template,
+        get_repository_template,
+        get_service_template,
+    )
+    from shanks.cli.templates import get_base_dto_template
+
+    _generated_module(
+        monkeypatch, "db.entity.note_entity", "from tests.models import Note"
+    )
+    _generated_module(monkeypatch, "dto.base_dto", get_base_dto_template())
+    repository = _generated_module(
+        monkeypatch,
+        "internal.repository.note_repository",
+        get_repository_template("Note", "note"),
+    )
+    _generated_module(
+        monkeypatch,
+        "internal.service.note_service",
+        get_service_template("Note", "note", "notes"),
+    )
+    controller = _generated_module(
+        monkeypatch,
+        "internal.controller.note_controller",
+        get_controller_template("Note", "note", "notes"),
+    )
+
+    user = User.objects.create(username="ana")
+    for i in range(5):
+        repository.create_item(f"Note {i}", "", user)
+
+    app = App(enable_cache=False)
+    app.get("notes")(controller.list_notes)
+    view = app.routes[0]["view"]
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2, "total": "true"}
+        if cursor:
+            params["cursor"] = cursor
+        body = json.loads(view(RequestFactory().get("/notes", params)).content)
+        assert body["status"] == 200
+        assert body["pagination"]["total"] == 5
+        titles.extend(item["title"] for item in body["data"])
+        cursor = body["pagination"]["next_cursor"]
+        if not body["pagination"]["has_more"]:
+            break
+    expected = [n.title for n in Note.objects.order_by("-created_at", "-id")]
+    assert titles == expected
+
+    invalid = view(RequestFactory().get("/notes", {"cursor": "bogus"}))
+    assert json.loads(invalid.content)["status"] == 400
+
+    for limit in ("0", "-1", "ten"):
+        invalid = json.loads(
+            view(RequestFactory().get("/notes", {"limit": limit})).content
+        )
+        assert invalid["status"] == 400
+        assert "limit" in invalid["message"]
+    capped = json.loads(view(RequestFactory().get("/notes", {"limit": 500})).content)
+    assert capped["pagination"]["limit"] == 100
+
+
+@pytest.mark.django_db
+def test_find_many_select_returns_dicts_and_tuples():
+    """select= compiles to values()/values_list() with joined relations"""
+    category = Category.create(slug="news", name="News")
+    Post.create(title="Hello", views=3, category=category)
+
+    rows = list(Post.find_many(select=["id", "title", "category.name"]))
+    assert rows == [{"id": rows[0]["id"], "title": "Hello", "category.name": "News"}]
+
+    rows = list(Post.find_many(select=["title", "category.slug"], as_tuples=True))
+    assert rows == [("Hello", "news")]
+
+
+@pytest.mark.django_db
+def test_find_many_select_with_pagination():
+    """Projected pages still produce working cursors"""
+    category = Category.create(slug="news", name="News")
+    Post.create_many(
+        {"title": f"Post {i}", "views": i, "category": category} for i in range(5)
+    )
+
+    page = Post.find_many(take=3, order_by=["-views"], select=["title"])
+    assert page.items == [{"title": "Post 4"}, {"title": "Post 3"}, {"title": "Post 2"}]
+    page = Post.find_many(
+        take=3, order_by=["-views"], select=["title"], cursor=page.next_cursor
+    )
+    assert page.items == [{"title": "Post 1"}, {"title": "Post 0"}]
+    assert not page.has_more
+
+
+@pytest.mark.django_db
+def test_find_many_order_by_string():
+    """A single order_by string is one field, with or without take"""
+    category = Category.create(slug="news", name="News")
+    Post.create_many(
+        {"title": f"Post {i}", "views": i, "category": category} for i in range(3)
+    )
+    assert [p.views for p in Post.find_many(order_by="-views")] == [2, 1, 0]
+    assert [p.views for p in Post.find_many(take=2, order_by="-views")] == [2, 1]
+
+
+@pytest.mark.django_db
+def test_find_many_keyset_pagination_over_nullable_column():
+    """Rows with NULL sort values sort last and are still paged through"""
+    category = Category.create(slug="news", name="News")
+    ratings = [3, None, 1, None, 3, 2, None]
+    Post.create_many(
+        {"title": f"Post {i}", "rating": rating, "category": category}
+        for i, rating in enumerate(ratings)
+    )
+
+    for order_by in (["rating"], ["-rating"]):
+        seen, cursor = [], None
+        while True:
+            page = Post.find_many(take=2, cursor=cursor, order_by=order_by)
+            seen.extend(post.rating for post in page)
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+        present = sorted(r for r in ratings if r is not None)
+        if order_by == ["-rating"]:
+            present.reverse()
+        assert seen == present + [None, None, None]
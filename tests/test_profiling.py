@@ -0,0 +1,109 @@
+"""Tests for the sampling request profiler"""
+
+import json
+import marshal
+import sys
+import time
+
+from django.test import RequestFactory, override_settings
+
+from shanks import App, Profiler
+from shanks.profiling import DEFAULT_MODE, sign, verify
+
+factory = RequestFactory()
+
+AUTH = {"HTTP_AUTHORIZATION": "Bearer s3cret"}
+
+
+def _view(app, name):
+    return [route for route in app.routes if route["name"] == name][0]["view"]
+
+
+def _fetch(app, **params):
+    return _view(app, "shanks_profiler")(factory.get("/_profile", params, **AUTH))
+
+
+def crunch_numbers():
+    return sum(i * i for i in range(2000))
+
+
+def test_one_in_n_requests_are_profiled_per_route():
+    app = App(enable_cache=False)
+    profiler = Profiler(every=2, mode="cprofile", token="s3cret")
+    app.use(profiler)
+
+    @app.get("api/report")
+    def report(req):
+        return {"total": crunch_numbers()}
+
+    view = _view(app, "report")
+    for _ in range(4):
+        assert view(factory.get("/api/report")).status_code == 200
+
+    index = json.loads(_fetch(app).content)
+    assert index == {
+        "mode": "cprofile",
+        "routes": [{"route": "api/report", "method": "GET", "requests": 2}],
+    }
+    text = _fetch(app, route="api/report").content.decode()
+    assert "crunch_numbers" in text
+    stats = marshal.loads(_fetch(app, route="api/report", format="pstats").content)
+    assert any(func[2] == "crunch_numbers" for func in stats)
+
+    unauthorized = _view(app, "shanks_profiler")(factory.get("/_profile"))
+    assert unauthorized.status_code == 401
+    assert _fetch(app, route="api/other").status_code == 404
+    assert _fetch(app, route="api/report", format="collapsed").status_code == 404
+
+
+def test_default_mode_follows_the_python_version():
+    """cProfile sees every thread from Python 3.12, so the sampler is used"""
+    expected = "sample" if sys.version_info >= (3, 12) else "cprofile"
+    assert DEFAULT_MODE == expected
+    assert Profiler(path=None).mode == expected
+
+
+def test_signed_requests_are_always_profiled():
+    app = App(enable_cache=False)
+    profiler = Profiler(every=0, secret="key", path=None)
+    app.use(profiler)
+
+    @app.get("api/ping")
+    def ping(req):
+        return {"pong": True}
+
+    view = app.routes[0]["view"]
+    view(factory.get("/api/ping"))
+    view(factory.get("/api/ping", HTTP_X_SHANKS_PROFILE=sign("other-key")))
+    assert profiler.routes() == []
+
+    view(factory.get("/api/ping", HTTP_X_SHANKS_PROFILE=sign("key")))
+    assert profiler.get("api/ping").requests == 1
+    assert not verify("key", sign("key", ttl=-1))
+    assert not verify("key", "garbage")
+
+
+def test_sampling_mode_collects_collapsed_stacks(tmp_path):
+    app = App(enable_cache=False)
+    profiler = Profiler(every=1, mode="sample", interval=0.001, dump_dir=str(tmp_path))
+    app.use(profiler)
+
+    @app.get("api/slow")
+    def slow(req):
+        time.sleep(0.05)
+        return {"slow": True}
+
+    _view(app, "slow")(factory.get("/api/slow"))
+
+    collapsed = profiler.collapsed("api/slow")
+    samples = dict(line.rsplit(" ", 1) for line in collapsed.splitlines())
+    assert any("slow (test_profiling.py:" in stack for stack in samples)
+    assert all(int(n) > 0 for n in samples.values())
+    assert [p.name.split(".", 1)[0] for p in tmp_path.iterdir()] == ["GET_api_slow"]
+
+    # Without a token the endpoint is only served in DEBUG
+    endpoint = _view(app, "shanks_profiler")
+    request = factory.get("/_profile", {"route": "api/slow", "format": "collapsed"})
+    assert endpoint(request).status_code == 403
+    with override_settings(DEBUG=True):
+        assert endpoint(request).content.decode() == collapsed
@@ -0,0 +1,162 @@
+"""Tests for the ORM query result cache"""
+
+import pytest
+from django.db import transaction
+
+from shanks import get_cache
+from shanks.nplusone import QueryTracker
+from shanks.querycache import generation, query_key, resolve_ttl
+
+from .models import Category, Post
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+def _queries(func):
+    tracker = QueryTracker()
+    with tracker.track():
+        result = func()
+    return result, tracker.total
+
+
+@pytest.mark.django_db
+def test_find_unique_is_served_from_cache():
+    """Repeated lookups hit the database once, including misses"""
+    Category.create(slug="news", name="News")
+
+    first, queries = _queries(lambda: Category.find_unique(slug="news", cache=60))
+    assert first.name == "News" and queries == 1
+    second, queries = _queries(lambda: Category.find_unique(slug="news", cache=60))
+    assert second == first and queries == 0
+    assert second is not first
+
+    Category.find_unique(slug="nope", cache=60)
+    missing, queries = _queries(lambda: Category.find_unique(slug="nope", cache=60))
+    assert missing is None and queries == 0
+
+
+@pytest.mark.django_db
+def test_writes_bump_the_model_generation():
+    """save(), delete(), update() and bulk_create() invalidate cached reads"""
+    category = Category.create(slug="news", name="News")
+    assert Category.count(cache=60) == 1
+
+    Category.create(slug="tech", name="Tech")
+    assert Category.count(cache=60) == 2
+
+    Category.update({"slug": "tech"}, {"name": "Technology"})
+    assert Category.find_first(slug="tech", cache=60).name == "Technology"
+    Category.update({"slug": "tech"}, {"name": "Tech"})
+    assert Category.find_first(slug="tech", cache=60).name == "Tech"
+
+    Category.create_many([{"slug": "art", "name": "Art"}])
+    assert len(Category.find_many(cache=60)) == 3
+
+    category.delete()
+    assert Category.count(cache=60) == 2
+
+
+@pytest.mark.django_db
+def test_writes_in_a_transaction_bump_again_on_commit(
+    django_capture_on_commit_callbacks,
+):
+    """Reads cached before the commit are evicted once the writes are visible"""
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with transaction.atomic():
+            Category.create(slug="news", name="News")
+            Category.update({"slug": "news"}, {"name": "Headlines"})
+            # Stands in for a reader that caches the pre-commit state
+            assert Category.count(cache=60) == 1
+            during = generation(Category)
+    assert len(callbacks) == 2
+    assert generation(Category) != during
+
+    Category.create(slug="tech", name="Tech")
+    assert Category.count(cache=60) == 2
+
+
+@pytest.mark.django_db
+def test_generations_are_per_model():
+    """Writing one model keeps other models' entries cached"""
+    category = Category.create(slug="news", name="News")
+    Category.count(cache=60)
+    Post.create(title="Hello", category=category)
+
+    _, queries = _queries(lambda: Category.count(cache=60))
+    assert queries == 0
+
+
+def test_key_is_independent_of_filter_order():
+    a = Post.objects.filter(title="a", views=1)
+    b = Post.objects.filter(views=1, title="a")
+    assert query_key(Post, "many", a) == query_key(Post, "many", b)
+    assert query_key(Post, "many", Post.objects.filter(id__in=[])) is None
+
+
+def test_resolve_ttl_uses_meta_policy():
+    assert resolve_ttl(Post, None) is None
+    assert resolve_ttl(Post, True) == 60
+    Post._meta.shanks_cache = 30
+    try:
+        assert resolve_ttl(Post, None) == 30
+        assert resolve_ttl(Post, False) is None
+    finally:
+        del Post._meta.shanks_cache
+
+
+def test_django_cache_invalidation_keeps_the_rest_of_the_alias():
+    """Invalidating the Shanks namespace leaves other keys in the alias"""
+    from django.core.cache import cache as django_cache
+
+    from shanks import DjangoCache
+
+    backend = DjangoCache("default")
+    django_cache.set("session:abc", "alive")
+    backend.set("page", {"hello": "world"}, ttl=60, path="/api/posts")
+    assert backend.get("page") == {"hello": "world"}
+    assert django_cache.get("page") is None
+
+    backend.invalidate_pattern("/api/posts")
+    assert backend.get("page") is None
+    assert django_cache.get("session:abc") == "alive"
+
+    backend.set("page", 1)
+    backend.clear()
+    assert backend.get("page") is None
+    assert django_cache.get("session:abc") == "alive"
+
+
+@pytest.mark.django_db
+def test_old_generations_do_not_grow_the_simple_cache():
+    """The default backend is bounded: stale generations are evicted"""
+    from shanks import set_cache
+    from shanks.cache import SimpleCache
+
+    previous = get_cache()
+    backend = set_cache(SimpleCache(max_entries=20))
+    try:
+        category = Category.create(slug="news", name="News")
+        for i in range(50):
+            Category.find_unique(slug="news", cache=60)
+            category.name = f"News {i}"
+            category.save()
+        assert len(backend) == 20
+        assert Category.find_unique(slug="news", cache=60).name == "News 49"
+    finally:
+        set_cache(previous)
+
+
+def test_simple_cache_sweeps_expired_entries():
+    """Expired entries are dropped on the next write, even if never read"""
+    from shanks.cache import SimpleCache
+
+    backend = SimpleCache(sweep_interval=0)
+    backend.set("old", 1, ttl=0, path="/a")
+    backend.set("new", 2, ttl=60)
+    assert len(backend) == 1 and backend.get("new") == 2
+    assert backend.get("old") is None
@@ -0,0 +1,146 @@
+"""Tests for the rate limiting middleware"""
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import App, RateLimit, Request
+from shanks.ratelimit import MemoryBackend, RedisBackend, _client_ip, _decide
+
+
+def _app(limiter):
+    app = App(enable_cache=False)
+    app.use(limiter)
+
+    @app.post("api/auth/login")
+    def login(req):
+        return {"ok": True}
+
+    @app.get("api/posts")
+    def posts(req):
+        return {"posts": []}
+
+    return app
+
+
+def test_token_bucket_refills_over_time():
+    """5 requests per 10s: burst of 5, then one every 2 seconds"""
+    tat = 0.0
+    for expected in (4, 3, 2, 1, 0):
+        decision, tat = _decide(0.0, tat, 2.0, 5)
+        assert decision.allowed and decision.remaining == expected
+
+    decision, new_tat = _decide(0.0, tat, 2.0, 5)
+    assert not decision.allowed and new_tat is None
+    assert decision.retry_after == pytest.approx(2.0)
+
+    decision, _ = _decide(2.0, tat, 2.0, 5)
+    assert decision.allowed and decision.remaining == 0
+
+
+def test_middleware_sets_headers_and_rejects():
+    app = _app(RateLimit(limit=2, period=60))
+    view = app.routes[1]["view"]
+    factory = RequestFactory()
+
+    first = view(factory.get("/api/posts"))
+    assert first.status_code == 200
+    assert first["RateLimit-Limit"] == "2"
+    assert first["RateLimit-Remaining"] == "1"
+    assert first["RateLimit-Policy"] == "2;w=60"
+
+    view(factory.get("/api/posts"))
+    rejected = view(factory.get("/api/posts"))
+    assert rejected.status_code == 429
+    assert rejected["RateLimit-Remaining"] == "0"
+    assert rejected["Retry-After"] == "30"
+
+    # Another client has its own bucket
+    other = view(factory.get("/api/posts", REMOTE_ADDR="10.0.0.2"))
+    assert other.status_code == 200
+
+
+def test_routes_filter_and_user_key():
+    limiter = RateLimit(limit=1, period=60, key=("user", "route"), routes=["login"])
+    app = _app(limiter)
+    login, posts = app.routes[0]["view"], app.routes[1]["view"]
+    factory = RequestFactory()
+
+    assert login(factory.post("/api/auth/login")).status_code == 200
+    assert login(factory.post("/api/auth/login")).status_code == 429
+    # Unlisted routes are not limited and get no headers
+    response = posts(factory.get("/api/posts"))
+    assert response.status_code == 200 and "RateLimit-Limit" not in response
+
+    with pytest.raises(ValueError):
+        RateLimit(key="session")
+
+
+def test_trust_proxy_reads_forwarded_for_from_the_right():
+    """Client-supplied X-Forwarded-For entries can't pick the bucket"""
+    factory = RequestFactory()
+
+    def ip(trust_proxy, forwarded):
+        request = factory.get(
+            "/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=forwarded
+        )
+        return _client_ip(Request(request), trust_proxy)
+
+    assert ip(False, "1.2.3.4") == "10.0.0.1"
+    assert ip(True, "spoofed, 203.0.113.7") == "203.0.113.7"
+    assert ip(2, "spoofed, 203.0.113.7, 10.0.0.9") == "203.0.113.7"
+    # Fewer entries than proxies: the header didn't come through all of them
+    assert ip(2, "203.0.113.7") == "10.0.0.1"
+
+    with pytest.raises(ValueError):
+        RateLimit(trust_proxy=-1)
+
+
+def test_memory_backend_bounds_its_table():
+    backend = MemoryBackend(max_keys=10)
+    for i in range(11):
+        backend.hit(f"ip:{i}", 60.0, 5)
+    assert len(backend._tats) == 9
+    assert "ip:0" not in backend._tats and "ip:10" in backend._tats
+
+
+def test_redis_backend_script():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    backend = RedisBackend(client=fakeredis.FakeRedis(decode_responses=True))
+
+    decisions = [backend.hit("ip:1", 30.0, 2) for _ in range(3)]
+    assert [d.allowed for d in decisions] == [True, True, False]
+    assert [d.remaining for d in decisions] == [1, 0, 0]
+    assert decisions[2].retry_after == pytest.approx(30.0, abs=1)
+    assert 0 < backend.client.pttl("shanks:ratelimit:ip:1") <= 60000
+
+
+def test_cached_responses_are_limited_per_client():
+    """The limiter runs ahead of the response cache, whatever the use() order"""
+    from shanks import Response
+    from shanks.cache import get_cache
+
+    get_cache().clear()
+    app = App()
+    app.use(RateLimit(limit=2, period=60))
+
+    @app.get("api/posts")
+    def posts(req):
+        return Response({"posts": []}).header("X-Handler", "1")
+
+    view = app.routes[0]["view"]
+    factory = RequestFactory()
+    try:
+        first = view(factory.get("/api/posts"))
+        second = view(factory.get("/api/posts"))
+        assert (first["RateLimit-Remaining"], second["RateLimit-Remaining"]) == (
+            "1",
+            "0",
+        )
+        assert second["X-Handler"] == "1"
+        assert view(factory.get("/api/posts")).status_code == 429
+
+        other = view(factory.get("/api/posts", REMOTE_ADDR="10.0.0.2"))
+        assert other.status_code == 200 and other["RateLimit-Remaining"] == "1"
+    finally:
+        get_cache().clear()
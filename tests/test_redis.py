@@ -0,0 +1,156 @@
+"""Tests for the pooled Redis helper and the Redis cache backend"""
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from shanks import RedisCache, get_cache, set_cache  # noqa: E402
+from shanks.db import Redis  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    saved = (Redis._client, Redis._binary_client, Redis._pool_options)
+    server = fakeredis.FakeServer()
+    Redis.connect(
+        max_connections=8, connection_class=fakeredis.FakeRedisConnection, server=server
+    )
+    yield server
+    Redis._client, Redis._binary_client, Redis._pool_options = saved
+    Redis._async_options = None
+
+
+def test_connect_uses_an_explicit_pool(server):
+    pool = Redis.client.connection_pool
+    assert Redis.client is Redis.get_client()
+    assert pool.max_connections == 8
+    assert pool.connection_kwargs["health_check_interval"] == 30
+    assert pool.connection_kwargs["socket_keepalive"] is True
+
+    assert pool.timeout == 5.0
+
+    Redis.client.set("greeting", "hello")
+    assert Redis.client.get("greeting") == "hello"
+    stats = Redis.pool_stats()
+    assert stats["max_connections"] == 8
+    assert stats["created"] == stats["idle"] == 1 and stats["in_use"] == 0
+
+
+def test_exhausted_pool_waits_then_times_out(server):
+    import redis
+
+    Redis.connect(
+        max_connections=1,
+        pool_timeout=0.05,
+        connection_class=fakeredis.FakeRedisConnection,
+        server=server,
+    )
+    pool = Redis.client.connection_pool
+    held = pool.get_connection()
+    try:
+        assert Redis.pool_stats()["in_use"] == 1
+        with pytest.raises(redis.ConnectionError):
+            Redis.client.get("greeting")
+    finally:
+        pool.release(held)
+    assert Redis.client.get("greeting") is None
+
+
+def test_client_is_an_attribute_error_until_connected(server):
+    Redis._client = None
+    assert not hasattr(Redis, "client")
+    with pytest.raises(RuntimeError):
+        Redis.get_client()
+
+
+def test_pipeline_batch_flushes_every_size_commands(server):
+    with Redis.pipeline_batch(size=10) as pipe:
+        for i in range(25):
+            pipe.set(f"key:{i}", i)
+        assert len(pipe.results) == 20
+    assert len(pipe.results) == 25
+    assert Redis.client.get("key:24") == "24"
+
+    with pytest.raises(RuntimeError):
+        with Redis.pipeline_batch(size=10) as pipe:
+            pipe.set("lost", 1)
+            raise RuntimeError("boom")
+    assert Redis.client.get("lost") is None
+
+
+def test_binary_client_returns_bytes(server):
+    payload = bytes(range(256))
+    Redis.get_binary_client().set("blob", payload)
+    assert Redis.get_binary_client().get("blob") == payload
+    assert Redis.client.get("greeting") is None
+
+
+def test_decode_responses_is_respected(server):
+    Redis.connect(
+        decode_responses=False,
+        connection_class=fakeredis.FakeRedisConnection,
+        server=server,
+    )
+    Redis.client.set("greeting", "hello")
+    assert Redis.client.get("greeting") == b"hello"
+    assert Redis.get_binary_client() is Redis.client
+    with pytest.raises(TypeError):
+        Redis.connect_async(decode_responses=True)
+
+
+def test_pool_stats_without_blocking_pool_internals(server):
+    import redis
+
+    Redis._client = redis.Redis(
+        connection_pool=redis.ConnectionPool(
+            connection_class=fakeredis.FakeRedisConnection, server=server
+        )
+    )
+    Redis.client.set("greeting", "hello")
+    stats = Redis.pool_stats()
+    assert stats["created"] == stats["idle"] == 1 and stats["in_use"] == 0
+
+    Redis.client.connection_pool = object()
+    assert Redis.pool_stats() == {
+        "max_connections": None,
+        "created": None,
+        "in_use": None,
+        "idle": None,
+    }
+
+
+def test_async_client_shares_the_server(server):
+    Redis.connect_async(
+        connection_class=fakeredis.FakeAsyncRedisConnection,
+        # fakeredis answers health-check PINGs differently from a real server
+        health_check_interval=0,
+    )
+
+    async def main():
+        client = Redis.get_async_client()
+        assert client is Redis.get_async_client()
+        await client.set("counter", 1)
+        return await client.incr("counter")
+
+    assert asyncio.run(main()) == 2
+    assert Redis.client.get("counter") == "2"
+
+
+def test_redis_cache_backend(server):
+    previous = get_cache()
+    set_cache(RedisCache())
+    try:
+        cache = get_cache()
+        cache.set("a", {"value": b"\x00\xff"}, ttl=60, path="/api/posts")
+        cache.set("b", [1, 2], ttl=60, path="/api/users")
+        assert cache.get("a") == {"value": b"\x00\xff"}
+
+        cache.invalidate_pattern("posts")
+        assert cache.get("a") is None and cache.get("b") == [1, 2]
+
+        cache.clear()
+        assert cache.get("b") is None
+    finally:
+        set_cache(previous)
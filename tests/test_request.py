@@ -0,0 +1,44 @@
+"""Tests for the slot-based Request wrapper"""
+
+import json
+
+from django.test import RequestFactory
+
+from shanks import App, Request
+
+
+def test_request_lazy_body_is_parsed_once():
+    """Body is parsed on first access and then reused"""
+    django_req = RequestFactory().post(
+        "/items", data=json.dumps({"name": "shanks"}), content_type="application/json"
+    )
+    req = Request(django_req)
+    assert req.body == {"name": "shanks"}
+    assert req.body is req.body
+    assert req.method == "POST"
+    assert req.path == "/items"
+
+
+def test_request_state_and_legacy_attributes():
+    """Ad-hoc attributes are stored in req.state instead of an instance dict"""
+    req = Request(RequestFactory().get("/"))
+    assert not hasattr(req, "__dict__")
+    assert req._state is None
+
+    req.user_id = 7
+    assert req.user_id == 7
+    assert req.state.user_id == 7
+    assert req.state.get("missing", "default") == "default"
+    assert not hasattr(req, "missing")
+
+
+def test_request_params_from_router():
+    """URL kwargs are exposed through req.params"""
+    app = App(enable_cache=False)
+
+    @app.get("posts/<post_id>")
+    def get_post(req, post_id):
+        return {"params": req.params}
+
+    response = app.routes[0]["view"](RequestFactory().get("/posts/5"), post_id="5")
+    assert json.loads(response.content) == {"params": {"post_id": "5"}}
@@ -0,0 +1,94 @@
+"""Tests for streaming queries and streaming responses"""
+
+import json
+
+import pytest
+
+from django.test import RequestFactory
+
+from shanks import App, cache, stream_response
+from shanks.cache import get_cache
+from shanks.nplusone import QueryTracker
+
+from .models import Category, Post
+
+
+@pytest.fixture
+def posts():
+    category = Category.create(slug="news", name="News")
+    Post.create_many(
+        {"title": f"Post {i}", "views": i % 3, "category": category} for i in range(10)
+    )
+
+
+@pytest.mark.django_db
+def test_stream_uses_chunked_keyset_scans(posts):
+    """Each chunk is one bounded query and every row is visited once"""
+    tracker = QueryTracker()
+    with tracker.track():
+        ids = [post.id for post in Post.find_many().stream(chunk_size=4)]
+
+    assert ids == list(Post.objects.values_list("id", flat=True))
+    assert tracker.total == 3
+
+
+@pytest.mark.django_db
+def test_stream_respects_queryset_ordering_and_filters(posts):
+    expected = list(
+        Post.objects.filter(views__gt=0).order_by("-views", "-id").values_list("id")
+    )
+    streamed = Post.find_many(views__gt=0, order_by=["-views"]).stream(chunk_size=3)
+    assert [(post.id,) for post in streamed] == expected
+    assert len(list(Post.iterate_all(chunk_size=3, views=0))) == 4
+
+
+@pytest.mark.django_db
+def test_stream_projection_falls_back_to_iterator(posts):
+    rows = list(Post.find_many(select=["title"]).stream(chunk_size=3))
+    assert rows[0] == {"title": "Post 0"}
+    assert len(rows) == 10
+
+
+def test_stream_response_formats():
+    rows = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+
+    response = stream_response(iter(rows))
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == rows
+
+    response = stream_response(iter(rows), format="json")
+    assert json.loads(b"".join(response.streaming_content)) == rows
+    response = stream_response(iter([]), format="json")
+    assert json.loads(b"".join(response.streaming_content)) == []
+
+    response = stream_response(iter(rows), format="csv", filename="out.csv")
+    assert b"".join(response.streaming_content) == b"id,name\r\n1,a\r\n2,b\r\n"
+    assert response["Content-Disposition"] == 'attachment; filename="out.csv"'
+
+
+@pytest.mark.django_db
+def test_streamed_exports_are_never_cached(posts):
+    """Every request to a cached export route streams the full body"""
+    get_cache().clear()
+    app = App()
+
+    @app.get("api/posts/export")
+    def export_posts(req):
+        return stream_response(Post.find_many(select=["id"]).stream())
+
+    @app.get("api/posts/export-decorated")
+    @cache(ttl=60)
+    def export_decorated(req):
+        return stream_response(Post.find_many(select=["id"]).stream())
+
+    try:
+        for route, path in zip(
+            app.routes, ["/api/posts/export", "/api/posts/export-decorated"]
+        ):
+            for _ in range(2):
+                response = route["view"](RequestFactory().get(path))
+                assert "X-Cache" not in response
+                assert len(b"".join(response.streaming_content).splitlines()) == 10
+    finally:
+        get_cache().clear()
@@ -0,0 +1,115 @@
+"""Tests for per-phase request timing (Server-Timing)"""
+
+import logging
+import re
+import time
+
+import pytest
+from django.test import RequestFactory, override_settings
+
+from shanks import App, ServerTiming
+from shanks.cache import get_cache
+
+from .models import Category
+
+factory = RequestFactory()
+
+
+def _phases(header):
+    return {
+        name: float(duration)
+        for name, duration in re.findall(r"([^\s,;]+);dur=([\d.]+)", header)
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+@pytest.mark.django_db
+@override_settings(DEBUG=True)
+def test_each_phase_reports_its_own_time():
+    app = App()
+    app.use(ServerTiming(log=False))
+
+    def slow_auth(req, res, next):
+        time.sleep(0.02)
+        return next()
+
+    app.use(slow_auth)
+
+    @app.get("api/categories")
+    def categories(req):
+        time.sleep(0.01)
+        return {"count": Category.count()}
+
+    response = app.routes[0]["view"](factory.get("/api/categories"))
+    phases = _phases(response["Server-Timing"])
+    assert list(phases)[:3] == ["app", "auto_cache", "smart_cache_invalidation"]
+    assert {"slow_auth", "handler", "db", "serialize", "total"} <= set(phases)
+    # Exclusive: the auth middleware's time excludes the handler it wraps
+    assert phases["slow_auth"] >= 20 and phases["handler"] >= 10
+    parts = sum(v for k, v in phases.items() if k != "total")
+    assert parts == pytest.approx(phases["total"], abs=0.1)
+
+    # A cache hit stops in auto_cache
+    cached = app.routes[0]["view"](factory.get("/api/categories"))
+    assert "handler" not in _phases(cached["Server-Timing"])
+
+    # The header is only sent in DEBUG unless asked for
+    with override_settings(DEBUG=False):
+        assert "Server-Timing" not in app.routes[0]["view"](factory.get("/api/x"))
+
+
+def test_structured_log_and_header_switch(caplog):
+    app = App(enable_cache=False)
+    app.use(ServerTiming(header=lambda req: "HTTP_X_DEBUG" in req.META))
+    api = app.group("api")
+
+    @api.get("ping")
+    def ping(req):
+        return {"pong": True}
+
+    view = api.routes[0]["view"]
+    with caplog.at_level(logging.INFO, logger="shanks.timing"):
+        assert "Server-Timing" not in view(factory.get("/api/ping"))
+        assert "Server-Timing" in view(factory.get("/api/ping", HTTP_X_DEBUG="1"))
+
+    record = caplog.records[0]
+    assert (record.route, record.method, record.status) == ("api/ping", "GET", 200)
+    assert set(record.timing) == {"app", "handler", "serialize"}
+    assert record.duration_ms == pytest.approx(sum(record.timing.values()), abs=0.01)
+
+
+def test_disabled_by_default():
+    app = App(enable_cache=False)
+
+    @app.get("api/ping")
+    def ping(req):
+        return {"pong": True}
+
+    assert app._timing is None
+    assert "Server-Timing" not in app.routes[0]["view"](factory.get("/api/ping"))
+
+
+def test_legacy_middleware_is_timed_and_passes_results_through():
+    app = App(enable_cache=False)
+    app.use(ServerTiming(header=True, log=False))
+    calls = []
+
+    def legacy(req):
+        return None
+
+    app.use(legacy)
+
+    @app.get("api/ping")
+    def ping(req):
+        calls.append(True)
+        return {"pong": True}
+
+    response = app.routes[0]["view"](factory.get("/api/ping"))
+    assert response.status_code == 200 and calls == [True]
+    assert "legacy" in _phases(response["Server-Timing"])
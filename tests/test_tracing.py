@@ -0,0 +1,117 @@
+"""Tests for OpenTelemetry tracing"""
+
+import pytest
+from django.test import RequestFactory
+
+from shanks import App, Tracing
+from shanks.cache import get_cache
+from shanks.tracing import inject, span
+
+from .models import Category
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.trace import SpanKind, StatusCode  # noqa: E402
+
+factory = RequestFactory()
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+def _by_name(tracing):
+    return {s.name: s for s in tracing.exporter.get_finished_spans()}
+
+
+@pytest.mark.django_db
+def test_request_middleware_cache_and_sql_spans():
+    tracing = Tracing.in_memory()
+    app = App()
+    app.use(tracing)
+
+    def auth(req, res, next):
+        return next()
+
+    app.use(auth)
+
+    @app.get("api/categories/<slug>")
+    def category(req, slug):
+        found = Category.find_unique(slug=slug)
+        return {"found": found is not None}
+
+    view = app.routes[0]["view"]
+    request = factory.get("/api/categories/news", HTTP_TRACEPARENT=TRACEPARENT)
+    response = view(request, slug="news")
+    assert response.status_code == 200
+
+    spans = _by_name(tracing)
+    server = spans["GET api/categories/<slug>"]
+    assert server.kind == SpanKind.SERVER
+    assert format(server.context.trace_id, "032x") == TRACE_ID
+    assert server.attributes["http.route"] == "api/categories/<slug>"
+    assert server.attributes["http.response.status_code"] == 200
+
+    lookup = spans["cache get"]
+    assert lookup.attributes["shanks.cache.hit"] is False
+    assert "cache set" in spans
+    sql = spans["SELECT"]
+    assert sql.kind == SpanKind.CLIENT and sql.attributes["db.system"] == "sqlite"
+    assert "slug" in sql.attributes["db.statement"]
+
+    # Parent chain: SELECT -> auth -> smart_cache_invalidation -> auto_cache
+    parents = {s.context.span_id: s for s in spans.values()}
+    chain, current = [], sql
+    while current.parent is not None and current.parent.span_id in parents:
+        current = parents[current.parent.span_id]
+        chain.append(current.name)
+    assert chain == [
+        "middleware auth",
+        "middleware smart_cache_invalidation",
+        "middleware auto_cache",
+        "GET api/categories/<slug>",
+    ]
+
+    tracing.exporter.clear()
+    view(factory.get("/api/categories/news"), slug="news")
+    spans = _by_name(tracing)
+    assert spans["cache get"].attributes["shanks.cache.hit"] is True
+    assert "SELECT" not in spans
+
+
+def test_errors_and_outbound_propagation():
+    tracing = Tracing.in_memory(propagate=False)
+    app = App(enable_cache=False)
+    app.use(tracing)
+    outbound = {}
+
+    @app.get("api/boom")
+    def boom(req):
+        with span("call upstream", attempt=1):
+            outbound.update(inject())
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        app.routes[0]["view"](factory.get("/api/boom", HTTP_TRACEPARENT=TRACEPARENT))
+
+    spans = _by_name(tracing)
+    server = spans["GET api/boom"]
+    assert server.status.status_code == StatusCode.ERROR
+    assert format(server.context.trace_id, "032x") != TRACE_ID
+    upstream = spans["call upstream"]
+    assert upstream.attributes["attempt"] == 1
+    assert outbound["traceparent"].split("-")[2] == format(
+        upstream.context.span_id, "016x"
+    )
+
+
+def test_spans_are_noops_outside_traced_requests():
+    with span("anything") as current:
+        assert current is None
+    assert inject() == {}
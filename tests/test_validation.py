@@ -0,0 +1,129 @@
+"""Tests for declarative body validation"""
+
+import json
+
+from django.test import RequestFactory
+
+from shanks import App, Validator
+from shanks.swagger import SwaggerUI
+
+POST_SCHEMA = {
+    "title": "string:10",
+    "email": "email",
+    "views": "number:blank",
+    "published": {"type": "boolean", "default": False},
+    "tags": {"type": "json", "required": False},
+}
+
+
+def test_validator_collects_errors():
+    """Every invalid field is reported"""
+    validator = Validator(POST_SCHEMA)
+    clean, errors = validator.validate({"title": "x" * 11, "email": "nope"})
+    assert errors == {
+        "title": "Ensure this value has at most 10 characters",
+        "email": "Enter a valid email",
+    }
+
+    clean, errors = validator.validate(
+        {"title": "Hi", "email": "a@b.co", "views": "3", "extra": 1}
+    )
+    assert errors == {}
+    assert clean == {
+        "title": "Hi",
+        "email": "a@b.co",
+        "views": 3,
+        "published": False,
+        "tags": None,
+    }
+
+
+def test_python_and_msgspec_backends_agree():
+    """The msgspec fast path returns the same clean data as the Python path"""
+    factory = RequestFactory()
+    payload = {"title": "Hi", "email": "a@b.co", "views": 3}
+    results = []
+    for use_msgspec in (False, True):
+        validator = Validator(POST_SCHEMA, use_msgspec=use_msgspec)
+        app = App(enable_cache=False)
+
+        @app.post("posts", body=validator)
+        def create_post(req):
+            return {"body": req.body}
+
+        response = app.routes[0]["view"](
+            factory.post(
+                "/posts", data=json.dumps(payload), content_type="application/json"
+            )
+        )
+        results.append(json.loads(response.content))
+    assert results[0] == results[1]
+
+
+def test_route_body_returns_422():
+    """Invalid bodies never reach the handler"""
+    app = App(enable_cache=False)
+    calls = []
+
+    @app.post("posts", body={"title": "string:100"})
+    def create_post(req):
+        calls.append(True)
+        return {"ok": True}
+
+    response = app.routes[0]["view"](
+        RequestFactory().post("/posts", data="{}", content_type="application/json")
+    )
+    assert response.status_code == 422
+    assert json.loads(response.content)["details"] == {
+        "title": "This field is required"
+    }
+    assert calls == []
+
+
+def test_route_body_422_behind_legacy_middleware():
+    """One-argument middlewares pass the validation error through"""
+    app = App(enable_cache=False)
+    calls = []
+
+    def legacy(req):
+        return None
+
+    app.use(legacy)
+
+    @app.post("posts", body={"title": "string:100"})
+    def create_post(req):
+        calls.append(True)
+        return {"title": req.body["title"]}
+
+    view = app.routes[0]["view"]
+    response = view(
+        RequestFactory().post("/posts", data="{}", content_type="application/json")
+    )
+    assert response.status_code == 422
+    assert calls == []
+
+    response = view(
+        RequestFactory().post(
+            "/posts", data='{"title": "Hi"}', content_type="application/json"
+        )
+    )
+    assert response.status_code == 200
+    assert json.loads(response.content) == {"title": "Hi"}
+    assert calls == [True]
+
+
+def test_body_schema_feeds_swagger():
+    """Route schemas appear as requestBody in the OpenAPI spec"""
+    app = App(enable_cache=False)
+
+    @app.post("posts", body={"title": "string:100", "note": "text:blank"})
+    def create_post(req):
+        return {"ok": True}
+
+    SwaggerUI._spec = {"openapi": "3.0.0", "info": {}, "paths": {}}
+    spec = SwaggerUI._generate_spec(app)
+    schema = spec["paths"]["/posts"]["post"]["requestBody"]["content"][
+        "application/json"
+    ]["schema"]
+    assert schema["properties"]["title"] == {"type": "string", "maxLength": 100}
+    assert schema["required"] == ["title"]